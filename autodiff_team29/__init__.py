@@ -1,2 +1,9 @@
+from autodiff_team29.graph import Graph
 from autodiff_team29.node import Node
+from autodiff_team29.sparse import SparseTangent
+from autodiff_team29 import elementaries
 from autodiff_team29.vector_function import VectorFunction
+from autodiff_team29.forward import jacobian, jvp
+from autodiff_team29.reverse import grad, vjp
+from autodiff_team29.second_order import hessian, batch_hessian, hvp
+from autodiff_team29.persistence import PersistentCache
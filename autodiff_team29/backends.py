@@ -0,0 +1,155 @@
+from __future__ import annotations
+from typing import Callable, Union
+import math
+
+import numpy as np
+from numpy.typing import NDArray
+
+# values the math module evaluates without converting them first. Other NumPy scalars, such as float32,
+# keep their precision by being evaluated with NumPy
+_SCALAR_TYPES = frozenset([float, int, np.float64])
+
+
+def _logistic(x: float) -> float:
+    """
+    Numerically stable logistic function of a float, which never exponentiates a positive number
+
+    """
+    if x >= 0:
+        return 1 / (1 + math.exp(-x))
+
+    exponential = math.exp(x)
+    return exponential / (1 + exponential)
+
+
+class Backend:
+    __slots__ = (
+        "name",
+        "sqrt",
+        "exp",
+        "log",
+        "sin",
+        "cos",
+        "tan",
+        "arcsin",
+        "arccos",
+        "arctan",
+        "sinh",
+        "cosh",
+        "tanh",
+        "logistic",
+    )
+
+    def __init__(self, name: str, **kernels: Callable) -> None:
+        """
+        Set of kernels the elementary functions are evaluated with, one per mathematical function.
+
+        Parameters
+        ----------
+        name : str
+                Name of the backend.
+        **kernels : callable
+                Implementation of every function of the backend, i.e. sqrt, exp, log, sin, cos, tan,
+                arcsin, arccos, arctan, sinh, cosh, tanh and logistic.
+
+        Raises
+        ------
+        TypeError
+                If a kernel is missing or unknown.
+
+        Examples
+        --------
+        >>> SCALAR_BACKEND.sqrt(4.0)
+        2.0
+
+        """
+        missing = set(self.__slots__[1:]) - set(kernels)
+        if missing:
+            raise TypeError(f"Backend '{name}' is missing kernels {sorted(missing)}")
+
+        unknown = set(kernels) - set(self.__slots__[1:])
+        if unknown:
+            raise TypeError(f"Backend '{name}' got unknown kernels {sorted(unknown)}")
+
+        self.name = name
+        for function, kernel in kernels.items():
+            setattr(self, function, kernel)
+
+    def __repr__(self) -> str:
+        return f"Backend({self.name!r})"
+
+
+# Python floats are evaluated with the math module, which has a fraction of the call overhead of a ufunc
+SCALAR_BACKEND = Backend(
+    "math",
+    sqrt=math.sqrt,
+    exp=math.exp,
+    log=math.log,
+    sin=math.sin,
+    cos=math.cos,
+    tan=math.tan,
+    arcsin=math.asin,
+    arccos=math.acos,
+    arctan=math.atan,
+    sinh=math.sinh,
+    cosh=math.cosh,
+    tanh=math.tanh,
+    logistic=_logistic,
+)
+
+# arrays, and scalars the math module cannot evaluate, are evaluated with NumPy ufuncs
+ARRAY_BACKEND = Backend(
+    "numpy",
+    sqrt=np.sqrt,
+    exp=np.exp,
+    log=np.log,
+    sin=np.sin,
+    cos=np.cos,
+    tan=np.tan,
+    arcsin=np.arcsin,
+    arccos=np.arccos,
+    arctan=np.arctan,
+    sinh=np.sinh,
+    cosh=np.cosh,
+    tanh=np.tanh,
+    logistic=lambda x: np.exp(-np.logaddexp(0, -x)),
+)
+
+
+def evaluate(kernel: Callable, value: Union[int, float, NDArray]):
+    """
+    Returns kernel(backend, value), evaluated with SCALAR_BACKEND for Python and float64 scalars and with
+    ARRAY_BACKEND otherwise. The math module raises
+    on overflow, on division by zero and outside of the domain of a function, where NumPy returns inf or
+    NaN, so a scalar that raises is evaluated again as a NumPy scalar and gives the same result either way.
+
+    Parameters
+    ----------
+    kernel : callable
+            Function of a backend and a value.
+    value : int, float, np.ndarray
+            Value to evaluate kernel at.
+
+    Examples
+    --------
+    >>> evaluate(lambda backend, x: backend.exp(x), 1.0)
+    2.718281828459045
+    >>> evaluate(lambda backend, x: backend.exp(x), 1000.0)
+    inf
+
+    """
+    if type(value) in _SCALAR_TYPES:
+        try:
+            return kernel(SCALAR_BACKEND, value)
+        except (ArithmeticError, ValueError):
+            value = np.float64(value)
+
+    return kernel(ARRAY_BACKEND, value)
+
+
+def ndim(value: Union[int, float, NDArray]) -> int:
+    """
+    Returns the number of dimensions of value, without the overhead of np.ndim for scalars
+
+    """
+    return 0 if type(value) in _SCALAR_TYPES else np.ndim(value)
@@ -1,7 +1,114 @@
 from typing import Union
+import contextlib
 import numpy as np
-import math
-from autodiff_team29 import Node
+from autodiff_team29 import Graph, Node
+from autodiff_team29.backends import evaluate
+
+
+def _domain_violation(invalid: np.ndarray, message: str) -> np.ndarray:
+    """
+    Handles inputs outside of the domain of an elementary function according to the domain policy of
+    the active graph.
+
+    Parameters
+    ----------
+    invalid : np.ndarray
+        Entries of the input that are outside of the domain, at least one of which is True.
+    message : str
+        Message of the error raised under the "raise" policy.
+
+    Returns
+    -------
+    np.ndarray
+        invalid, under the "mask" policy.
+
+    Raises
+    ------
+    ValueError
+        Under the "raise" policy.
+
+    """
+    if Graph.current().domain_policy == "raise":
+        raise ValueError(message)
+    return invalid
+
+
+def _any(invalid: Union[bool, np.ndarray]) -> bool:
+    """
+    Returns True if any entry is invalid, without the overhead of np.any for scalars
+
+    """
+    return invalid if type(invalid) is bool else bool(np.any(invalid))
+
+
+def _ignore_invalid_entries(invalid: Union[np.ndarray, None]):
+    """
+    Returns a context that silences the floating point warnings of evaluating a function outside of its
+    domain, if some entries are invalid. Those entries are replaced by NaN afterwards.
+
+    """
+    if invalid is None:
+        return contextlib.nullcontext()
+    return np.errstate(divide="ignore", invalid="ignore", over="ignore")
+
+
+# kernels of the elementary functions, which return the value of the function and its derivative with
+# respect to its input, evaluated with the backend matching the input
+def _sqrt_kernel(backend, x):
+    root = backend.sqrt(x)
+    return root, 1 / (2 * root)
+
+
+def _ln_kernel(backend, x):
+    return backend.log(x), 1 / x
+
+
+def _log_kernel(backend, x):
+    return backend.log(x)
+
+
+def _exp_kernel(backend, x):
+    return backend.exp(x)
+
+
+def _sin_kernel(backend, x):
+    return backend.sin(x), backend.cos(x)
+
+
+def _cos_kernel(backend, x):
+    return backend.cos(x), -backend.sin(x)
+
+
+def _tan_kernel(backend, x):
+    return backend.tan(x), 1 / backend.cos(x) ** 2
+
+
+def _arcsin_kernel(backend, x):
+    return backend.arcsin(x), 1 / backend.sqrt(1 - x**2)
+
+
+def _arccos_kernel(backend, x):
+    return backend.arccos(x), -1 / backend.sqrt(1 - x**2)
+
+
+def _arctan_kernel(backend, x):
+    return backend.arctan(x), 1 / (1 + x**2)
+
+
+def _sinh_kernel(backend, x):
+    return backend.sinh(x), backend.cosh(x)
+
+
+def _cosh_kernel(backend, x):
+    return backend.cosh(x), backend.sinh(x)
+
+
+def _tanh_kernel(backend, x):
+    return backend.tanh(x)
+
+
+def _logistic_kernel(backend, x):
+    return backend.logistic(x)
 
 
 def _check_log_domain_restrictions(x: Node) -> None:
@@ -15,8 +122,10 @@ def _check_log_domain_restrictions(x: Node) -> None:
 
     Returns
     -------
-    Returns None
+    None
         if x > 0
+    np.ndarray
+        entries where x <= 0, under the "mask" domain policy
 
     Raises
     ------
@@ -33,8 +142,11 @@ def _check_log_domain_restrictions(x: Node) -> None:
     ValueError: Value '-1' not valid for a logarithmic functionNone
 
     """
-    if x.value <= 0:
-        raise ValueError(f"Value '{x.value} 'not valid for a logarithmic function")
+    invalid = x.value <= 0
+    if _any(invalid):
+        return _domain_violation(
+            invalid, f"Value '{x.value} 'not valid for a logarithmic function"
+        )
 
 
 def _check_sqrt_domain_restrictions(x: Node) -> None:
@@ -50,6 +162,8 @@ def _check_sqrt_domain_restrictions(x: Node) -> None:
     -------
     None
         if x >= 0
+    np.ndarray
+        entries where x < 0, under the "mask" domain policy
 
     Raises
     ------
@@ -66,8 +180,9 @@ def _check_sqrt_domain_restrictions(x: Node) -> None:
     ValueError: Square roots of negative numbers not supported
 
     """
-    if x.value < 0:
-        raise ValueError("Square roots of negative numbers not supported")
+    invalid = x.value < 0
+    if _any(invalid):
+        return _domain_violation(invalid, "Square roots of negative numbers not supported")
 
 
 def _check_tan_domain_restrictions(x: Node) -> None:
@@ -82,6 +197,8 @@ def _check_tan_domain_restrictions(x: Node) -> None:
     -------
     None
         if cos(x) != 0
+    np.ndarray
+        entries where cos(x) == 0, under the "mask" domain policy
 
     Raises
     ------
@@ -98,8 +215,9 @@ def _check_tan_domain_restrictions(x: Node) -> None:
     ValueError: Value, pi/2, not within domain of tan
 
     """
-    if np.cos(x.value) == 0:
-        raise ValueError(f"Value, {x.value}, not within domain of tan")
+    invalid = evaluate(_cos_kernel, x.value)[0] == 0
+    if _any(invalid):
+        return _domain_violation(invalid, f"Value, {x.value}, not within domain of tan")
 
 
 def _check_arccos_domain_restrictions(x: Node) -> None:
@@ -115,6 +233,8 @@ def _check_arccos_domain_restrictions(x: Node) -> None:
     -------
     None
         if -1 ≤ x ≤ 1
+    np.ndarray
+        entries where |x| > 1, under the "mask" domain policy
 
     Raises
     ------
@@ -131,9 +251,10 @@ def _check_arccos_domain_restrictions(x: Node) -> None:
     ValueError: '-5' is not within the domain [-1,1] of f(x)=arccos(x)
 
     """
-    if np.abs(x.value) > 1:
-        raise ValueError(
-            f"'{x.value}' is not within the domain [-1,1] of f(x)=arccos(x)"
+    invalid = abs(x.value) > 1
+    if _any(invalid):
+        return _domain_violation(
+            invalid, f"'{x.value}' is not within the domain [-1,1] of f(x)=arccos(x)"
         )
 
 
@@ -150,6 +271,8 @@ def _check_arcsin_domain_restrictions(x: Node) -> None:
     -------
     None
         if -1 ≤ x ≤ 1
+    np.ndarray
+        entries where |x| > 1, under the "mask" domain policy
 
     Raises
     ------
@@ -165,8 +288,11 @@ def _check_arcsin_domain_restrictions(x: Node) -> None:
     >>> _check_arcsin_domain_restrictions(Node("-5",-1,0))
     ValueError: '-5' is not within the domain [-1,1] of f(x)=arcsin(x)
     """
-    if np.abs(x.value) > 1:
-        raise ValueError(f"{x.value} is not within the domain [-1,1] of f(x)=arcsin(x)")
+    invalid = abs(x.value) > 1
+    if _any(invalid):
+        return _domain_violation(
+            invalid, f"{x.value} is not within the domain [-1,1] of f(x)=arcsin(x)"
+        )
 
 
 def sqrt(x: Union[int, float, Node]) -> Node:
@@ -193,17 +319,21 @@ def sqrt(x: Union[int, float, Node]) -> Node:
     ValueError: Square roots of negative numbers not supported
 
     """
-    symbolic_representation = "sqrt({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    _check_sqrt_domain_restrictions(x)
-
-    forward_trace = np.sqrt(x.value)
-    tangent_trace = x.derivative / (2 * np.sqrt(x.value))
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("sqrt", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    invalid = _check_sqrt_domain_restrictions(x)
+
+    with _ignore_invalid_entries(invalid):
+        forward_trace, local_derivative = evaluate(_sqrt_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key, "sqrt({})", forward_trace, tangent_trace, operands=(x,), invalid=invalid, graph=graph
+    )
 
     return new_node
 
@@ -225,24 +355,28 @@ def ln(x: Union[int, float, Node]) -> Node:
     Examples
     --------
     >>> ln(Node("1",1,0))
-    Node("ln(1)", 0, 1)
+    Node("ln(1)", 0, 0)
     >>> ln(Node("0",0,0))
     ValueError: Value 0 not valid for a logarithmic function
     >>> ln(-1)
     ValueError: Value '-1' not valid for a logarithmic functionNone
 
     """
-    symbolic_representation = "ln({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    _check_log_domain_restrictions(x)
-
-    forward_trace = np.log(x.value)
-    tangent_trace = 1 / x.value
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("ln", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    invalid = _check_log_domain_restrictions(x)
+
+    with _ignore_invalid_entries(invalid):
+        forward_trace, local_derivative = evaluate(_ln_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key, "ln({})", forward_trace, tangent_trace, operands=(x,), invalid=invalid, graph=graph
+    )
 
     return new_node
 
@@ -266,9 +400,9 @@ def log(x: Union[int, float, Node], base: Union[int, float, Node] = np.e) -> Nod
 
     Examples
     --------
-    >>> log(Node("1",1,0), 10)
+    >>> log(Node("1",1,1), 10)
     Node("log10(1)", 0, 0.4343)
-    >>> log(Node("1",1,0), 2)
+    >>> log(Node("1",1,1), 2)
     Node("log2(1)", 0, 1.4427)
     >>> log(Node("0",0,0))
     ValueError: Value 0 not valid for a logarithmic function
@@ -279,17 +413,30 @@ def log(x: Union[int, float, Node], base: Union[int, float, Node] = np.e) -> Nod
     if not base > 1:
         raise ValueError("Base must be greater than 1")
 
-    symbolic_representation = f"log{str(base)}({str(x)})"
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    _check_log_domain_restrictions(x)
-
-    forward_trace = math.log(x.value, base)
-    tangent_trace = 1 / (x.value * np.log(base))
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    base = Node._convert_numeric_type_to_node(base)
+    key = ("log", x._id, base._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    invalid = _check_log_domain_restrictions(x)
+
+    with _ignore_invalid_entries(invalid):
+        forward_trace, local_derivative = evaluate(_ln_kernel, x.value)
+        log_base = evaluate(_log_kernel, base.value)
+        forward_trace = forward_trace / log_base
+    tangent_trace = Node._chain_rule(local_derivative / log_base, x)
+    new_node = Node._create_node(
+        key,
+        "log{1}({0})",
+        forward_trace,
+        tangent_trace,
+        operands=(x, base),
+        invalid=invalid,
+        graph=graph,
+    )
 
     return new_node
 
@@ -318,15 +465,18 @@ def exp(x: Union[int, float, Node]) -> Node:
     Node("exp(-1)", 0.3679, 0)
 
     """
-    symbolic_representation = "exp({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    forward_trace = np.exp(x.value)
-    tangent_trace = x.derivative * forward_trace
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("exp", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    forward_trace = evaluate(_exp_kernel, x.value)
+    tangent_trace = Node._chain_rule(forward_trace, x)
+    new_node = Node._create_node(
+        key, "exp({})", forward_trace, tangent_trace, operands=(x,), graph=graph
+    )
 
     return new_node
 
@@ -355,15 +505,18 @@ def sin(x: Union[int, float, Node]) -> Node:
     Node("sin(-1)", -0.8415, 0)
 
     """
-    symbolic_representation = "sin({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    forward_trace = np.sin(x.value)
-    tangent_trace = np.cos(x.value) * x.derivative
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("sin", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    forward_trace, local_derivative = evaluate(_sin_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key, "sin({})", forward_trace, tangent_trace, operands=(x,), graph=graph
+    )
 
     return new_node
 
@@ -392,15 +545,18 @@ def cos(x: Union[int, float, Node]) -> Node:
     Node("cos(-1)", -0.5403, 0)
 
     """
-    symbolic_representation = "cos({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    forward_trace = np.cos(x.value)
-    tangent_trace = -np.sin(x.value) * x.derivative
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("cos", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    forward_trace, local_derivative = evaluate(_cos_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key, "cos({})", forward_trace, tangent_trace, operands=(x,), graph=graph
+    )
 
     return new_node
 
@@ -429,17 +585,21 @@ def tan(x: Union[int, float, Node]) -> Node:
     Node("tan(-1)", -1.557, 0)
 
     """
-    symbolic_representation = "tan({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    _check_tan_domain_restrictions(x)
-
-    forward_trace = np.tan(x.value)
-    tangent_trace = x.derivative / (np.cos(x.value) ** 2)
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("tan", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    invalid = _check_tan_domain_restrictions(x)
+
+    with _ignore_invalid_entries(invalid):
+        forward_trace, local_derivative = evaluate(_tan_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key, "tan({})", forward_trace, tangent_trace, operands=(x,), invalid=invalid, graph=graph
+    )
 
     return new_node
 
@@ -468,17 +628,27 @@ def arcsin(x: Union[int, float, Node]) -> Node:
     Node("arcsin(-1)", -1.5708, 0)
 
     """
-    symbolic_representation = "arcsin({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    _check_arcsin_domain_restrictions(x)
-
-    forward_trace = np.arcsin(x.value)
-    tangent_trace = x.derivative / np.sqrt(1 - x.value ** 2)
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("arcsin", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    invalid = _check_arcsin_domain_restrictions(x)
+
+    with _ignore_invalid_entries(invalid):
+        forward_trace, local_derivative = evaluate(_arcsin_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key,
+        "arcsin({})",
+        forward_trace,
+        tangent_trace,
+        operands=(x,),
+        invalid=invalid,
+        graph=graph,
+    )
 
     return new_node
 
@@ -507,17 +677,27 @@ def arccos(x: Union[int, float, Node]) -> Node:
     Node("arccos(-1)", -3.1416, 0)
 
     """
-    symbolic_representation = "arccos({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    _check_arccos_domain_restrictions(x)
-
-    forward_trace = np.arccos(x.value)
-    tangent_trace = -x.derivative / np.sqrt(1 - x.value ** 2)
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("arccos", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    invalid = _check_arccos_domain_restrictions(x)
+
+    with _ignore_invalid_entries(invalid):
+        forward_trace, local_derivative = evaluate(_arccos_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key,
+        "arccos({})",
+        forward_trace,
+        tangent_trace,
+        operands=(x,),
+        invalid=invalid,
+        graph=graph,
+    )
 
     return new_node
 
@@ -546,18 +726,17 @@ def arctan(x: Union[int, float, Node]) -> Node:
     Node("arctan(-1)", -0.7854, 0)
 
     """
-    symbolic_representation = "arctan({})".format(str(x))
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    forward_trace = np.arctan(x.value)
-    tangent_trace = x.derivative / (1 + x.value ** 2)
-    new_node = Node(
-        symbolic_representation,
-        forward_trace,
-        tangent_trace,
+    key = ("arctan", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    forward_trace, local_derivative = evaluate(_arctan_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key, "arctan({})", forward_trace, tangent_trace, operands=(x,), graph=graph
     )
 
     return new_node
@@ -584,10 +763,6 @@ def power(base: Union[int, float, Node], exponent: Union[int, float, Node]) -> N
     Node("3**2", 9, 0)
 
     """
-    symbolic_representation = f"({base}**{exponent})"
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     base = Node._convert_numeric_type_to_node(base)
 
     return base ** exponent
@@ -614,15 +789,18 @@ def sinh(x: Union[int, float, Node]) -> Node:
     Node("sinh(1)", 1.1752011936438014, 0)
 
     """
-    symbolic_representation = f"sinh({x})"
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    forward_trace = np.sinh(x.value)
-    tangent_trace = np.cosh(x.value) * x.derivative
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("sinh", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    forward_trace, local_derivative = evaluate(_sinh_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key, "sinh({})", forward_trace, tangent_trace, operands=(x,), graph=graph
+    )
 
     return new_node
 
@@ -647,15 +825,18 @@ def cosh(x: Union[int, float, Node]) -> Node:
     Node("cosh(1)", 1.5430806348152437, 0)
 
     """
-    symbolic_representation = f"cosh({x})"
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    forward_trace = np.cosh(x.value)
-    tangent_trace = np.sinh(x.value) * x.derivative
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("cosh", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    forward_trace, local_derivative = evaluate(_cosh_kernel, x.value)
+    tangent_trace = Node._chain_rule(local_derivative, x)
+    new_node = Node._create_node(
+        key, "cosh({})", forward_trace, tangent_trace, operands=(x,), graph=graph
+    )
 
     return new_node
 
@@ -681,15 +862,18 @@ def tanh(x: Union[int, float, Node]) -> Node:
     Node("tanh(1)", 0.76159415595, 0)
 
     """
-    symbolic_representation = f"tanh({x})"
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
-
-    forward_trace = np.tanh(x.value)
-    tangent_trace = (1 - np.tanh(x.value) ** 2) * x.derivative
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
+    key = ("tanh", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    forward_trace = evaluate(_tanh_kernel, x.value)
+    tangent_trace = Node._chain_rule(1 - forward_trace ** 2, x)
+    new_node = Node._create_node(
+        key, "tanh({})", forward_trace, tangent_trace, operands=(x,), graph=graph
+    )
 
     return new_node
 
@@ -714,18 +898,202 @@ def logistic(x: Union[int, float, Node]) -> Node:
     Node("logistic(1)", 1.1752011936438014, 0)
 
     """
-    symbolic_representation = f"logistic({x})"
-    if Node._check_node_exists(symbolic_representation):
-        return Node._get_existing_node(symbolic_representation)
-
     x = Node._convert_numeric_type_to_node(x)
+    key = ("logistic", x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    forward_trace = evaluate(_logistic_kernel, x.value)
+    tangent_trace = Node._chain_rule(forward_trace * (1 - forward_trace), x)
+    new_node = Node._create_node(
+        key, "logistic({})", forward_trace, tangent_trace, operands=(x,), graph=graph
+    )
+
+    return new_node
+
+
+def dot(a: Union[int, float, np.ndarray, Node], b: Union[int, float, np.ndarray, Node]) -> Node:
+    """
+    Takes in two instances of the Node class and returns a new node with its symbolic
+    representation, forward trace, and tangent trace, which are based on the dot product
+    of a and b. Like np.dot, scalars are multiplied, and vectors and matrices are multiplied
+    as matrices, so the tangent is computed with a single matrix product per operand.
+
+    Parameters
+    ----------
+    a : Union[int, float, np.ndarray, Node]
+
+    b : Union[int, float, np.ndarray, Node]
+
+    Returns
+    -------
+    Node
+
+    Raises
+    ------
+    ValueError
+        if a or b has more than two dimensions.
+
+    Examples
+    --------
+    >>> x = Node("x", np.array([1.0, 2.0]), np.eye(2))
+    >>> dot(x, x)
+    Node("(x@x)", 5.0, [2. 4.])
+
+    """
+    a = Node._convert_numeric_type_to_node(a)
+    b = Node._convert_numeric_type_to_node(b)
+
+    if np.ndim(a.value) == 0 or np.ndim(b.value) == 0:
+        return a * b
+
+    if np.ndim(a.value) > 2 or np.ndim(b.value) > 2:
+        raise ValueError(
+            "Dot products of arrays with more than two dimensions are not supported, use @ instead"
+        )
+
+    return a @ b
 
-    forward_trace = np.exp(-np.logaddexp(0, -x.value))
-    tangent_trace = (
-            (np.exp(-np.logaddexp(0, -x.value)))
-            * (1 - np.exp(-np.logaddexp(0, -x.value)))
-            * x.derivative
+
+# reduction name, axes and keepdims of every reduction operation that has been built, by operation name,
+# so the axes of a reduction node are known without parsing its operation name. Axes of None stand for
+# all axes
+_REDUCTIONS = {}
+
+
+def _reduce(
+    x: Union[np.ndarray, Node],
+    axis: Union[int, tuple, None],
+    keepdims: bool,
+    name: str,
+    reduction,
+) -> Node:
+    """
+    Applies a linear reduction such as np.sum or np.mean over the axes of the value of x. The same
+    reduction is applied to the tangent trace, over the same axes, leaving any seed directions intact.
+    Both accumulate in the accumulation dtype of the active graph, if it has one.
+
+    """
+    x = Node._convert_numeric_type_to_node(x)
+    keepdims = bool(keepdims)
+
+    n_dimensions = np.ndim(x.value)
+    options = []
+    if axis is None:
+        axes = tuple(range(n_dimensions))
+        recorded_axes = None
+        arguments = ""
+    else:
+        axes = (axis,) if isinstance(axis, int) else tuple(axis)
+        if not all(-n_dimensions <= a < n_dimensions for a in axes):
+            raise ValueError(f"Axis {axis} is out of bounds for a value with {n_dimensions} dimensions")
+
+        # negative axes would refer to the seed directions of the tangent trace
+        axes = tuple(sorted(a % n_dimensions for a in axes))
+        recorded_axes = axes
+        options.append(f"axis={axes}")
+        arguments = ", axis=" + str(axes if len(axes) > 1 else axes[0])
+
+    if keepdims:
+        options.append("keepdims=True")
+        arguments += ", keepdims=True"
+
+    operation = f"{name}({', '.join(options)})" if options else name
+    template = name + "({}" + arguments + ")"
+    _REDUCTIONS.setdefault(operation, (name, recorded_axes, keepdims))
+
+    key = (operation, x._id)
+    graph = Graph.current()
+    existing = Node._lookup_node(key, graph)
+    if existing is not None:
+        return existing
+
+    accumulation_dtype = graph.accumulation_dtype
+    forward_trace = reduction(x.value, axis=axes, dtype=accumulation_dtype, keepdims=keepdims)
+    if Node._is_zero_derivative(x.derivative):
+        tangent_trace = 0
+    else:
+        # a derivative of lower rank than the value, such as that of a row scaled batch, is spread over
+        # every entry it stands for before the reduction, keeping any trailing seed directions
+        shape = np.shape(x.value)
+        if np.ndim(x.derivative) > n_dimensions:
+            shape = shape + np.shape(x.derivative)[n_dimensions:]
+        derivative = np.broadcast_to(x.derivative, shape)
+        tangent_trace = reduction(
+            derivative, axis=axes, dtype=accumulation_dtype, keepdims=keepdims
+        )
+    new_node = Node._create_node(
+        key, template, forward_trace, tangent_trace, operands=(x,), graph=graph
     )
-    new_node = Node(symbolic_representation, forward_trace, tangent_trace)
 
     return new_node
+
+
+def sum(
+    x: Union[np.ndarray, Node], axis: Union[int, tuple, None] = None, keepdims: bool = False
+) -> Node:
+    """
+    Takes in an instance of the Node class and returns a new node with its symbolic
+    representation, forward trace, and tangent trace, which are based on the sum
+    of the elements of x over the given axes.
+
+    Parameters
+    ----------
+    x : Union[np.ndarray, Node]
+
+    axis : Union[int, tuple, None]
+        Axes of the value of x to sum over. If None, all elements are summed.
+
+    keepdims : bool
+        If True, the axes summed over are kept with size one, as in np.sum.
+
+    Returns
+    -------
+    Node
+
+    Examples
+    --------
+    >>> sum(Node("x", np.array([1.0, 2.0]), 1))
+    Node("sum(x)", 3.0, 2.0)
+
+    """
+    return _reduce(x, axis, keepdims, "sum", np.sum)
+
+
+def mean(
+    x: Union[np.ndarray, Node], axis: Union[int, tuple, None] = None, keepdims: bool = False
+) -> Node:
+    """
+    Takes in an instance of the Node class and returns a new node with its symbolic
+    representation, forward trace, and tangent trace, which are based on the mean
+    of the elements of x over the given axes.
+
+    Parameters
+    ----------
+    x : Union[np.ndarray, Node]
+
+    axis : Union[int, tuple, None]
+        Axes of the value of x to average over. If None, all elements are averaged.
+
+    keepdims : bool
+        If True, the axes averaged over are kept with size one, as in np.mean.
+
+    Returns
+    -------
+    Node
+
+    Examples
+    --------
+    >>> mean(Node("x", np.array([1.0, 2.0]), 1))
+    Node("mean(x)", 1.5, 1.0)
+
+    """
+    return _reduce(x, axis, keepdims, "mean", np.mean)
+
+
+# route the NumPy equivalents of these functions to their implementation for nodes
+Node.register_array_function(np.dot, dot)
+Node.register_array_function(np.sum, sum)
+Node.register_array_function(np.mean, mean)
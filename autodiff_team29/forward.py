@@ -0,0 +1,200 @@
+from typing import Callable, List, Sequence, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from autodiff_team29.graph import Graph
+from autodiff_team29.node import Node
+
+# number of seed directions propagated per pass when no chunk size is given. Derivatives of this length
+# fit comfortably in cache, while amortizing the cost of building the graph over many directions
+_DEFAULT_CHUNK_SIZE = 64
+
+
+def jacobian(
+    function: Callable[[List[Node]], Union[Node, List[Node]]],
+    point: Sequence[float],
+    chunk_size: Union[int, None] = None,
+    symbols: Union[Sequence[str], None] = None,
+) -> NDArray[float]:
+    """
+    Computes the Jacobian of a function of n inputs with chunked forward mode. Rather than seeding every
+    input with a vector of length n, the function is evaluated once per chunk of at most chunk_size inputs,
+    which are seeded in their own direction while the other inputs are held constant. Every intermediate
+    node then carries at most chunk_size derivatives, and the nodes of a pass are released before the next
+    one starts, so peak memory is bounded by the chunk size rather than the number of inputs. Every pass
+    inherits the domain policy and dtype of the active graph.
+
+    Parameters
+    ----------
+    function : callable
+            Function that takes a list of n nodes, one per input, and returns a node or a list of nodes.
+    point : sequence of float
+            Input point the Jacobian is computed at.
+    chunk_size : int, optional
+            Maximum number of inputs seeded per pass. Defaults to 64.
+    symbols : sequence of str, optional
+            Symbols of the inputs. Defaults to x1, ..., xn.
+
+    Returns
+    -------
+    np.ndarray :
+            Jacobian of shape (m, n) if the function returns a list of m nodes, or gradient of shape (n,)
+            if it returns a single node.
+
+    Raises
+    ------
+    ValueError
+            If chunk_size is not a positive integer, or the number of symbols does not match the point.
+
+    Examples
+    --------
+    >>> jacobian(lambda x: [x[0] * x[1], sin(x[0])], [2.0, 3.0], chunk_size=1)
+    array([[ 3.        ,  2.        ],
+           [-0.41614684,  0.        ]])
+
+    """
+    chunk_size = _chunk_size(chunk_size)
+    point = [float(value) for value in point]
+    n_inputs = len(point)
+    symbols = _input_symbols(n_inputs, symbols)
+
+    graph = Graph.current()
+    columns = []
+    is_scalar_function = False
+    for start in range(0, max(n_inputs, 1), chunk_size):
+        stop = min(start + chunk_size, n_inputs)
+
+        # each pass has its own graph, so its nodes are released once their derivatives are read
+        with Graph(domain_policy=graph.domain_policy, dtype=graph.dtype):
+            inputs = _seed_chunk(symbols, point, start, stop)
+            outputs = function(inputs)
+
+            is_scalar_function = not isinstance(outputs, (list, tuple))
+            if is_scalar_function:
+                outputs = [outputs]
+
+            chunk = np.zeros((len(outputs), stop - start), dtype=graph.dtype)
+            for row, output in enumerate(outputs):
+                # outputs that do not depend on the seeded inputs keep a zero derivative
+                if isinstance(output, Node):
+                    chunk[row] = output.derivative
+
+        columns.append(chunk)
+
+    result = np.concatenate(columns, axis=1)
+    return result[0] if is_scalar_function else result
+
+
+def jvp(
+    function: Callable[[List[Node]], Union[Node, List[Node]]],
+    point: Sequence[float],
+    direction: Sequence[float],
+    symbols: Union[Sequence[str], None] = None,
+) -> Union[float, NDArray[float]]:
+    """
+    Computes the product of the Jacobian of a function with a direction vector in a single forward pass,
+    without forming the Jacobian. Every input is seeded with its entry of the direction, rather than with a
+    one hot seed vector, so every node carries a single directional derivative.
+
+    Parameters
+    ----------
+    function : callable
+            Function that takes a list of n nodes, one per input, and returns a node or a list of nodes.
+    point : sequence of float
+            Input point the product is computed at.
+    direction : sequence of float
+            Vector of length n the Jacobian is multiplied with.
+    symbols : sequence of str, optional
+            Symbols of the inputs. Defaults to x1, ..., xn.
+
+    Returns
+    -------
+    float, np.ndarray :
+            Jacobian vector product of shape (m,) if the function returns a list of m nodes, or directional
+            derivative if it returns a single node.
+
+    Raises
+    ------
+    ValueError
+            If the direction or the symbols do not match the point.
+
+    Examples
+    --------
+    >>> jvp(lambda x: [x[0] * x[1], sin(x[0])], [2.0, 3.0], [1.0, -1.0])
+    array([ 1.        , -0.41614684])
+
+    """
+    point = [float(value) for value in point]
+    direction = np.asarray(direction, dtype=float)
+    if direction.shape != (len(point),):
+        raise ValueError(
+            f"Expected a direction of shape ({len(point)},) to match the input point, "
+            f"got {direction.shape}"
+        )
+    symbols = _input_symbols(len(point), symbols)
+
+    graph = Graph.current()
+    with Graph(domain_policy=graph.domain_policy, dtype=graph.dtype):
+        inputs = [
+            Node(symbol, value, float(tangent))
+            for symbol, value, tangent in zip(symbols, point, direction)
+        ]
+        outputs = function(inputs)
+
+        if not isinstance(outputs, (list, tuple)):
+            return _directional_derivative(outputs)
+        return np.array([_directional_derivative(output) for output in outputs], dtype=graph.dtype)
+
+
+def _directional_derivative(output: Union[Node, float]) -> float:
+    """
+    Returns the derivative of an output of a single forward pass, which is 0 for constant outputs
+
+    """
+    return output.derivative if isinstance(output, Node) else 0.0
+
+
+def _chunk_size(chunk_size: Union[int, None]) -> int:
+    """
+    Returns the number of seed directions per pass, 64 unless given
+
+    """
+    if chunk_size is None:
+        return _DEFAULT_CHUNK_SIZE
+
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError(f"Chunk size must be a positive integer, got '{chunk_size}'")
+    return chunk_size
+
+
+def _input_symbols(n_inputs: int, symbols: Union[Sequence[str], None]) -> Sequence[str]:
+    """
+    Returns the symbols of n_inputs inputs, x1, ..., xn unless given
+
+    """
+    if symbols is None:
+        return [f"x{i + 1}" for i in range(n_inputs)]
+
+    if len(symbols) != n_inputs:
+        raise ValueError(
+            f"Expected {n_inputs} symbols to match the input point, got {len(symbols)}"
+        )
+    return symbols
+
+
+def _seed_chunk(
+    symbols: Sequence[str], point: List[float], start: int, stop: int
+) -> List[Node]:
+    """
+    Returns the input nodes of a single pass, in which the inputs start to stop are seeded in their own
+    direction and every other input is a constant.
+
+    """
+    directions = np.eye(stop - start)
+    return [
+        Node(symbol, value, 1, seed_vector=directions[i - start])
+        if start <= i < stop
+        else Node(symbol, value, 0)
+        for i, (symbol, value) in enumerate(zip(symbols, point))
+    ]
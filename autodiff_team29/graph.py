@@ -0,0 +1,501 @@
+from __future__ import annotations
+from typing import Sequence, Union
+import threading
+
+import numpy as np
+
+from autodiff_team29.registry import LRURegistry, StripedRegistry, UnboundedRegistry, WeakRegistry
+from autodiff_team29.stats import RegistryStats, approximate_bytes
+
+
+class Graph:
+    def __init__(
+        self,
+        max_size: Union[int, None] = None,
+        weak_references: bool = False,
+        overwrite_mode: bool = False,
+        thread_safe: bool = False,
+        persistent_cache=None,
+        domain_policy: str = "raise",
+        dtype=None,
+        collect_stats: bool = False,
+    ) -> None:
+        """
+        Owns the state of a computational graph: the node registry, the overwrite mode setting and the
+        number of nodes computed. Nodes are created in the graph that is currently active. A default graph
+        is active unless another graph is entered as a context manager, so independent computations can keep
+        separate caches and a cache is dropped as a whole once its graph is exited. Graphs are entered per
+        thread, see set_concurrency_mode for how the default graph is shared between threads.
+
+        Parameters
+        ----------
+        max_size : int, optional
+                Maximum number of nodes stored in the registry. If None, the registry is unbounded.
+        weak_references : bool, default=False
+                If true, the registry holds weak references to its nodes.
+        overwrite_mode : bool, default=False
+                If true, nodes are always recomputed and never stored in the registry.
+        thread_safe : bool, default=False
+                If true, the registry is lock striped so the graph can be shared between threads.
+                Thread safe registries can neither be bounded nor hold weak references.
+        persistent_cache : PersistentCache, optional
+                On disk cache behind the registry, see set_persistent_cache.
+        domain_policy : str, default="raise"
+                How elementary functions handle inputs outside of their domain, see domain_policy.
+        dtype : np.dtype, str, optional
+                Floating point type values and derivatives are stored in, see dtype.
+        collect_stats : bool, default=False
+                If true, lookups, inserts and evictions of the registry are counted, see registry_stats.
+
+        Examples
+        --------
+        >>> with Graph() as graph:
+        ...     x = Node("x", 10, 1)
+        ...     y = x * x
+        >>> graph.count_nodes_stored()
+        2
+        >>> Graph.current().count_nodes_stored()
+        0
+
+        """
+        self._stats = RegistryStats()
+
+        if thread_safe:
+            if weak_references:
+                raise ValueError("A thread safe registry cannot hold weak references")
+            self._registry = StripedRegistry()
+            self._registry.resize(max_size)
+        elif weak_references:
+            self._registry = WeakRegistry()
+            self._registry.resize(max_size)
+        else:
+            self._registry = self._strong_registry(max_size)
+
+        # kept to bound the registry again if it is switched back from weak to strong references
+        self._max_size = max_size
+        self._collect_stats = collect_stats
+        self._overwrite_mode = overwrite_mode
+        self._domain_policy = None
+        self.domain_policy = domain_policy
+        self.dtype = dtype
+        self._nodes_computed = 0
+        self._persistent_cache = persistent_cache
+
+    @staticmethod
+    def current() -> Graph:
+        """
+        Returns the graph that nodes are currently created in by the calling thread
+
+        """
+        state = _THREAD_STATE
+        if state.active_graphs:
+            return state.active_graphs[-1]
+
+        if _CONCURRENCY_MODE == "thread_local":
+            # a default graph created before the concurrency mode last changed is replaced
+            graph = state.default_graph
+            if graph is None or state.default_generation != _DEFAULT_GENERATION:
+                graph = state.default_graph = Graph()
+                state.default_generation = _DEFAULT_GENERATION
+            return graph
+
+        return _DEFAULT_GRAPH
+
+    @staticmethod
+    def set_concurrency_mode(mode: Union[str, None]) -> None:
+        """
+        Selects how the default graph is shared between threads. Graphs entered as context managers are
+        always private to the thread that entered them. Changing the mode replaces the default graph of
+        every thread, so nodes stored in them are discarded.
+
+        Parameters
+        ----------
+        mode : str, None
+            None : a single default graph is shared by all threads without any synchronization.
+                   This is the fastest option for single threaded programs.
+            "thread_local" : every thread has its own default graph, so threads never see each other's
+                   nodes and the registry is never locked.
+            "shared" : a single default graph is shared by all threads, with a lock striped registry so
+                   threads can safely reuse each other's nodes.
+
+        Raises
+        ------
+        ValueError
+            If mode is not one of the options above.
+
+        Examples
+        --------
+        >>> Graph.set_concurrency_mode("thread_local")
+        >>> Graph.set_concurrency_mode(None)
+
+        """
+        global _CONCURRENCY_MODE, _DEFAULT_GRAPH, _DEFAULT_GENERATION
+
+        if mode not in _CONCURRENCY_MODES:
+            raise ValueError(
+                f"Unsupported concurrency mode '{mode}', expected one of {_CONCURRENCY_MODES}"
+            )
+
+        if mode == _CONCURRENCY_MODE:
+            return
+
+        _CONCURRENCY_MODE = mode
+        _DEFAULT_GRAPH = Graph(thread_safe=mode == "shared")
+        # other threads cannot be reached, so their default graphs are replaced once they next use them
+        _DEFAULT_GENERATION += 1
+
+    @staticmethod
+    def get_concurrency_mode() -> Union[str, None]:
+        """
+        Returns how the default graph is shared between threads
+
+        """
+        return _CONCURRENCY_MODE
+
+    @property
+    def registry(
+        self,
+    ) -> Union[UnboundedRegistry, LRURegistry, WeakRegistry, StripedRegistry]:
+        """
+        Returns the registry of nodes that have been computed in this graph
+
+        """
+        return self._registry
+
+    @property
+    def overwrite_mode(self) -> bool:
+        """
+        Returns True if nodes in this graph are recomputed instead of being retrieved from the registry
+
+        """
+        return self._overwrite_mode
+
+    @overwrite_mode.setter
+    def overwrite_mode(self, enabled: bool) -> None:
+        self._overwrite_mode = enabled
+
+    @property
+    def domain_policy(self) -> str:
+        """
+        Returns how elementary functions handle inputs outside of their domain, such as the square root
+        of a negative number.
+
+            "raise" : a ValueError is raised if any entry of the input is outside of the domain.
+            "mask" : entries outside of the domain evaluate to NaN and are marked as invalid in the valid
+                   mask of the result and of every node computed from it, so a batch is evaluated in a
+                   single pass even if some of its points are invalid.
+
+        """
+        return self._domain_policy
+
+    @domain_policy.setter
+    def domain_policy(self, policy: str) -> None:
+        if policy not in _DOMAIN_POLICIES:
+            raise ValueError(
+                f"Unsupported domain policy '{policy}', expected one of {_DOMAIN_POLICIES}"
+            )
+
+        # nodes are keyed on their operands only, so nodes computed under another policy are dropped
+        # rather than returned as if they had been computed under the new one
+        if self._domain_policy is not None and policy != self._domain_policy:
+            self._registry.clear()
+
+        self._domain_policy = policy
+
+    @property
+    def dtype(self) -> Union[np.dtype, None]:
+        """
+        Returns the floating point type values and derivatives of nodes created in this graph are stored in,
+        or None if they keep the type their computation produced. Storing them in float32 halves the
+        memory footprint and bandwidth of large batches, at the cost of precision.
+
+        """
+        return self._dtype
+
+    @dtype.setter
+    def dtype(self, dtype) -> None:
+        if dtype is not None:
+            dtype = np.dtype(dtype)
+            if dtype.kind != "f":
+                raise ValueError(f"Expected a floating point dtype, got '{dtype}'")
+
+        # as for the domain policy, nodes stored in the previous dtype are dropped rather than returned
+        if hasattr(self, "_dtype") and dtype != self._dtype:
+            self._registry.clear()
+
+        self._dtype = dtype
+
+    @property
+    def accumulation_dtype(self) -> Union[np.dtype, None]:
+        """
+        Returns the floating point type reductions accumulate in, so that sums over many float32 entries
+        do not lose precision, or None if they accumulate in the type of their input.
+
+        """
+        if self._dtype is not None and self._dtype.itemsize < np.dtype(np.float64).itemsize:
+            return np.dtype(np.float64)
+        return None
+
+    @property
+    def nodes_computed(self) -> int:
+        """
+        Returns the number of nodes that have been computed in this graph, including recomputed nodes.
+        The count is approximate while the graph is shared between threads.
+
+        """
+        return self._nodes_computed
+
+    @property
+    def persistent_cache(self):
+        """
+        Returns the on disk cache behind the registry, or None if there is none
+
+        """
+        return self._persistent_cache
+
+    def set_persistent_cache(self, cache) -> None:
+        """
+        Puts an on disk cache behind the registry. When a node is not found in the registry, it is looked
+        up in the cache and restored without being recomputed. Newly computed nodes are written to the
+        cache in the background, including the nodes currently stored in the registry.
+
+        Parameters
+        ----------
+        cache : PersistentCache, None
+                Cache to use. If None, the registry is no longer backed by a persistent cache.
+
+        """
+        self._persistent_cache = cache
+        if cache is None:
+            return
+
+        for _, node in self._registry.items():
+            cache.track(node, self)
+
+    @property
+    def collect_stats(self) -> bool:
+        """
+        Returns True if the lookups, inserts and evictions of the registry of this graph are counted.
+        Counting costs a few dictionary updates per node, so it is disabled by default.
+
+        """
+        return self._collect_stats
+
+    @collect_stats.setter
+    def collect_stats(self, enabled: bool) -> None:
+        self._collect_stats = enabled
+
+    @property
+    def stats(self) -> RegistryStats:
+        """
+        Returns the counters of how the registry of this graph has been used while collect_stats was enabled
+
+        """
+        return self._stats
+
+    def _record_eviction(self, key: tuple) -> None:
+        if self._collect_stats:
+            self._stats.record_eviction(key)
+
+    def registry_stats(self) -> dict:
+        """
+        Returns a snapshot of how the registry has been used since the graph was created or the stats
+        were last reset, together with the number of nodes stored and the approximate memory they hold.
+        Use it to decide whether caching pays off for a workload and how large the registry should be.
+        Usage is only counted while collect_stats is enabled, otherwise every count is zero.
+
+        Returns
+        -------
+        dict :
+            lookups, hits, misses, inserts, evictions, restores, hit_rate, nodes_stored and
+            approximate_bytes of the whole registry, and under by_operation the hits, misses, inserts,
+            evictions, restores and approximate bytes of each operation type, input nodes being counted
+            under "leaf". Nodes restored from the persistent cache are only counted as restores.
+
+        Examples
+        --------
+        >>> with Graph(collect_stats=True) as graph:
+        ...     x = Node("x", 4, 1)
+        ...     y = sqrt(x) + sqrt(x)
+        >>> stats = graph.registry_stats()
+        >>> stats["hits"], stats["misses"]
+        (1, 3)
+        >>> stats["by_operation"]["sqrt"]["hits"]
+        1
+
+        """
+        held = approximate_bytes(self._registry.items())
+        by_operation = self._stats.by_operation
+        for operation, counts in by_operation.items():
+            counts["bytes"] = held.get(operation, 0)
+
+        return {
+            "lookups": self._stats.lookups,
+            "hits": self._stats.hits,
+            "misses": self._stats.misses,
+            "inserts": self._stats.inserts,
+            "evictions": self._stats.evictions,
+            "restores": self._stats.restores,
+            "hit_rate": self._stats.hit_rate,
+            "nodes_stored": self.count_nodes_stored(),
+            "approximate_bytes": sum(held.values()),
+            "by_operation": by_operation,
+        }
+
+    def reset_registry_stats(self) -> None:
+        """
+        Sets the registry counters of this graph back to zero. Stored nodes are kept.
+
+        """
+        self._stats.reset()
+
+    def count_nodes_stored(self) -> int:
+        """
+        Returns the number of nodes currently stored in the registry.
+
+        """
+        return len(self._registry)
+
+    def clear(self) -> None:
+        """
+        Removes all nodes currently stored in the registry.
+
+        """
+        self._registry.clear()
+
+    def set_registry_size_limit(self, max_size: Union[int, None]) -> None:
+        """
+        Bounds the number of nodes kept in the registry, evicting the least recently used nodes.
+
+        Parameters
+        ----------
+        max_size : int, None
+                Maximum number of nodes stored in the registry. If None, the registry is unbounded.
+
+        Raises
+        ------
+        ValueError
+                If max_size is not a positive integer or None, or if a size limit is set while the
+                registry holds weak references.
+
+        """
+        if isinstance(self._registry, (UnboundedRegistry, LRURegistry)) and (max_size is None) != (
+            self._registry.max_size is None
+        ):
+            # unbounded registries do not track how recently nodes were used, so nodes stored while the
+            # registry was unbounded are evicted in the order they were stored
+            registry = self._strong_registry(max_size)
+            registry.update(self._registry)
+            self._registry = registry
+        else:
+            self._registry.resize(max_size)
+        self._max_size = max_size
+
+    def _strong_registry(
+        self, max_size: Union[int, None]
+    ) -> Union[UnboundedRegistry, LRURegistry]:
+        """
+        Returns an empty registry holding strong references to at most max_size nodes
+
+        """
+        if max_size is None:
+            return UnboundedRegistry()
+        return LRURegistry(max_size, on_evict=self._record_eviction)
+
+    def set_weak_registry(self, enabled: bool) -> None:
+        """
+        Switches the registry to hold weak or strong references to its nodes, carrying over stored nodes.
+        Weak registries cannot be bounded, so a size limit only applies again once the registry is switched
+        back to strong references.
+
+        Parameters
+        ----------
+        enabled : bool
+                If true, the registry holds weak references. Otherwise, it holds strong references.
+
+        Raises
+        ------
+        ValueError
+                If weak references are enabled on a thread safe registry.
+
+        """
+        if enabled == self.is_weak_registry():
+            return
+
+        if isinstance(self._registry, StripedRegistry):
+            raise ValueError("A thread safe registry cannot hold weak references")
+
+        if enabled:
+            registry = WeakRegistry()
+        else:
+            registry = self._strong_registry(self._max_size)
+        registry.update(self._registry)
+        self._registry = registry
+
+    def is_weak_registry(self) -> bool:
+        """
+        Returns True if the registry holds weak references to its nodes.
+
+        """
+        return isinstance(self._registry, WeakRegistry)
+
+    def __enter__(self) -> Graph:
+        _THREAD_STATE.active_graphs.append(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        active_graphs = _THREAD_STATE.active_graphs
+        if not active_graphs or active_graphs[-1] is not self:
+            raise RuntimeError("Graphs must be exited in the reverse order they were entered")
+
+        active_graphs.pop()
+
+
+
+def _collect_nodes(outputs: Sequence) -> list:
+    """
+    Returns every node outputs depend on, including themselves, in increasing order of their identifiers.
+    A node is always created after its operands, so this places operands before the nodes computed from
+    them.
+
+    """
+    seen = {}
+    stack = list(outputs)
+    while stack:
+        node = stack.pop()
+        if node._id in seen:
+            continue
+
+        seen[node._id] = node
+        stack.extend(node._operands)
+
+    return [seen[node_id] for node_id in sorted(seen)]
+
+
+_CONCURRENCY_MODES = (None, "thread_local", "shared")
+_DOMAIN_POLICIES = ("raise", "mask")
+_CONCURRENCY_MODE = None
+
+# graph nodes are created in when no other graph has been entered by the thread
+_DEFAULT_GRAPH = Graph()
+
+# incremented whenever the concurrency mode changes, to replace the thread local default graphs
+_DEFAULT_GENERATION = 0
+
+class _ThreadState(threading.local):
+    def __init__(self) -> None:
+        """
+        State of the calling thread, initialized on first use by every thread so that Graph.current reads
+        it without default values.
+
+        """
+        # graphs entered by the thread, the last one being the graph nodes are created in
+        self.active_graphs = []
+        # default graph of the thread in the thread local concurrency mode, and the generation it was
+        # created in
+        self.default_graph = None
+        self.default_generation = None
+
+
+# per thread stack of entered graphs and default graph
+_THREAD_STATE = _ThreadState()
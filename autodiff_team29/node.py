@@ -1,23 +1,68 @@
 from __future__ import annotations
 from typing import Union
+import functools
+import hashlib
+import itertools
 import warnings
 
 import numpy as np
 from numpy.typing import NDArray
 
+from autodiff_team29 import backends
+from autodiff_team29.graph import Graph
+from autodiff_team29.sparse import SparseTangent
+
+# every node receives a unique integer identifier that is never reused
+_NODE_IDS = itertools.count()
+
+# operations whose operand symbols are sorted, so equivalent expressions render identically
+_COMMUTATIVE_OPERATIONS = frozenset(["+", "*"])
+
+# kinds of arrays that can be stored as values and derivatives: booleans, integers and floats
+_NUMERIC_KINDS = frozenset("biuf")
+
+# sums and products are flattened into a single node of at most this many terms. Flattening longer
+# chains would make the keys of a long accumulation grow quadratically
+_MAX_FLATTENED_TERMS = 32
 
-class Node:
-    # other types that are capable of being converted to Node
-    _COMPATIBLE_VALUE_TYPES = (int, float)
-    _COMPATIBLE_DERIVATIVE_TYPES = (int, float, np.ndarray)
 
-    # store nodes that have been computed previously
-    _OVERWRITE_MODE = False
-    _NODE_REGISTRY = {}
+def _array_fingerprint(array: NDArray) -> tuple:
+    """
+    Returns the dtype, shape and a 16 byte digest of the content of array, which identify it without
+    copying it
 
-    # only to be used for our benchmarking example
-    # not to be used for any other purpose
-    _NODES_COMPUTED_FOR_BENCHMARKING = 0
+    """
+    digest = hashlib.blake2b(np.ascontiguousarray(array), digest_size=16).digest()
+    return array.dtype.str, array.shape, digest
+
+
+@functools.lru_cache(maxsize=None)
+def _n_ary_template(operator: str, n_terms: int) -> str:
+    """
+    Returns the symbol template of a sum or product of n_terms terms, e.g. "({}+{}+{})"
+
+    """
+    return "(" + operator.join(["{}"] * n_terms) + ")"
+
+
+class Node:
+    # nodes are created by the million in large graphs, so they do not carry a __dict__
+    __slots__ = (
+        "_id",
+        "_symbol",
+        "_symbol_template",
+        "_operands",
+        "_digest",
+        "_value",
+        "_derivative",
+        "_valid",
+        "_key",
+        "__weakref__",
+    )
+
+    # other types that are capable of being converted to Node
+    _COMPATIBLE_VALUE_TYPES = (int, float, np.number, np.ndarray)
+    _COMPATIBLE_DERIVATIVE_TYPES = (int, float, np.ndarray, SparseTangent)
 
     def __new__(
         cls,
@@ -33,10 +78,11 @@ class Node:
         ----------
         symbol : str
                 Symbolic representation of a Node instance that acts as a unique identifier.
-        value : int, float
-                Analytical value of the node.
-        derivative : int, float,
-                Derivative with respect to the value attribute
+        value : int, float, np.ndarray
+                Analytical value of the node. An array evaluates the node at a batch of points at once.
+        derivative : int, float, np.ndarray, SparseTangent
+                Derivative with respect to the value attribute. For a batch of points seeded with a
+                seed vector of length n, the derivative has shape (batch, n).
 
         Optional Parameters
         -------------------
@@ -52,6 +98,8 @@ class Node:
                 A seed vector for computing partial derivatives of multi-variable functions.
                 The seed vector allows us to cherry-pick a certain derivative of interest (choose direction).
                 For F:Rm --> Rn, our seed vector should be of length m with a 1 in the direction of interest and 0 elsewhere.
+                Long seed vectors of a single point are stored internally as a SparseTangent, so nodes that
+                depend on few inputs carry few partials. The derivative attribute is still a dense array.
 
         Examples
         --------
@@ -59,44 +107,173 @@ class Node:
         >>> Node('x',10,1)
         >>> x + x
         >>> Node('x+x',20,2)
+        >>> x = Node('x', np.array([1.0, 2.0, 3.0]), 1, seed_vector=[1, 0])
+        >>> x.derivative.shape
+        (3, 2)
 
         """
-        # check if node already exist before recreating
-        if cls._check_node_exists(symbol):
-            return cls._get_existing_node(symbol)
-
         # ensure that the values and derivatives specified are of the correct datatype
         # if they are not these methods will raise an exception
         cls._check_foreign_value_type_compatibility(value)
         cls._check_foreign_derivative_type_compatibility(derivative)
 
-        # creating an instance of the class
+        # if kwargs are specified we are dealing with an n-dimensional function
+        if "seed_vector" in kwargs:
+            seed_vector = kwargs["seed_vector"]
+            if backends.ndim(value) == 0:
+                derivative = derivative * SparseTangent.compress(np.array(seed_vector))
+            else:
+                # every point of the batch is seeded in the same direction
+                derivative = np.multiply.outer(
+                    np.broadcast_to(derivative, np.shape(value)), np.array(seed_vector)
+                )
+
+        # the active graph is resolved once and passed down to every step of creating the node. Values
+        # are cast to its dtype by _create_node only, since the registry is cleared whenever the dtype
+        # changes and the input point can be fingerprinted as given
+        graph = Graph.current()
+
+        # check if node already exist at this input point before recreating
+        symbol = str(symbol)
+        key = (symbol, cls._fingerprint(value, derivative))
+        existing = Node._lookup_node(key, graph)
+        if existing is not None:
+            return existing
+
+        return cls._create_node(key, symbol, value, derivative, graph=graph)
+
+    @classmethod
+    def _create_node(
+        cls,
+        key: tuple,
+        symbol: str,
+        value: Union[float, int],
+        derivative: Union[int, float, NDArray],
+        operands: tuple = (),
+        invalid: Union[NDArray, None] = None,
+        graph: Union[Graph, None] = None,
+        restored: bool = False,
+    ) -> Node:
+        """
+        Creates a new Node instance and stores it in the registry of the active graph under the specified key.
+        Compatibility checks and registry lookups are the responsibility of the caller.
+
+        Parameters
+        ----------
+        key : tuple
+            Registry key of the node. Leaves are keyed by their symbol and input point, the result of an
+            operation by the name of the operation and the identifiers of its operands.
+        symbol : str
+            Symbolic representation of the node. If operands are given, a format string the symbols
+            of the operands are substituted into once the symbol is first read.
+        value : int, float
+            Analytical value of the node.
+        derivative : int, float, np.ndarray
+            Derivative with respect to the value attribute
+        operands : tuple of Node, optional
+            Nodes the operation that created this node was applied to.
+        invalid : np.ndarray, optional
+            Entries of the value whose inputs were outside of the domain of the operation. Their value and
+            derivative are set to NaN, and they are marked as invalid along with the entries that were
+            already invalid in the operands.
+        graph : Graph, optional
+            Graph the node is created in, as resolved by the caller. Defaults to the active graph.
+        restored : bool, default=False
+            If true, the node was read back from the persistent cache of the graph rather than computed,
+            so it is neither counted as an insert or a computed node nor written back to the cache.
+
+        Returns
+        -------
+        Node :
+            newly created instance of class Node.
+
+        """
         instance = super().__new__(cls)
-        instance._symbol = str(symbol)
+        instance._id = next(_NODE_IDS)
+        if operands:
+            instance._symbol = None
+            instance._symbol_template = symbol
+        else:
+            instance._symbol = symbol
+            instance._symbol_template = None
+        instance._operands = operands
+        instance._digest = None
+
+        # this runs for every node, so the settings of the graph are read from its attributes directly
+        if graph is None:
+            graph = Graph.current()
+        dtype = graph._dtype
+        if dtype is not None:
+            value = cls._cast(value, dtype)
+            derivative = cls._cast(derivative, dtype)
+        if invalid is not None:
+            value, derivative = cls._mask_invalid(value, derivative, invalid)
         instance._value = value
+        instance._derivative = derivative
+        instance._key = key
 
-        # if kwargs are specified we are dealing with an n-dimensional function
-        if "seed_vector" in kwargs:
-            seed_vector = np.array(kwargs["seed_vector"])
-            instance._derivative = derivative * seed_vector
+        # nodes computed from valid operands within the domain of their operation need no mask
+        instance._valid = None
+        if invalid is not None:
+            instance._valid = cls._propagate_validity(value, operands, invalid)
         else:
-            instance._derivative = derivative
+            for operand in operands:
+                if operand._valid is not None:
+                    instance._valid = cls._propagate_validity(value, operands, invalid)
+                    break
+
+        if restored:
+            graph._registry[key] = instance
+            return instance
 
-        if not cls._OVERWRITE_MODE:
-            cls._insert_node_to_registry(instance)
+        if not graph._overwrite_mode:
+            graph._registry[key] = instance
+            if graph._collect_stats:
+                graph._stats.record_insert(key)
 
-        # for benchmarking purposes only
-        cls._NODES_COMPUTED_FOR_BENCHMARKING += 1
+        if graph._persistent_cache is not None:
+            graph._persistent_cache.track(instance, graph)
+
+        graph._nodes_computed += 1
         return instance
 
     @property
     def symbol(self) -> str:
         """
-        Returns symbolic representation of the computational node
+        Returns symbolic representation of the computational node.
+        The representation is rendered the first time it is read and cached afterwards.
 
         """
+        if self._symbol is None:
+            self._render_symbol()
         return self._symbol
 
+    def _render_symbol(self) -> None:
+        """
+        Renders the symbolic representation of this node and of every operand it depends on that has not
+        been rendered yet. The graph is traversed with an explicit stack, so arbitrarily deep expressions
+        do not exceed the recursion limit.
+
+        """
+        stack = [self]
+        while stack:
+            node = stack[-1]
+            unrendered_operands = [
+                operand for operand in node._operands if operand._symbol is None
+            ]
+            if unrendered_operands:
+                stack.extend(unrendered_operands)
+                continue
+
+            stack.pop()
+            if node._symbol is not None:
+                continue
+
+            operand_symbols = [operand._symbol for operand in node._operands]
+            if node._key[0] in _COMMUTATIVE_OPERATIONS:
+                operand_symbols.sort()
+            node._symbol = node._symbol_template.format(*operand_symbols)
+
     @property
     def value(self) -> float | int:
         """
@@ -108,11 +285,91 @@ class Node:
     @property
     def derivative(self) -> int | float:
         """
-        Returns derivative value of the computational node
+        Returns derivative value of the computational node. Derivatives stored sparsely are returned as
+        the equivalent dense array.
 
         """
+        if isinstance(self._derivative, SparseTangent):
+            return self._derivative.to_dense()
         return self._derivative
 
+    @property
+    def valid(self) -> Union[bool, NDArray[bool]]:
+        """
+        Returns which entries of the value were computed from inputs within the domain of every elementary
+        function applied to them. Entries can only be invalid under the "mask" domain policy, in which
+        case they are NaN.
+
+        """
+        if self._valid is None:
+            return np.ones(np.shape(self._value), dtype=bool) if backends.ndim(self._value) else True
+        return self._valid
+
+    @staticmethod
+    def _cast(
+        value: Union[int, float, NDArray], dtype: np.dtype
+    ) -> Union[np.floating, NDArray]:
+        """
+        Returns value stored in dtype. Arrays that are already stored in dtype are not copied.
+
+        """
+        if isinstance(value, (np.ndarray, SparseTangent)):
+            return value.astype(dtype, copy=False)
+        return dtype.type(value)
+
+    @staticmethod
+    def _mask_invalid(
+        value: Union[float, NDArray], derivative: Union[float, NDArray], invalid: NDArray
+    ) -> tuple:
+        """
+        Returns value and derivative with the entries marked in invalid set to NaN. Derivatives that have
+        a trailing axis of seed directions are masked along every direction.
+
+        """
+        invalid = np.asarray(invalid)
+        value = np.where(invalid, np.nan, value)
+        if np.ndim(derivative) > invalid.ndim:
+            invalid = invalid.reshape(
+                invalid.shape + (1,) * (np.ndim(derivative) - invalid.ndim)
+            )
+        derivative = np.where(invalid, np.nan, derivative)
+
+        if value.ndim == 0:
+            value = value[()]
+        if derivative.ndim == 0:
+            derivative = derivative[()]
+        return value, derivative
+
+    @staticmethod
+    def _propagate_validity(
+        value: Union[float, NDArray], operands: tuple, invalid: Union[NDArray, None]
+    ) -> Union[bool, NDArray[bool], None]:
+        """
+        Returns the valid mask of a node computed from operands, where invalid marks the entries that were
+        outside of the domain of the operation itself. None stands for a node whose entries are all valid,
+        so no mask is allocated unless some input was invalid.
+
+        """
+        masks = [operand._valid for operand in operands if operand._valid is not None]
+        if invalid is not None:
+            masks.append(np.logical_not(invalid))
+        if not masks:
+            return None
+
+        valid = masks[0]
+        for mask in masks[1:]:
+            valid = np.logical_and(valid, mask)
+
+        if np.shape(valid) != np.shape(value):
+            try:
+                valid = np.broadcast_to(valid, np.shape(value)).copy()
+            except ValueError:
+                # reductions combine several entries into one, which is invalid if any of them was, and
+                # therefore NaN
+                valid = np.logical_not(np.isnan(value))
+
+        return valid if np.ndim(valid) else bool(valid)
+
     @staticmethod
     def _check_foreign_value_type_compatibility(other_type: Union[int, float]) -> None:
         """
@@ -140,6 +397,12 @@ class Node:
                 f"Unsupported type '{type(other_type)}' for value attribute in class Node"
             )
 
+        # object arrays would make a single node out of nodes stored in the array, losing their derivatives
+        if _is_non_numeric_array(other_type):
+            raise TypeError(
+                f"Unsupported array dtype '{other_type.dtype}' for value attribute in class Node"
+            )
+
     @staticmethod
     def _check_foreign_derivative_type_compatibility(
         other_type: Union[int, float, NDArray]
@@ -169,6 +432,11 @@ class Node:
                 f"Unsupported type '{type(other_type)}' for value attribute in class Node"
             )
 
+        if _is_non_numeric_array(other_type):
+            raise TypeError(
+                f"Unsupported array dtype '{other_type.dtype}' for derivative attribute in class Node"
+            )
+
     @classmethod
     def _convert_numeric_type_to_node(cls, to_convert: Union[int, float]) -> Node:
         """
@@ -199,68 +467,336 @@ class Node:
         )
 
     @staticmethod
-    def _check_node_exists(key: str) -> bool:
+    def _fingerprint(
+        value: Union[int, float], derivative: Union[int, float, NDArray]
+    ) -> tuple:
         """
-        Checks if an instance of class Node has already been created.
+        Returns a hashable fingerprint of the input point a leaf node is evaluated at.
 
         Parameters
         ----------
-        key : str
-            Symbolic representation of a Node instance that acts as a unique identifier.
+        value : int, float, np.ndarray
+            Analytical value of the node.
+        derivative : int, float, np.ndarray
+            Derivative (or seeded derivative vector) of the node.
 
         Returns
         -------
-        bool :
-            True if key argument is found. False otherwise.
+        tuple :
+            Fingerprint that is equal for two leaves if and only if their values and derivatives are equal.
+            Arrays are fingerprinted by their dtype, shape and a fixed size digest of their content, so
+            keys do not hold a copy of every batch. NumPy scalars other than float64,
+            which is a Python float, by their dtype and value.
+
+        Examples
+        --------
+        >>> Node._fingerprint(10, 1)
+        (10, 1)
 
         """
-        return key in Node._NODE_REGISTRY if not Node._OVERWRITE_MODE else False
+        if isinstance(value, np.ndarray):
+            value = _array_fingerprint(value)
+        elif isinstance(value, np.generic) and not isinstance(value, float):
+            value = (value.dtype.str, value.item())
+
+        if isinstance(derivative, np.generic) and not isinstance(derivative, float):
+            derivative = (derivative.dtype.str, derivative.item())
+        elif isinstance(derivative, np.ndarray):
+            derivative = _array_fingerprint(derivative)
+        elif isinstance(derivative, SparseTangent):
+            derivative = derivative.fingerprint()
+
+        return value, derivative
 
     @staticmethod
-    def _get_existing_node(key: str) -> Node:
+    def _chain_rule(
+        local_derivative: Union[int, float, NDArray], operand: Node
+    ) -> Union[int, float, NDArray]:
         """
-        Returns existing Node instance to avoid recomputing nodes.
+        Multiplies the derivative of an operand by the local derivative of an operation with respect to
+        that operand. When an array valued operand is seeded, its derivative has one more axis than its
+        value, holding the seed directions, so the local derivative is broadcast along it.
 
         Parameters
         ----------
-        key : str
-            Symbolic representation of a Node instance that acts as a unique identifier.
+        local_derivative : int, float, np.ndarray
+            Derivative of the operation with respect to the operand, elementwise over the value of the
+            operation.
+        operand : Node
+            Operand the operation was applied to.
 
         Returns
         -------
-        Node :
-            instance that matches the specified key.
+        int, float, np.ndarray :
+            Contribution of the operand to the derivative of the result. The derivative of a constant
+            contributes a scalar 0, so it can be added to derivatives of any shape.
+
+        Examples
+        --------
+        >>> Node._chain_rule(2, Node("x", 5, 3))
+        6
+        >>> Node._chain_rule(np.array([1, 2]), Node("x", np.array([5, 6]), 1, seed_vector=[1, 0]))
+        array([[1, 0],
+               [2, 0]])
 
         """
+        derivative = operand._derivative
+        if type(derivative) in backends._SCALAR_TYPES:
+            # a scalar derivative has no axis of seed directions to broadcast along
+            return 0 if derivative == 0 else local_derivative * derivative
+
+        if (
+            backends.ndim(derivative) > backends.ndim(operand._value)
+            and backends.ndim(local_derivative) > 0
+        ):
+            local_derivative = np.expand_dims(local_derivative, -1)
 
-        return Node._NODE_REGISTRY[key]
+        return local_derivative * derivative
 
     @staticmethod
-    def _insert_node_to_registry(node: Node) -> None:
+    def _align_tangents(value: Union[float, NDArray], *operands: Node) -> list:
         """
-        Adds Node instance to the registry, and allows computational graph to keep track of what nodes have
-        already been computed .
+        Returns the derivatives of the operands of an elementwise operation, broadcast to the value of its
+        result. The derivative of a seeded operand has a trailing axis of seed directions, so when the result
+        is an array every other derivative is broadcast along that axis too, and a seeded scalar combined with
+        a batch keeps one derivative per point and direction.
 
         Parameters
         ----------
-        node : Node
-            Instance of class Node.
+        value : int, float, np.ndarray
+            Value of the result of the operation.
+        *operands : Node
+            Operands the operation is applied to.
 
         Returns
         -------
-        None
+        list :
+            Derivative of every operand, in the order of operands. The derivative of a constant stays the
+            scalar 0.
 
+        Examples
+        --------
+        >>> x = Node("x", 2.0, 1, seed_vector=[1, 0])
+        >>> c = Node("c", np.array([1.0, 2.0, 3.0]), 0)
+        >>> Node._align_tangents(x.value + c.value, x, c)[0].shape
+        (3, 2)
+
+        """
+        derivatives = [operand._derivative for operand in operands]
+        if backends.ndim(value) == 0:
+            return derivatives
+
+        seed_shape = None
+        for operand, derivative in zip(operands, derivatives):
+            operand_ndim = backends.ndim(operand._value)
+            if backends.ndim(derivative) > operand_ndim:
+                seed_shape = np.shape(derivative)[operand_ndim:]
+                break
+
+        if seed_shape is None:
+            return derivatives
+
+        shape = np.shape(value) + seed_shape
+        aligned = []
+        for operand, derivative in zip(operands, derivatives):
+            if Node._is_zero_derivative(derivative):
+                aligned.append(0)
+                continue
+
+            if isinstance(derivative, SparseTangent):
+                derivative = derivative.to_dense()
+            elif backends.ndim(derivative) <= backends.ndim(operand._value):
+                derivative = np.expand_dims(derivative, -1)
+            aligned.append(np.broadcast_to(derivative, shape))
+
+        return aligned
+
+    @staticmethod
+    def _is_zero_derivative(derivative: Union[int, float, NDArray]) -> bool:
+        """
+        Returns True if derivative is the scalar 0 of a constant, whose contribution to any derivative
+        can be skipped.
+
+        """
+        if type(derivative) in backends._SCALAR_TYPES:
+            return derivative == 0
+        return backends.ndim(derivative) == 0 and derivative == 0
+
+    @staticmethod
+    def _lookup_node(key: tuple, graph: Graph) -> Union[Node, None]:
         """
-        Node._NODE_REGISTRY[node._symbol] = node
+        Returns the node stored under key in the registry of graph, restoring it from the persistent cache
+        of graph if the registry misses, so an existing node is not recomputed. Operations resolve the
+        active graph once and pass it to this method and to _create_node.
+
+        Parameters
+        ----------
+        key : tuple
+            Registry key of a Node instance that acts as a unique identifier.
+        graph : Graph
+            Graph the node is looked up in.
+
+        Returns
+        -------
+        Node, None :
+            instance that matches the specified key, or None if it has not been computed.
+
+        """
+        if graph._overwrite_mode:
+            return None
+
+        registry = graph._registry
+        if key in registry:
+            node = registry[key]
+            if graph._collect_stats:
+                graph._stats.record_lookup(key, True)
+            return node
+
+        node = None
+        if graph._persistent_cache is not None:
+            node = graph._persistent_cache.restore(key, graph)
+
+        if graph._collect_stats:
+            if node is None:
+                graph._stats.record_lookup(key, False)
+            else:
+                graph._stats.record_restore(key)
+        return node
 
     @classmethod
     def count_nodes_stored(cls) -> int:
         """
-        Returns the number of nodes currently stored in the registry.
+        Returns the number of nodes currently stored in the registry of the active graph.
+
+        """
+        return Graph.current().count_nodes_stored()
+
+    @classmethod
+    def set_persistent_cache(cls, cache) -> None:
+        """
+        Puts an on disk cache behind the registry of the active graph, so nodes computed by previous
+        processes are restored instead of recomputed and new nodes are written back in the background.
+        Nodes currently stored in the registry are written to the cache as well.
+
+        Parameters
+        ---------
+        cache : PersistentCache, None
+            Cache to use. If None, the registry is no longer backed by a persistent cache.
+
+        Examples
+        --------
+        >>> Node.set_persistent_cache(PersistentCache("nodes.sqlite"))
+
+        """
+        Graph.current().set_persistent_cache(cache)
+
+    @classmethod
+    def set_registry_stats(cls, enabled: bool) -> None:
+        """
+        Enables or disables counting how the registry of the active graph is used. Counting is disabled
+        by default, as it adds a few dictionary updates to the creation of every node.
+
+        Parameters
+        ---------
+        enabled : bool
+            If true, lookups, inserts and evictions of the registry are counted.
+
+        """
+        Graph.current().collect_stats = enabled
+
+    @classmethod
+    def get_registry_stats(cls) -> dict:
+        """
+        Returns a snapshot of how the registry of the active graph has been used: lookups, hits, misses,
+        inserts, evictions, the approximate memory held by stored nodes, and a breakdown of each by
+        operation type. Usage is only counted once enabled with set_registry_stats. See
+        Graph.registry_stats for details.
+
+        Examples
+        --------
+        >>> Node.set_registry_stats(True)
+        >>> x = Node("x", 4, 1)
+        >>> y = x * x + x * x
+        >>> Node.get_registry_stats()["by_operation"]["*"]["hits"]
+        1
+
+        """
+        return Graph.current().registry_stats()
+
+    @classmethod
+    def reset_registry_stats(cls) -> None:
+        """
+        Sets the registry counters of the active graph back to zero. Stored nodes are kept.
 
         """
-        return len(Node._NODE_REGISTRY)
+        Graph.current().reset_registry_stats()
 
+    @classmethod
+    def set_registry_size_limit(cls, max_size: Union[int, None]) -> None:
+        """
+        Bounds the number of nodes kept in the registry. Once the limit is reached, the least recently
+        used node is evicted whenever a new node is stored, so memory stays flat while frequently
+        reused subexpressions remain cached.
+
+        Parameters
+        ---------
+        max_size : int, None
+            Maximum number of nodes stored in the registry. If None, the registry is unbounded.
+
+        Raises
+        ------
+        ValueError
+            If max_size is not a positive integer or None, or if a size limit is set while the
+            weak reference registry is enabled.
+
+        Examples
+        --------
+        >>> Node.set_registry_size_limit(10_000)
+        >>> Node.set_registry_size_limit(None)
+
+        """
+        Graph.current().set_registry_size_limit(max_size)
+
+    @classmethod
+    def set_weak_registry(cls, enabled: bool) -> None:
+        """
+        Switches the registry to hold weak references to its nodes. Nodes are still reused while some
+        live computational graph references them, but are garbage collected once nothing does, so the
+        registry no longer pins every node ever created. Nodes that are currently stored are carried over.
+
+        Parameters
+        ---------
+        enabled : bool
+            If true, the registry holds weak references. Otherwise, it holds strong references.
+
+        Examples
+        --------
+        >>> Node.set_weak_registry(True)
+        >>> x = Node("x", 10, 1)
+        >>> Node.count_nodes_stored()
+        1
+        >>> del x
+        >>> Node.count_nodes_stored()
+        0
+
+        """
+        Graph.current().set_weak_registry(enabled)
+
+    @classmethod
+    def is_weak_registry(cls) -> bool:
+        """
+        Returns True if the registry holds weak references to its nodes.
+
+        """
+        return Graph.current().is_weak_registry()
+
+    @classmethod
+    def get_registry_size_limit(cls) -> Union[int, None]:
+        """
+        Returns the maximum number of nodes that can be stored in the registry, or None if unbounded.
+
+        """
+        return Graph.current().registry.max_size
 
     @classmethod
     def set_overwrite_mode(cls, enabled: bool) -> None:
@@ -276,7 +812,8 @@ class Node:
         """
 
         # if trying to set the mode to the current status, do nothing
-        if cls._OVERWRITE_MODE == enabled:
+        graph = Graph.current()
+        if graph.overwrite_mode == enabled:
             warnings.warn(
                 f"Override mode is already set to {enabled}. Expect no changes",
                 RuntimeWarning,
@@ -301,33 +838,155 @@ class Node:
             )
 
         # set the overwrite mode to what the user specified
-        cls._OVERWRITE_MODE = enabled
+        graph.overwrite_mode = enabled
+
+
+    @classmethod
+    def set_domain_policy(cls, policy: str) -> None:
+        """
+        Selects how elementary functions handle inputs outside of their domain in the active graph.
+        Nodes computed under the previous policy are removed from the registry.
+
+        Parameters
+        ---------
+        policy : str
+            "raise" : a ValueError is raised if any entry of the input is outside of the domain.
+            "mask" : entries outside of the domain evaluate to NaN and are marked as invalid in the valid
+                   mask of every node computed from them.
+
+        Raises
+        ------
+        ValueError
+            If policy is not one of the options above.
+
+        Examples
+        --------
+        >>> Node.set_domain_policy("mask")
+        >>> y = sqrt(Node("x", np.array([4.0, -1.0]), 1))
+        >>> y.value, y.valid
+        (array([ 2., nan]), array([ True, False]))
+
+        """
+        Graph.current().domain_policy = policy
+
+    @classmethod
+    def get_domain_policy(cls) -> str:
+        """
+        Returns how elementary functions handle inputs outside of their domain in the active graph.
+
+        """
+        return Graph.current().domain_policy
+
+    @classmethod
+    def set_dtype(cls, dtype) -> None:
+        """
+        Selects the floating point type values and derivatives of nodes created in the active graph are
+        stored in, including seed vectors and constants. Under float32, reductions still accumulate in
+        float64 before their result is stored.
+
+        Parameters
+        ---------
+        dtype : np.dtype, str, None
+            Floating point type, such as np.float32 or "float64". If None, values and derivatives keep the
+            type their computation produced.
+
+        Raises
+        ------
+        ValueError
+            If dtype is not a floating point type.
+
+        Examples
+        --------
+        >>> Node.set_dtype(np.float32)
+        >>> Node("x", np.array([1.0, 2.0]), 1, seed_vector=[1, 0]).derivative.dtype
+        dtype('float32')
+
+        """
+        Graph.current().dtype = dtype
+
+    @classmethod
+    def get_dtype(cls) -> Union[np.dtype, None]:
+        """
+        Returns the floating point type values and derivatives are stored in by the active graph, or None.
 
+        """
+        return Graph.current().dtype
 
     @staticmethod
     def clear_node_registry() -> None:
         """
-        Removes all key value pairs currently stored the node registry.
+        Removes all key value pairs currently stored the node registry of the active graph.
         WARNING previous computations made by the graph will be permanently erased.
 
         """
-        Node._NODE_REGISTRY.clear()
+        Graph.current().clear()
 
-    def __add__(self, other: Union[int, float, Node]) -> Node:
+    @staticmethod
+    def _flatten_terms(operator: str, left: Node, right: Node) -> tuple:
+        """
+        Returns the terms of a sum or product of left and right, sorted by their identifiers. Operands
+        that are themselves sums or products of the same kind contribute their own terms, so that
+        (a+b)+c, a+(b+c) and (c+a)+b all have the terms a, b and c and are stored as a single node.
 
-        symbolic_representation = "({}+{})".format(*sorted([self._symbol, str(other)]))
+        Parameters
+        ----------
+        operator : str
+            Either "+" or "*".
+        left : Node
+            Left operand.
+        right : Node
+            Right operand.
 
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
+        Returns
+        -------
+        tuple :
+            Terms of the flattened sum or product. If there would be more than _MAX_FLATTENED_TERMS terms,
+            the operands themselves are the terms.
+
+        Examples
+        --------
+        >>> a, b, c = Node("a", 1, 0), Node("b", 2, 0), Node("c", 3, 0)
+        >>> [str(term) for term in Node._flatten_terms("+", a + b, c)]
+        ['a', 'b', 'c']
+
+        """
+        terms = []
+        for operand in (left, right):
+            if operand._operands and operand._key[0] == operator:
+                terms.extend(operand._operands)
+            else:
+                terms.append(operand)
+
+        if len(terms) > _MAX_FLATTENED_TERMS:
+            terms = [left, right]
+
+        terms.sort(key=lambda term: term._id)
+        return tuple(terms)
+
+    def __add__(self, other: Union[int, float, Node]) -> Node:
+
+        if not isinstance(other, Node):
+            if _is_non_numeric_array(other):
+                return NotImplemented
+            other = self._convert_numeric_type_to_node(other)
+        terms = self._flatten_terms("+", self, other)
+        key = ("+", *[term._id for term in terms])
+        graph = Graph.current()
+        existing = Node._lookup_node(key, graph)
+        if existing is not None:
+            return existing
 
-        other = self._convert_numeric_type_to_node(other)
         primal_trace = self._value + other._value
-        tangent_trace = self._derivative + other._derivative
+        left_tangent, right_tangent = self._align_tangents(primal_trace, self, other)
+        tangent_trace = left_tangent + right_tangent
 
-        return Node(
-            symbolic_representation,
+        return self._create_node(
+            key,
+            _n_ary_template("+", len(terms)),
             primal_trace,
             tangent_trace,
+            operands=terms,
+            graph=graph,
         )
 
     def __radd__(self, other: Union[int, float]) -> Node:
@@ -335,126 +994,461 @@ class Node:
 
     def __sub__(self, other: Union[int, float, Node]) -> Node:
 
-        symbolic_representation = "({}-{})".format(self._symbol, str(other))
-
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
-
-        other = self._convert_numeric_type_to_node(other)
-        primal_trace = self._value - other._value
-        tangent_trace = self._derivative - other._derivative
-
-        return Node(symbolic_representation, primal_trace, tangent_trace)
+        if not isinstance(other, Node):
+            if _is_non_numeric_array(other):
+                return NotImplemented
+            other = self._convert_numeric_type_to_node(other)
+        return self._subtract(self, other)
 
     def __rsub__(self, other: Union[int, float]) -> Node:
 
-        symbolic_representation = "({}-{})".format(str(other), self._symbol)
-
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
+        if not isinstance(other, Node):
+            if _is_non_numeric_array(other):
+                return NotImplemented
+            other = self._convert_numeric_type_to_node(other)
+        return self._subtract(other, self)
 
-        other = self._convert_numeric_type_to_node(other)
-        primal_trace = other._value - self._value
-        tangent_trace = other._derivative - self._derivative
+    @staticmethod
+    def _subtract(minuend: Node, subtrahend: Node) -> Node:
+        key = ("-", minuend._id, subtrahend._id)
+        graph = Graph.current()
+        existing = Node._lookup_node(key, graph)
+        if existing is not None:
+            return existing
+
+        primal_trace = minuend._value - subtrahend._value
+        minuend_tangent, subtrahend_tangent = Node._align_tangents(
+            primal_trace, minuend, subtrahend
+        )
+        tangent_trace = minuend_tangent - subtrahend_tangent
 
-        return Node(symbolic_representation, primal_trace, tangent_trace)
+        return Node._create_node(
+            key,
+            "({}-{})",
+            primal_trace,
+            tangent_trace,
+            operands=(minuend, subtrahend),
+            graph=graph,
+        )
 
     def __mul__(self, other: Union[int, float, Node]) -> Node:
 
-        symbolic_representation = "({}*{})".format(*sorted([self._symbol, str(other)]))
-
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
+        if not isinstance(other, Node):
+            if _is_non_numeric_array(other):
+                return NotImplemented
+            other = self._convert_numeric_type_to_node(other)
+        terms = self._flatten_terms("*", self, other)
+        key = ("*", *[term._id for term in terms])
+        graph = Graph.current()
+        existing = Node._lookup_node(key, graph)
+        if existing is not None:
+            return existing
 
-        other = self._convert_numeric_type_to_node(other)
         primal_trace = self._value * other._value
-        tangent_trace = (
-            self._value * other._derivative + other._value * self._derivative
+        tangent_trace = self._chain_rule(self._value, other) + self._chain_rule(
+            other._value, self
         )
 
-        return Node(symbolic_representation, primal_trace, tangent_trace)
+        return self._create_node(
+            key,
+            _n_ary_template("*", len(terms)),
+            primal_trace,
+            tangent_trace,
+            operands=terms,
+            graph=graph,
+        )
 
     def __rmul__(self, other: Union[int, float]) -> Node:
         return self.__mul__(other)
 
     def __truediv__(self, other: Union[int, float, Node]) -> Node:
-        symbolic_representation = "({}/{})".format(self._symbol, str(other))
-
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
-
-        other = self._convert_numeric_type_to_node(other)
-        primal_trace = self._value / other._value
-        tangent_trace = (
-            self._derivative * other._value - self._value * other._derivative
-        ) / other._value**2
 
-        return Node(symbolic_representation, primal_trace, tangent_trace)
+        if not isinstance(other, Node):
+            if _is_non_numeric_array(other):
+                return NotImplemented
+            other = self._convert_numeric_type_to_node(other)
+        return self._divide(self, other)
 
     def __rtruediv__(self, other: Union[int, float]) -> Node:
-        symbolic_representation = "({}/{})".format(str(other), self._symbol)
 
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
+        if not isinstance(other, Node):
+            if _is_non_numeric_array(other):
+                return NotImplemented
+            other = self._convert_numeric_type_to_node(other)
+        return self._divide(other, self)
 
-        other = self._convert_numeric_type_to_node(other)
-        primal_trace = other._value / self._value
-        tangent_trace = (
-            self._value * other._derivative - other._value * self._derivative
-        ) / self._value**2
-
-        return Node(symbolic_representation, primal_trace, tangent_trace)
+    @staticmethod
+    def _divide(dividend: Node, divisor: Node) -> Node:
+        key = ("/", dividend._id, divisor._id)
+        graph = Graph.current()
+        existing = Node._lookup_node(key, graph)
+        if existing is not None:
+            return existing
+
+        primal_trace = dividend._value / divisor._value
+        numerator = Node._chain_rule(divisor._value, dividend) - Node._chain_rule(
+            dividend._value, divisor
+        )
+        if Node._is_zero_derivative(numerator):
+            # the quotient of constants is a constant, whatever the shape of the divisor
+            tangent_trace = 0
+        else:
+            squared_divisor = divisor._value**2
+            if (
+                backends.ndim(numerator) > backends.ndim(primal_trace)
+                and backends.ndim(squared_divisor) > 0
+            ):
+                squared_divisor = np.expand_dims(squared_divisor, -1)
+            tangent_trace = numerator / squared_divisor
+
+        return Node._create_node(
+            key, "({}/{})", primal_trace, tangent_trace, operands=(dividend, divisor), graph=graph
+        )
 
     def __neg__(self) -> Node:
-        symbolic_representation = "-{}".format(self._symbol)
-
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
+        key = ("neg", self._id)
+        graph = Graph.current()
+        existing = Node._lookup_node(key, graph)
+        if existing is not None:
+            return existing
 
         primal_trace = -1 * self._value
-        tangent_trace = -1 * self._derivative
+        tangent_trace = self._chain_rule(-1, self)
 
-        return Node(symbolic_representation, primal_trace, tangent_trace)
+        return self._create_node(
+            key, "-{}", primal_trace, tangent_trace, operands=(self,), graph=graph
+        )
 
     def __pow__(self, exponent: Union[int, float, Node]) -> Node:
-        symbolic_representation = "({}**{})".format(self._symbol, str(exponent))
 
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
+        if not isinstance(exponent, Node):
+            if _is_non_numeric_array(exponent):
+                return NotImplemented
+            exponent = self._convert_numeric_type_to_node(exponent)
+        return self._power(self, exponent)
 
-        exponent = self._convert_numeric_type_to_node(exponent)
-        primal_trace = self._value**exponent._value
-        tangent_trace = self._value**exponent._value * (
-            exponent._derivative * np.log(self._value)
-            + (self._derivative * exponent._value) / self._value
+    def __rpow__(self, base: Union[int, float]) -> Node:
+
+        if not isinstance(base, Node):
+            if _is_non_numeric_array(base):
+                return NotImplemented
+            base = self._convert_numeric_type_to_node(base)
+        return self._power(base, self)
+
+    @staticmethod
+    def _power(base: Node, exponent: Node) -> Node:
+        key = ("**", base._id, exponent._id)
+        graph = Graph.current()
+        existing = Node._lookup_node(key, graph)
+        if existing is not None:
+            return existing
+
+        primal_trace = base._value**exponent._value
+        tangent_trace = Node._chain_rule(
+            exponent._value * base._value ** (exponent._value - 1), base
         )
+        if not Node._is_zero_derivative(exponent._derivative):
+            from autodiff_team29 import elementaries
 
-        return Node(symbolic_representation, primal_trace, tangent_trace)
+            tangent_trace = tangent_trace + Node._chain_rule(
+                primal_trace * backends.evaluate(elementaries._log_kernel, base._value), exponent
+            )
 
-    def __rpow__(self, base: Union[int, float]) -> Node:
-        symbolic_representation = "({}**{})".format(str(base), self._symbol)
+        return Node._create_node(
+            key, "({}**{})", primal_trace, tangent_trace, operands=(base, exponent), graph=graph
+        )
+
+    def __matmul__(self, other: Union[NDArray, Node]) -> Node:
+
+        if not isinstance(other, Node):
+            if _is_non_numeric_array(other):
+                return NotImplemented
+            other = self._convert_numeric_type_to_node(other)
+        return self._matrix_multiply(self, other)
 
-        if self._check_node_exists(symbolic_representation):
-            return self._get_existing_node(symbolic_representation)
+    def __rmatmul__(self, other: NDArray) -> Node:
 
-        base = self._convert_numeric_type_to_node(base)
-        primal_trace = base._value**self._value
-        tangent_trace = base._value**self._value * (
-            self._derivative * np.log(base._value)
-            + (base._derivative * self._value) / base._value
+        if not isinstance(other, Node):
+            if _is_non_numeric_array(other):
+                return NotImplemented
+            other = self._convert_numeric_type_to_node(other)
+        return self._matrix_multiply(other, self)
+
+    @staticmethod
+    def _matrix_multiply(left: Node, right: Node) -> Node:
+        key = ("@", left._id, right._id)
+        graph = Graph.current()
+        existing = Node._lookup_node(key, graph)
+        if existing is not None:
+            return existing
+
+        primal_trace = left._value @ right._value
+
+        # seed directions are moved to the front, so matmul broadcasts over them as a stack of matrices
+        tangent_trace = 0
+        left_derivative = left._derivative
+        if not Node._is_zero_derivative(left_derivative):
+            if np.ndim(left_derivative) > np.ndim(left._value):
+                directions = np.moveaxis(left_derivative, -1, 0) @ right._value
+                tangent_trace = np.moveaxis(directions, 0, -1)
+            else:
+                tangent_trace = (
+                    np.broadcast_to(left_derivative, np.shape(left._value)) @ right._value
+                )
+
+        right_derivative = right._derivative
+        if not Node._is_zero_derivative(right_derivative):
+            if np.ndim(right_derivative) <= np.ndim(right._value):
+                right_tangent = left._value @ np.broadcast_to(
+                    right_derivative, np.shape(right._value)
+                )
+            elif np.ndim(right._value) == 1:
+                right_tangent = left._value @ right_derivative
+            else:
+                directions = left._value @ np.moveaxis(right_derivative, -1, 0)
+                right_tangent = np.moveaxis(directions, 0, -1)
+            tangent_trace = tangent_trace + right_tangent
+
+        return Node._create_node(
+            key, "({}@{})", primal_trace, tangent_trace, operands=(left, right), graph=graph
         )
-        
-        return Node(symbolic_representation, primal_trace, tangent_trace)
+
+    def backward(self, seed: Union[float, NDArray, None] = None):
+        """
+        Computes the adjoints of the inputs of this node with reverse mode, in a single backward sweep
+        over its computational graph. See reverse.backward.
+
+        Parameters
+        ----------
+        seed : float, np.ndarray, optional
+                Adjoint of this node. Defaults to ones.
+
+        Returns
+        -------
+        Adjoints :
+                Adjoints of the input nodes, looked up by indexing with the input node.
+
+        Examples
+        --------
+        >>> x, y = Node("x", 2.0, 0), Node("y", 3.0, 0)
+        >>> (x * y).backward()[x]
+        3.0
+
+        """
+        from autodiff_team29.reverse import backward
+
+        return backward(self, seed)
+
+    # methods called by NumPy when a ufunc is applied to an object array of nodes
+    def sqrt(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.sqrt(self)
+
+    def exp(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.exp(self)
+
+    def log(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.ln(self)
+
+    def log2(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.log(self, 2)
+
+    def log10(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.log(self, 10)
+
+    def sin(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.sin(self)
+
+    def cos(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.cos(self)
+
+    def tan(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.tan(self)
+
+    def arcsin(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.arcsin(self)
+
+    def arccos(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.arccos(self)
+
+    def arctan(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.arctan(self)
+
+    def sinh(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.sinh(self)
+
+    def cosh(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.cosh(self)
+
+    def tanh(self) -> Node:
+        from autodiff_team29 import elementaries
+
+        return elementaries.tanh(self)
+
+    def __array_ufunc__(self, ufunc: np.ufunc, method: str, *inputs, **kwargs):
+        """
+        Lets NumPy ufuncs such as np.sin, np.exp or np.add be applied to nodes. Ufuncs are routed to the
+        matching operator or function in elementaries, so np.sin(x) is the same node as sin(x). If one of
+        the inputs is an object array of nodes, the ufunc is applied to each of its elements instead.
+
+        Returns
+        -------
+        Node, np.ndarray :
+            Resulting node, or object array of resulting nodes. NotImplemented for ufuncs without a
+            matching operation, or for ufunc methods other than a plain call, so NumPy raises a TypeError.
+
+        Examples
+        --------
+        >>> x = Node("x", 0.5, 1)
+        >>> np.sin(x) is sin(x)
+        True
+        >>> np.exp(np.array([x, 2 * x], dtype=object))
+        array([Node(exp(x),...), Node(exp((2*x)),...)], dtype=object)
+
+        """
+        if method != "__call__" or kwargs:
+            return NotImplemented
+
+        if any(_is_object_array(value) for value in inputs):
+            inputs = [_as_object_array(value) for value in inputs]
+            return ufunc(*inputs)
+
+        handler = _ufunc_handlers().get(ufunc)
+        if handler is None:
+            return NotImplemented
+
+        return handler(*[self._convert_numeric_type_to_node(value) for value in inputs])
+
+    def __array_function__(self, func, types, args, kwargs):
+        """
+        Lets NumPy functions that are not ufuncs be applied to nodes. Functions registered with
+        Node.register_array_function are routed to their implementation for nodes. Every other function
+        returns NotImplemented, so NumPy raises a TypeError rather than treating the node as an array.
+
+        """
+        handler = _ARRAY_FUNCTION_HANDLERS.get(func)
+        if handler is None:
+            return NotImplemented
+
+        return handler(*args, **kwargs)
+
+    @staticmethod
+    def register_array_function(numpy_function, handler) -> None:
+        """
+        Routes a NumPy function to an implementation for nodes whenever it is called with a node.
+
+        Parameters
+        ----------
+        numpy_function : callable
+            NumPy function that dispatches through __array_function__, such as np.dot.
+        handler : callable
+            Implementation called with the same arguments as numpy_function.
+
+        """
+        _ARRAY_FUNCTION_HANDLERS[numpy_function] = handler
 
     def __str__(self) -> str:
-        return self._symbol
+        return self.symbol
 
     def __repr__(self) -> str:
-        return f"Node({self._symbol},{self._value},{self._derivative})"
+        return f"Node({self.symbol},{self._value},{self.derivative})"
 
     def __eq__(self, other: Node) -> bool:
-        symbolic_representation_equal = self._symbol == other._symbol
+        symbolic_representation_equal = self.symbol == other.symbol
         value_equal = self._value = other._value
         derivative_equal = self._derivative = other._derivative
 
         return all([symbolic_representation_equal, value_equal, derivative_equal])
+
+
+# implementations for nodes of NumPy functions that are not ufuncs, see Node.register_array_function
+_ARRAY_FUNCTION_HANDLERS = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _ufunc_handlers() -> dict:
+    """
+    Returns the operation applied to nodes for every supported NumPy ufunc. The table is built on first use,
+    since elementaries imports this module.
+
+    """
+    from autodiff_team29 import elementaries
+
+    return {
+        np.add: Node.__add__,
+        np.subtract: Node.__sub__,
+        np.multiply: Node.__mul__,
+        np.true_divide: Node.__truediv__,
+        np.power: Node.__pow__,
+        np.matmul: Node.__matmul__,
+        np.negative: Node.__neg__,
+        np.positive: lambda x: x,
+        np.square: lambda x: x**2,
+        np.reciprocal: lambda x: 1 / x,
+        np.sqrt: elementaries.sqrt,
+        np.exp: elementaries.exp,
+        np.log: elementaries.ln,
+        np.log2: lambda x: elementaries.log(x, 2),
+        np.log10: lambda x: elementaries.log(x, 10),
+        np.sin: elementaries.sin,
+        np.cos: elementaries.cos,
+        np.tan: elementaries.tan,
+        np.arcsin: elementaries.arcsin,
+        np.arccos: elementaries.arccos,
+        np.arctan: elementaries.arctan,
+        np.sinh: elementaries.sinh,
+        np.cosh: elementaries.cosh,
+        np.tanh: elementaries.tanh,
+    }
+
+
+def _is_object_array(value) -> bool:
+    return isinstance(value, np.ndarray) and value.dtype == object
+
+
+def _is_non_numeric_array(value) -> bool:
+    """
+    Returns True if value is an array that cannot be the value of a node, such as an object array of
+    nodes. Operators return NotImplemented for them, so NumPy applies the operation to every element.
+
+    """
+    return isinstance(value, np.ndarray) and value.dtype.kind not in _NUMERIC_KINDS
+
+
+def _as_object_array(value) -> np.ndarray:
+    """
+    Wraps value in a zero dimensional object array unless it already is an object array, so that a ufunc
+    applied to it loops over nodes instead of dispatching back to Node.__array_ufunc__.
+
+    """
+    if _is_object_array(value):
+        return value
+
+    wrapped = np.empty((), dtype=object)
+    wrapped[()] = value
+    return wrapped
@@ -0,0 +1,407 @@
+from __future__ import annotations
+from typing import Union
+import atexit
+import hashlib
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import weakref
+
+import numpy as np
+
+from autodiff_team29 import backends
+from autodiff_team29 import elementaries
+from autodiff_team29.graph import Graph
+from autodiff_team29.node import Node, _COMMUTATIVE_OPERATIONS
+from autodiff_team29.registry import LRURegistry
+
+# sentinel that stops the writer thread
+_STOP = object()
+
+# reading an entry back from disk costs about as much as recomputing it with a few dozen arithmetic
+# operations, so by default only operations doing more work than that per entry of their result are cached
+_DEFAULT_MIN_WORK_PER_ENTRY = 64
+
+# number of digests remembered as stored, beyond which the least recently stored ones may be written again
+_MAX_STORED_DIGESTS = 100_000
+
+
+class PersistentCache:
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        batch_size: int = 256,
+        min_work_per_entry: int = _DEFAULT_MIN_WORK_PER_ENTRY,
+    ) -> None:
+        """
+        On disk tier behind the node registry of a graph, so a new process starts with the expensive
+        subexpressions computed by previous processes. Nodes are stored in a sqlite database under a digest
+        of their canonical expression: input nodes by their symbol and input point, every other node by
+        its operation, the digests of its operands and the domain policy and dtype of its graph, so nodes
+        are never restored into a graph that would have computed them differently. Entries are only read
+        when the in memory registry misses, and new nodes are written back by a background thread so
+        computations never wait on disk. Stored nodes are unpickled when restored, so only use databases
+        written by trusted processes.
+
+        Restoring a node takes a database read and is slower than recomputing a cheap operation, so only
+        nodes whose operation is estimated to do at least min_work_per_entry arithmetic operations per
+        entry of its result are stored and looked up, such as matrix products with a long inner axis and
+        reductions over many entries. Elementwise operations are estimated at one operation per entry.
+
+        Parameters
+        ----------
+        path : str, os.PathLike
+                Path of the sqlite database. It is created if it does not exist.
+        batch_size : int, default=256
+                Maximum number of nodes written in a single transaction.
+        min_work_per_entry : int, default=64
+                Estimated number of arithmetic operations per entry of its result below which a node is
+                recomputed rather than cached. If 0, every node is cached.
+
+        Examples
+        --------
+        >>> cache = PersistentCache("nodes.sqlite")
+        >>> with Graph(persistent_cache=cache):
+        ...     x = Node("x", 4, 1)
+        ...     y = sqrt(x)
+        >>> cache.flush()
+
+        """
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError(
+                f"Batch size must be a positive integer, got '{batch_size}'"
+            )
+
+        if not isinstance(min_work_per_entry, int) or min_work_per_entry < 0:
+            raise ValueError(
+                f"Minimum work per entry must be a non negative integer, got '{min_work_per_entry}'"
+            )
+
+        self._path = os.fspath(path)
+        self._batch_size = batch_size
+        self._min_work_per_entry = min_work_per_entry
+
+        # the reading connection and the writer thread are only started once needed
+        self._connection = None
+        self._connection_lock = threading.Lock()
+        self._writes = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._closed_at_exit = False
+
+        # nodes whose digest is known, so restored nodes can be connected to their operands
+        self._nodes_by_id = weakref.WeakValueDictionary()
+        # digests that are already stored on disk or queued to be
+        self._stored_digests = LRURegistry(_MAX_STORED_DIGESTS)
+        # keeps the last restored node alive until it is retrieved from a weak reference registry
+        self._last_restored = None
+
+    @property
+    def path(self) -> str:
+        """
+        Returns the path of the sqlite database
+
+        """
+        return self._path
+
+    def digest(self, node: Node, graph: Union[Graph, None] = None) -> bytes:
+        """
+        Returns the digest of the canonical expression of a node, which is the same in every process.
+        Digests of operands that have not been computed yet are computed along the way.
+
+        Parameters
+        ----------
+        node : Node
+                Node to compute the digest of.
+        graph : Graph, optional
+                Graph the node was computed in. Defaults to the active graph.
+
+        Returns
+        -------
+        bytes :
+                Digest of the node.
+
+        """
+        settings = None
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if current._digest is not None:
+                stack.pop()
+                continue
+
+            undigested_operands = [
+                operand for operand in current._operands if operand._digest is None
+            ]
+            if undigested_operands:
+                stack.extend(undigested_operands)
+                continue
+
+            stack.pop()
+            if settings is None:
+                settings = self._settings_of(graph or Graph.current())
+            current._digest = self._digest_of(
+                current._key, [operand._digest for operand in current._operands], settings
+            )
+            self._nodes_by_id[current._id] = current
+
+        return node._digest
+
+    @staticmethod
+    def _settings_of(graph: Graph) -> bytes:
+        """
+        Returns the settings of graph that change how its nodes are computed, as part of their digests
+
+        """
+        return f"{graph.domain_policy}/{graph.dtype}/".encode()
+
+    @staticmethod
+    def _digest_of(key: tuple, operand_digests: list, settings: bytes) -> bytes:
+        """
+        Returns the digest of the node stored under key, given the digests of its operands and the
+        settings of the graph it is computed in.
+
+        """
+        if not operand_digests:
+            return hashlib.blake2b(b"leaf" + repr(key).encode(), digest_size=16).digest()
+
+        if key[0] in _COMMUTATIVE_OPERATIONS:
+            operand_digests = sorted(operand_digests)
+
+        content = settings + key[0].encode() + b"".join(operand_digests)
+        return hashlib.blake2b(b"node" + content, digest_size=16).digest()
+
+    def track(self, node: Node, graph: Union[Graph, None] = None) -> None:
+        """
+        Records a newly created node, and queues it to be written to disk unless it is an input node, is
+        too cheap to be worth caching or is already stored.
+
+        Parameters
+        ----------
+        node : Node
+                Node that was just created.
+        graph : Graph, optional
+                Graph the node was created in. Defaults to the active graph.
+
+        """
+        if not node._operands or not self._worth_caching(node._key[0], node._operands):
+            # operands are resolved by their identifiers when a node depending on them is restored. Scalars
+            # can only be the operands of nodes doing a single operation per entry
+            if self._min_work_per_entry <= 1 or backends.ndim(node._value):
+                self._nodes_by_id[node._id] = node
+            return
+
+        digest = self.digest(node, graph)
+        if digest in self._stored_digests:
+            return
+
+        self._stored_digests[digest] = True
+        record = pickle.dumps(
+            (node._symbol_template, node._value, node._derivative),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        self._start_writer()
+        self._writes.put((digest, record))
+
+    def restore(self, key: tuple, graph: Union[Graph, None] = None) -> Union[Node, None]:
+        """
+        Looks up the node that would be stored under key in the in memory registry. If a previous process
+        stored it under the same domain policy and dtype, it is recreated in the active graph without
+        being recomputed.
+
+        Parameters
+        ----------
+        key : tuple
+                Registry key of the node.
+        graph : Graph, optional
+                Graph the node is looked up for. Defaults to the active graph.
+
+        Returns
+        -------
+        Node, None :
+                The restored node, or None if it is not stored on disk.
+
+        """
+        # input nodes are cheap to create, and cannot be resolved to operands
+        if not isinstance(key[1], int):
+            return None
+
+        # elementwise operations are rejected before their operands are resolved, as most nodes are
+        if self._min_work_per_entry > 1 and not _is_contraction(key[0]):
+            return None
+
+        operands = tuple(self._nodes_by_id.get(node_id) for node_id in key[1:])
+        if any(operand is None for operand in operands):
+            return None
+
+        if not self._worth_caching(key[0], operands):
+            return None
+
+        graph = graph or Graph.current()
+        digest = self._digest_of(
+            key, [self.digest(operand, graph) for operand in operands], self._settings_of(graph)
+        )
+        record = self._read(digest)
+        if record is None:
+            return None
+
+        self._stored_digests[digest] = True
+        template, value, derivative = pickle.loads(record)
+        # entries outside of the domain of an elementary function are stored as NaN
+        invalid = np.isnan(value)
+        node = Node._create_node(
+            key,
+            template,
+            value,
+            derivative,
+            operands=operands,
+            invalid=invalid if np.any(invalid) else None,
+            graph=graph,
+            restored=True,
+        )
+        # restored nodes are not tracked, but nodes computed from them are restored by their identifier
+        node._digest = digest
+        self._nodes_by_id[node._id] = node
+
+        self._last_restored = node
+        return node
+
+    def _worth_caching(self, operation: str, operands: tuple) -> bool:
+        """
+        Returns True if the node computed by operation from operands does enough work per entry of its
+        result to be cached
+
+        """
+        if self._min_work_per_entry == 0:
+            return True
+        return _work_per_entry(operation, operands) >= self._min_work_per_entry
+
+    def flush(self) -> None:
+        """
+        Blocks until every queued node has been written to disk.
+
+        """
+        self._writes.join()
+
+    def close(self) -> None:
+        """
+        Writes every queued node to disk, then stops the writer thread and closes the database.
+        The cache can still be used afterwards, in which case it is reopened.
+
+        """
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writes.put(_STOP)
+                self._writer.join()
+                self._writer = None
+
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __len__(self) -> int:
+        self.flush()
+        with self._connection_lock:
+            return self._open().execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    def _open(self) -> sqlite3.Connection:
+        """
+        Returns the connection used to read nodes, opening it on first use. Must hold the connection lock.
+
+        """
+        if self._connection is None:
+            self._connection = self._connect(check_same_thread=False)
+
+        return self._connection
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path, check_same_thread=check_same_thread)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS nodes (digest BLOB PRIMARY KEY, record BLOB NOT NULL)"
+        )
+        connection.commit()
+        return connection
+
+    def _read(self, digest: bytes) -> Union[bytes, None]:
+        with self._connection_lock:
+            row = (
+                self._open()
+                .execute("SELECT record FROM nodes WHERE digest = ?", (digest,))
+                .fetchone()
+            )
+
+        return None if row is None else row[0]
+
+    def _start_writer(self) -> None:
+        if self._writer is not None:
+            return
+
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+
+                # the writer is restarted if the cache is used after being closed
+                if not self._closed_at_exit:
+                    atexit.register(self.close)
+                    self._closed_at_exit = True
+
+    def _write_loop(self) -> None:
+        """
+        Writes queued nodes in batches until the stop sentinel is received.
+
+        """
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._writes.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = _STOP in batch
+            records = [item for item in batch if item is not _STOP]
+            if records:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO nodes (digest, record) VALUES (?, ?)", records
+                )
+                connection.commit()
+
+            for _ in batch:
+                self._writes.task_done()
+
+        connection.close()
+
+
+def _is_contraction(operation: str) -> bool:
+    """
+    Returns True if operation combines several entries of its operands into every entry of its result
+
+    """
+    return operation == "@" or operation in elementaries._REDUCTIONS
+
+
+def _work_per_entry(operation: str, operands: tuple) -> int:
+    """
+    Returns an estimate of the number of arithmetic operations an operation does per entry of its result:
+    the length of the inner axis of a matrix product, the number of entries combined by a reduction, and
+    one for elementwise operations.
+
+    """
+    if not _is_contraction(operation):
+        return 1
+
+    shape = np.shape(operands[0]._value)
+    if operation == "@":
+        return shape[-1] if shape else 1
+
+    axes = elementaries._REDUCTIONS[operation][1]
+    if axes is None:
+        axes = range(len(shape))
+    return int(np.prod([shape[axis] for axis in axes]))
@@ -0,0 +1,259 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+import threading
+import weakref
+
+
+class LRURegistry(OrderedDict):
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        on_evict: Optional[Callable[[Hashable], None]] = None,
+    ) -> None:
+        """
+        Node registry that holds at most max_size entries. Once the limit is reached, the least recently
+        used node is evicted to make room for a new one.
+
+        Parameters
+        ----------
+        max_size : int, optional
+                Maximum number of nodes that can be stored. If None, the registry is unbounded.
+        on_evict : callable, optional
+                Called with the key of every evicted node.
+
+        Raises
+        ------
+        ValueError
+                If max_size is not a positive integer.
+
+        Examples
+        --------
+        >>> registry = LRURegistry(max_size=2)
+        >>> registry["a"], registry["b"], registry["c"] = 1, 2, 3
+        >>> list(registry)
+        ['b', 'c']
+
+        """
+        super().__init__()
+        self._max_size = None
+        self._on_evict = on_evict
+        self.resize(max_size)
+
+    @property
+    def max_size(self) -> Optional[int]:
+        """
+        Returns the maximum number of nodes that can be stored in the registry
+
+        """
+        return self._max_size
+
+    def resize(self, max_size: Optional[int]) -> None:
+        """
+        Changes the maximum number of nodes that can be stored, evicting the least recently used
+        nodes if the registry currently holds more than max_size entries.
+
+        Parameters
+        ----------
+        max_size : int, optional
+                Maximum number of nodes that can be stored. If None, the registry is unbounded.
+
+        """
+        if max_size is not None and (not isinstance(max_size, int) or max_size < 1):
+            raise ValueError(
+                f"Registry size limit must be a positive integer or None, got '{max_size}'"
+            )
+
+        self._max_size = max_size
+        self._evict()
+
+    def __getitem__(self, key: Hashable):
+        node = super().__getitem__(key)
+
+        # a retrieved node is the most recently used one
+        self.move_to_end(key)
+        return node
+
+    def __setitem__(self, key: Hashable, node) -> None:
+        super().__setitem__(key, node)
+        self.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Removes least recently used nodes until the registry is within its size limit.
+
+        """
+        if self._max_size is None:
+            return
+
+        while len(self) > self._max_size:
+            key, _ = self.popitem(last=False)
+            if self._on_evict is not None:
+                self._on_evict(key)
+
+
+class UnboundedRegistry(dict):
+    def __init__(self) -> None:
+        """
+        Node registry without a size limit, which is a plain dictionary. Nodes are never evicted, so
+        unlike LRURegistry it does not track how recently they were used, and storing or retrieving a
+        node costs a single dictionary operation. Graphs switch to an LRURegistry once they are bounded.
+
+        Examples
+        --------
+        >>> registry = UnboundedRegistry()
+        >>> registry["a"], registry["b"] = 1, 2
+        >>> registry.max_size is None
+        True
+
+        """
+        super().__init__()
+
+    @property
+    def max_size(self) -> None:
+        """
+        Unbounded registries have no size limit
+
+        """
+        return None
+
+    def resize(self, max_size: Optional[int]) -> None:
+        """
+        Unbounded registries do not support a size limit, see Graph.set_registry_size_limit.
+
+        Raises
+        ------
+        ValueError
+                If max_size is not None.
+
+        """
+        if max_size is not None:
+            raise ValueError("A size limit cannot be set on an unbounded registry")
+
+
+class WeakRegistry(weakref.WeakValueDictionary):
+    def __init__(self) -> None:
+        """
+        Node registry that only holds weak references to its nodes. A node stays in the registry
+        (and can be reused) for as long as some live computational graph references it. Once nothing
+        else references the node it is reclaimed by the garbage collector and silently dropped from
+        the registry.
+
+        Examples
+        --------
+        >>> registry = WeakRegistry()
+        >>> x = Node("x", 1, 1)
+        >>> registry["x"] = x
+        >>> del x
+        >>> len(registry)
+        0
+
+        """
+        super().__init__()
+
+    @property
+    def max_size(self) -> None:
+        """
+        Weak registries are bounded by the live graphs that reference them, never by a size limit
+
+        """
+        return None
+
+    def resize(self, max_size: Optional[int]) -> None:
+        """
+        Weak registries do not support a size limit.
+
+        Raises
+        ------
+        ValueError
+                If max_size is not None.
+
+        """
+        if max_size is not None:
+            raise ValueError("A size limit cannot be set on a weak reference registry")
+
+
+class StripedRegistry:
+    def __init__(self, n_stripes: int = 16) -> None:
+        """
+        Node registry that can be shared between threads. Keys are spread over several independent
+        stripes, each guarded by its own lock, so threads inserting nodes rarely contend for the same lock
+        and can reuse each other's nodes. Lookups read a single dictionary and do not take a lock.
+
+        Parameters
+        ----------
+        n_stripes : int, default=16
+                Number of independently locked stripes.
+
+        Examples
+        --------
+        >>> registry = StripedRegistry(n_stripes=4)
+        >>> registry["x"] = 1
+        >>> "x" in registry
+        True
+
+        """
+        if not isinstance(n_stripes, int) or n_stripes < 1:
+            raise ValueError(
+                f"Number of stripes must be a positive integer, got '{n_stripes}'"
+            )
+
+        self._stripes = [{} for _ in range(n_stripes)]
+        self._locks = [threading.Lock() for _ in range(n_stripes)]
+
+    @property
+    def max_size(self) -> None:
+        """
+        Striped registries are unbounded
+
+        """
+        return None
+
+    def resize(self, max_size: Optional[int]) -> None:
+        """
+        Striped registries do not support a size limit, since evicting a node could race with a lookup
+        in another thread. Use thread local graphs for bounded registries.
+
+        Raises
+        ------
+        ValueError
+                If max_size is not None.
+
+        """
+        if max_size is not None:
+            raise ValueError("A size limit cannot be set on a striped registry")
+
+    def _stripe_index(self, key: Hashable) -> int:
+        return hash(key) % len(self._stripes)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._stripes[self._stripe_index(key)]
+
+    def __getitem__(self, key: Hashable):
+        return self._stripes[self._stripe_index(key)][key]
+
+    def __setitem__(self, key: Hashable, node) -> None:
+        index = self._stripe_index(key)
+        with self._locks[index]:
+            self._stripes[index][key] = node
+
+    def __len__(self) -> int:
+        return sum(len(stripe) for stripe in self._stripes)
+
+    def __iter__(self):
+        for stripe in self._stripes:
+            yield from list(stripe)
+
+    def items(self):
+        for stripe in self._stripes:
+            yield from list(stripe.items())
+
+    def update(self, other) -> None:
+        for key, node in other.items():
+            self[key] = node
+
+    def clear(self) -> None:
+        for stripe, lock in zip(self._stripes, self._locks):
+            with lock:
+                stripe.clear()
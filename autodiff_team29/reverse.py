@@ -0,0 +1,589 @@
+from __future__ import annotations
+from typing import Callable, Iterator, List, Sequence, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from autodiff_team29 import backends
+from autodiff_team29 import elementaries
+from autodiff_team29 import forward
+from autodiff_team29.graph import Graph, _collect_nodes
+from autodiff_team29.node import Node
+
+
+class Adjoints:
+    def __init__(self, adjoints: dict) -> None:
+        """
+        Adjoints of the input nodes of a computational graph, i.e. the partial derivatives of the output of
+        a backward sweep with respect to each of them. Look up the adjoint of an input by indexing with its
+        node. Inputs the output does not depend on have an adjoint of zero.
+
+        Parameters
+        ----------
+        adjoints : dict
+                Input nodes and their adjoints, keyed by node identifier.
+
+        Examples
+        --------
+        >>> x, y = Node("x", 2.0, 0), Node("y", 3.0, 0)
+        >>> adjoints = (x * y).backward()
+        >>> adjoints[x], adjoints[y]
+        (3.0, 2.0)
+
+        """
+        self._adjoints = adjoints
+
+    def __getitem__(self, node: Node) -> Union[float, NDArray]:
+        entry = self._adjoints.get(node._id)
+        if entry is not None:
+            return entry[1]
+
+        if node._operands:
+            raise KeyError(f"Adjoints are only kept for input nodes, not for '{node.symbol}'")
+
+        return np.zeros_like(node.value) if np.ndim(node.value) else 0.0
+
+    def __contains__(self, node: Node) -> bool:
+        return node._id in self._adjoints
+
+    def __len__(self) -> int:
+        return len(self._adjoints)
+
+    def __iter__(self) -> Iterator[Node]:
+        return (node for node, _ in self._adjoints.values())
+
+    def items(self) -> Iterator[tuple]:
+        """
+        Returns the input nodes the output depends on, along with their adjoints
+
+        """
+        return iter(self._adjoints.values())
+
+    def by_symbol(self) -> dict:
+        """
+        Returns the adjoints of the input nodes keyed by their symbols. Inputs that share a symbol, such
+        as the same constant used twice at different points, are summed.
+
+        """
+        adjoints = {}
+        for node, adjoint in self._adjoints.values():
+            adjoints[node.symbol] = adjoints.get(node.symbol, 0) + adjoint
+        return adjoints
+
+
+def backward(
+    output: Node, seed: Union[float, NDArray, None] = None, inputs: Sequence[Node] = None
+) -> Adjoints:
+    """
+    Computes the adjoints of the inputs of a node in a single backward sweep over its computational graph.
+    Every node records the operation that created it and its operands when it is computed, so the graph
+    itself serves as the tape: nodes are visited from the output back to the inputs, and the adjoint of
+    each node is pushed to its operands with the vector Jacobian product rule of its operation. The cost
+    is a small multiple of evaluating the output, whatever the number of inputs.
+
+    Parameters
+    ----------
+    output : Node
+            Node to differentiate, usually a scalar loss.
+    seed : float, np.ndarray, optional
+            Adjoint of the output, with the shape of its value. Defaults to ones, which gives the gradient
+            of a scalar output, or of the sum of the entries of an array output.
+    inputs : sequence of Node, optional
+            Only compute adjoints along paths to these nodes. Defaults to every input of the graph.
+
+    Returns
+    -------
+    Adjoints :
+            Adjoints of the input nodes the output depends on.
+
+    Raises
+    ------
+    NotImplementedError
+            If the graph contains an operation without a vector Jacobian product rule.
+
+    Examples
+    --------
+    >>> x = Node("x", 2.0, 0)
+    >>> backward(sin(x) * x)[x]
+    0.0770037537313969
+
+    """
+    if seed is None:
+        # ones of the type of the output, so adjoints keep the dtype of the graph
+        seed = 1.0 if isinstance(output.value, float) else np.ones_like(output.value)[()]
+
+    return _sweep([output], [seed], inputs)
+
+
+def _sweep(
+    outputs: Sequence[Node],
+    seeds: Sequence,
+    inputs: Union[Sequence[Node], None],
+    differentiable: bool = False,
+) -> Adjoints:
+    """
+    Propagates the seeds of outputs back to the inputs of their graph in a single backward sweep. A
+    differentiable sweep applies the vector Jacobian product rules to the nodes of the graph rather than
+    to their values, wherever they carry a derivative, so the adjoints are nodes themselves and carry the
+    derivatives of the gradient, i.e. forward mode over reverse mode.
+
+    """
+    nodes = _collect_nodes(outputs)
+    if inputs is not None:
+        nodes = _nodes_depending_on(nodes, inputs)
+
+    adjoints = {}
+    for output, seed in zip(outputs, seeds):
+        existing = adjoints.get(output._id)
+        adjoints[output._id] = seed if existing is None else existing + seed
+
+    primal = _differentiable_primal if differentiable else _primal
+    input_adjoints = {}
+    relevant = {node._id for node in nodes}
+    for node in reversed(nodes):
+        adjoint = adjoints.pop(node._id, None)
+        if adjoint is None:
+            continue
+
+        if not node._operands:
+            input_adjoints[node._id] = (node, adjoint)
+            continue
+
+        contributions = _vjp_rule(node)(
+            node, adjoint, primal(node), [primal(operand) for operand in node._operands]
+        )
+        for operand, contribution in zip(node._operands, contributions):
+            if contribution is None or operand._id not in relevant:
+                continue
+
+            contribution = _unbroadcast(contribution, np.shape(operand._value))
+            existing = adjoints.get(operand._id)
+            adjoints[operand._id] = contribution if existing is None else existing + contribution
+
+    return Adjoints(input_adjoints)
+
+
+def _primal(node: Node) -> Union[float, NDArray]:
+    """
+    Returns the value of node, which the rules of a backward sweep are applied to
+
+    """
+    return node._value
+
+
+def _differentiable_primal(node: Node) -> Union[float, NDArray, Node]:
+    """
+    Returns the node itself if it carries a derivative, so the rules of a differentiable sweep propagate
+    it, or its value otherwise, which keeps arithmetic on constants out of the graph
+
+    """
+    return node._value if Node._is_zero_derivative(node._derivative) else node
+
+
+def grad(output: Node, inputs: Sequence[Node]) -> list:
+    """
+    Returns the partial derivatives of output with respect to each of inputs, computed in a single
+    backward sweep.
+
+    Parameters
+    ----------
+    output : Node
+            Scalar node to differentiate.
+    inputs : sequence of Node
+            Nodes to differentiate with respect to.
+
+    Returns
+    -------
+    list :
+            Partial derivative with respect to every input, with the shape of its value.
+
+    Examples
+    --------
+    >>> x, y = Node("x", 2.0, 0), Node("y", 3.0, 0)
+    >>> grad(x * y + x, [x, y])
+    [4.0, 2.0]
+
+    """
+    adjoints = backward(output, inputs=inputs)
+    return [adjoints[node] for node in inputs]
+
+
+def vjp(
+    function: Callable[[List[Node]], Union[Node, List[Node]]],
+    point: Sequence[float],
+    cotangent: Union[float, Sequence[float]],
+    symbols: Union[Sequence[str], None] = None,
+) -> NDArray[float]:
+    """
+    Computes the product of a vector with the Jacobian of a function in a single backward sweep, without
+    forming the Jacobian. Every output is seeded with its entry of the vector, and the adjoints of all
+    outputs are propagated to the inputs together.
+
+    Parameters
+    ----------
+    function : callable
+            Function that takes a list of n nodes, one per input, and returns a node or a list of nodes.
+    point : sequence of float
+            Input point the product is computed at.
+    cotangent : float or sequence of float
+            Vector of length m the Jacobian is multiplied with from the left, or a float if the function
+            returns a single node.
+    symbols : sequence of str, optional
+            Symbols of the inputs. Defaults to x1, ..., xn.
+
+    Returns
+    -------
+    np.ndarray :
+            Vector Jacobian product of shape (n,).
+
+    Raises
+    ------
+    ValueError
+            If the cotangent does not match the outputs, or the symbols do not match the point.
+
+    Examples
+    --------
+    >>> vjp(lambda x: [x[0] * x[1], sin(x[0])], [2.0, 3.0], [1.0, -1.0])
+    array([3.41614684, 2.        ])
+
+    """
+    point = [float(value) for value in point]
+    symbols = forward._input_symbols(len(point), symbols)
+
+    graph = Graph.current()
+    with Graph(domain_policy=graph.domain_policy, dtype=graph.dtype):
+        inputs = [Node(symbol, value, 0) for symbol, value in zip(symbols, point)]
+        outputs = function(inputs)
+
+        if isinstance(outputs, (list, tuple)):
+            cotangent = list(cotangent) if np.ndim(cotangent) else [cotangent]
+        else:
+            outputs, cotangent = [outputs], [cotangent]
+        if len(cotangent) != len(outputs):
+            raise ValueError(
+                f"Expected a cotangent of length {len(outputs)} to match the outputs, "
+                f"got {len(cotangent)}"
+            )
+
+        # constant outputs do not depend on the inputs
+        seeded = [(output, seed) for output, seed in zip(outputs, cotangent) if isinstance(output, Node)]
+        adjoints = _sweep([output for output, _ in seeded], [seed for _, seed in seeded], inputs)
+
+        return np.array([adjoints[node] for node in inputs], dtype=graph.dtype)
+
+
+def register_vjp(operation: str, rule: Callable) -> None:
+    """
+    Registers the vector Jacobian product rule of an operation, so nodes it creates can be differentiated
+    in reverse mode.
+
+    Parameters
+    ----------
+    operation : str
+            Name of the operation, i.e. the first entry of the registry keys of the nodes it creates.
+    rule : callable
+            Function of a node, its adjoint, its value and the values of its operands, that returns the
+            contribution of the adjoint to each operand of the node, or None for operands that are not
+            differentiated. To support second derivatives, rules only combine the values with arithmetic
+            operators and NumPy ufuncs, as values may be nodes themselves.
+
+    Examples
+    --------
+    >>> register_vjp("exp2", lambda node, adjoint, value, operands: (adjoint * value * np.log(2),))
+
+    """
+    _VJP_RULES[operation] = rule
+
+
+def _vjp_rule(node: Node) -> Callable:
+    """
+    Returns the vector Jacobian product rule of the operation that created node
+
+    """
+    operation = node._key[0]
+    rule = _VJP_RULES.get(operation)
+    if rule is None and operation in elementaries._REDUCTIONS:
+        # reductions over axes are named after the reduction and their axes, e.g. "sum(axis=(0,))"
+        rule = _VJP_RULES.get(elementaries._REDUCTIONS[operation][0])
+    if rule is None:
+        raise NotImplementedError(
+            f"Operation '{operation}' does not support reverse mode differentiation"
+        )
+    return rule
+
+
+def _nodes_depending_on(nodes: list, inputs: Sequence[Node]) -> list:
+    """
+    Returns the nodes, in the same order, that depend on at least one of inputs
+
+    """
+    depends = {node._id for node in inputs}
+    for node in nodes:
+        if any(operand._id in depends for operand in node._operands):
+            depends.add(node._id)
+
+    return [node for node in nodes if node._id in depends]
+
+
+def _unbroadcast(contribution, shape: tuple):
+    """
+    Sums contribution over the axes an operand of the given shape was broadcast along
+
+    """
+    if isinstance(contribution, Node):
+        return _unbroadcast_node(contribution, shape)
+
+    if np.shape(contribution) == shape:
+        return contribution
+
+    contribution = np.asarray(contribution)
+    leading = contribution.ndim - len(shape)
+    if leading > 0:
+        contribution = contribution.sum(axis=tuple(range(leading)))
+
+    broadcast_axes = tuple(
+        axis for axis, size in enumerate(shape) if size == 1 and contribution.shape[axis] != 1
+    )
+    if broadcast_axes:
+        contribution = contribution.sum(axis=broadcast_axes, keepdims=True)
+
+    return contribution if shape else contribution[()]
+
+
+def _unbroadcast_node(contribution: Node, shape: tuple) -> Node:
+    """
+    Sums a contribution of a differentiable sweep over the leading axes an operand was broadcast along
+
+    """
+    contribution_shape = np.shape(contribution.value)
+    if contribution_shape == shape:
+        return contribution
+
+    leading = len(contribution_shape) - len(shape)
+    if leading < 0 or contribution_shape[leading:] != shape:
+        raise NotImplementedError(
+            f"Cannot sum a derivative of shape {contribution_shape} to shape {shape} in second order "
+            f"reverse mode"
+        )
+    return elementaries.sum(contribution, axis=tuple(range(leading)))
+
+
+def _apply(kernel: Callable, value):
+    """
+    Returns kernel evaluated at value, with the elementaries for nodes in a differentiable sweep, or with
+    the backend matching value otherwise
+
+    """
+    if isinstance(value, Node):
+        return kernel(_NODE_BACKEND, value)
+    return backends.evaluate(kernel, value)
+
+
+def _sum_vjp(node: Node, adjoint, value, operands):
+    return tuple(adjoint for _ in operands)
+
+
+def _product_vjp(node: Node, adjoint, value, operands):
+    # the product of all other terms, without dividing by a term that may be zero. Products start from
+    # None rather than 1, so a differentiable sweep does not create nodes for multiplications by 1
+    prefixes = [None] * len(operands)
+    for i in range(1, len(operands)):
+        prefixes[i] = _multiply(prefixes[i - 1], operands[i - 1])
+
+    contributions = [None] * len(operands)
+    suffix = None
+    for i in reversed(range(len(operands))):
+        contributions[i] = _multiply(adjoint, _multiply(prefixes[i], suffix))
+        suffix = _multiply(operands[i], suffix)
+
+    return contributions
+
+
+def _multiply(left, right):
+    """
+    Returns left * right, where None stands for an empty product
+
+    """
+    if left is None:
+        return 1 if right is None else right
+    return left if right is None else left * right
+
+
+def _subtract_vjp(node: Node, adjoint, value, operands):
+    return adjoint, -adjoint
+
+
+def _divide_vjp(node: Node, adjoint, value, operands):
+    dividend, divisor = operands
+    quotient = adjoint / divisor
+    return quotient, -quotient * value
+
+
+def _negate_vjp(node: Node, adjoint, value, operands):
+    return (-adjoint,)
+
+
+def _power_vjp(node: Node, adjoint, value, operands):
+    base, exponent = operands
+    base_contribution = adjoint * exponent * base ** (exponent - 1)
+
+    if isinstance(base, Node) and not np.all(np.asarray(base.value) > 0):
+        # the logarithm of the base is undefined, and the exponent is a constant of the differentiable
+        # sweep unless the base is positive
+        return base_contribution, None
+
+    # constant exponents are leaves too, and the logarithm of a negative base is only NaN for them
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exponent_contribution = adjoint * value * _apply(elementaries._log_kernel, base)
+
+    return base_contribution, exponent_contribution
+
+
+def _matrix_multiply_vjp(node: Node, adjoint, value, operands):
+    left_value, right_value = operands
+
+    if np.ndim(node._operands[0]._value) == 1 and np.ndim(node._operands[1]._value) == 1:
+        return adjoint * right_value, adjoint * left_value
+
+    if any(isinstance(operand, Node) for operand in (adjoint, left_value, right_value)):
+        raise NotImplementedError(
+            "Matrix products of arrays do not support second order reverse mode"
+        )
+
+    # vectors are promoted to matrices as matmul does, and the added axis is removed again afterwards
+    left_matrix = left_value[np.newaxis, :] if np.ndim(left_value) == 1 else left_value
+    right_matrix = right_value[:, np.newaxis] if np.ndim(right_value) == 1 else right_value
+    adjoint_matrix = adjoint
+    if np.ndim(left_value) == 1:
+        adjoint_matrix = np.expand_dims(adjoint_matrix, -2)
+    if np.ndim(right_value) == 1:
+        adjoint_matrix = np.expand_dims(adjoint_matrix, -1)
+
+    left_contribution = adjoint_matrix @ np.swapaxes(right_matrix, -1, -2)
+    right_contribution = np.swapaxes(left_matrix, -1, -2) @ adjoint_matrix
+    if np.ndim(left_value) == 1:
+        left_contribution = left_contribution[..., 0, :]
+    if np.ndim(right_value) == 1:
+        right_contribution = right_contribution[..., 0]
+
+    return left_contribution, right_contribution
+
+
+def _elementwise_vjp(kernel: Callable) -> Callable:
+    """
+    Returns the vector Jacobian product rule of an elementary function whose kernel returns its value and
+    its derivative
+
+    """
+
+    def rule(node: Node, adjoint, value, operands):
+        return (adjoint * _apply(kernel, operands[0])[1],)
+
+    return rule
+
+
+def _log_vjp(node: Node, adjoint, value, operands):
+    # the base is treated as a constant, as in forward mode
+    x, base = operands
+    log_base = _apply(elementaries._log_kernel, base)
+    return adjoint * _apply(elementaries._ln_kernel, x)[1] / log_base, None
+
+
+def _exp_vjp(node: Node, adjoint, value, operands):
+    return (adjoint * value,)
+
+
+def _tanh_vjp(node: Node, adjoint, value, operands):
+    return (adjoint * (1 - value**2),)
+
+
+def _logistic_vjp(node: Node, adjoint, value, operands):
+    return (adjoint * value * (1 - value),)
+
+
+def _reduction_axes(node: Node) -> tuple:
+    """
+    Returns the axes a reduction node was computed over, as recorded when the reduction was built
+
+    """
+    axes = elementaries._REDUCTIONS[node._key[0]][1]
+    if axes is None:
+        return tuple(range(np.ndim(node._operands[0]._value)))
+    return axes
+
+
+def _expand_reduced(node: Node, adjoint):
+    """
+    Returns the adjoint of a reduction broadcast back to the shape of its operand
+
+    """
+    shape = np.shape(node._operands[0]._value)
+    axes = _reduction_axes(node)
+    keepdims = elementaries._REDUCTIONS[node._key[0]][2]
+    if not isinstance(adjoint, Node):
+        if not keepdims:
+            adjoint = np.expand_dims(adjoint, axes)
+        return np.broadcast_to(adjoint, shape)
+
+    # nodes cannot be reshaped, but broadcasting inserts the leading axes and stretches kept ones
+    if not keepdims and axes != tuple(range(len(axes))):
+        raise NotImplementedError(
+            f"Reductions over axes {axes} do not support second order reverse mode"
+        )
+    return adjoint * np.ones(shape)
+
+
+def _reduce_sum_vjp(node: Node, adjoint, value, operands):
+    return (_expand_reduced(node, adjoint),)
+
+
+def _reduce_mean_vjp(node: Node, adjoint, value, operands):
+    shape = np.shape(node._operands[0]._value)
+    count = np.prod([shape[axis] for axis in _reduction_axes(node)])
+    return (_expand_reduced(node, adjoint) / count,)
+
+
+# elementaries for nodes, with which the kernels of elementaries compute derivatives as nodes
+_NODE_BACKEND = backends.Backend(
+    "node",
+    sqrt=elementaries.sqrt,
+    exp=elementaries.exp,
+    log=elementaries.ln,
+    sin=elementaries.sin,
+    cos=elementaries.cos,
+    tan=elementaries.tan,
+    arcsin=elementaries.arcsin,
+    arccos=elementaries.arccos,
+    arctan=elementaries.arctan,
+    sinh=elementaries.sinh,
+    cosh=elementaries.cosh,
+    tanh=elementaries.tanh,
+    logistic=elementaries.logistic,
+)
+
+# vector Jacobian product rules by operation, see register_vjp
+_VJP_RULES = {
+    "+": _sum_vjp,
+    "*": _product_vjp,
+    "-": _subtract_vjp,
+    "/": _divide_vjp,
+    "neg": _negate_vjp,
+    "**": _power_vjp,
+    "@": _matrix_multiply_vjp,
+    "sqrt": _elementwise_vjp(elementaries._sqrt_kernel),
+    "ln": _elementwise_vjp(elementaries._ln_kernel),
+    "log": _log_vjp,
+    "exp": _exp_vjp,
+    "sin": _elementwise_vjp(elementaries._sin_kernel),
+    "cos": _elementwise_vjp(elementaries._cos_kernel),
+    "tan": _elementwise_vjp(elementaries._tan_kernel),
+    "arcsin": _elementwise_vjp(elementaries._arcsin_kernel),
+    "arccos": _elementwise_vjp(elementaries._arccos_kernel),
+    "arctan": _elementwise_vjp(elementaries._arctan_kernel),
+    "sinh": _elementwise_vjp(elementaries._sinh_kernel),
+    "cosh": _elementwise_vjp(elementaries._cosh_kernel),
+    "tanh": _tanh_vjp,
+    "logistic": _logistic_vjp,
+    "sum": _reduce_sum_vjp,
+    "mean": _reduce_mean_vjp,
+}
@@ -0,0 +1,235 @@
+from typing import Callable, List, Sequence, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from autodiff_team29 import forward
+from autodiff_team29 import reverse
+from autodiff_team29.graph import Graph
+from autodiff_team29.node import Node
+
+
+def hessian(
+    function: Callable[[List[Node]], Node],
+    point: Sequence[float],
+    chunk_size: Union[int, None] = None,
+    symbols: Union[Sequence[str], None] = None,
+) -> NDArray[float]:
+    """
+    Computes the Hessian of a scalar function of n inputs with forward mode over reverse mode. The function
+    is evaluated once per chunk of at most chunk_size inputs, which are seeded in their own direction as in
+    forward.jacobian. A backward sweep then computes the gradient with the nodes of the graph rather than
+    their values, so every entry of the gradient is a node whose derivative holds a chunk of columns of the
+    Hessian. The Hessian takes one gradient computation per chunk, and is exact rather than differenced.
+
+    Parameters
+    ----------
+    function : callable
+            Function that takes a list of n nodes, one per input, and returns a single node.
+    point : sequence of float
+            Input point the Hessian is computed at.
+    chunk_size : int, optional
+            Maximum number of inputs seeded per pass. Defaults to 64.
+    symbols : sequence of str, optional
+            Symbols of the inputs. Defaults to x1, ..., xn.
+
+    Returns
+    -------
+    np.ndarray :
+            Hessian of shape (n, n).
+
+    Raises
+    ------
+    ValueError
+            If chunk_size is not a positive integer, the number of symbols does not match the point, or
+            the function does not return a scalar.
+    NotImplementedError
+            If the function uses an operation without second order support in reverse mode.
+
+    Examples
+    --------
+    >>> hessian(lambda x: x[0] ** 2 * x[1] + sin(x[1]), [1.0, 2.0])
+    array([[ 4.        ,  2.        ],
+           [ 2.        , -0.90929743]])
+
+    """
+    return _hessian(function, [float(value) for value in point], chunk_size, symbols)
+
+
+def batch_hessian(
+    function: Callable[[List[Node]], Node],
+    points: Union[Sequence[Sequence[float]], NDArray[float]],
+    chunk_size: Union[int, None] = None,
+    symbols: Union[Sequence[str], None] = None,
+) -> NDArray[float]:
+    """
+    Computes the Hessians of a scalar function at a batch of points at once. Every input node holds the
+    values of its coordinate at all points, so each pass evaluates the function and its backward sweep
+    over the whole batch with array operations, rather than once per point.
+
+    Parameters
+    ----------
+    function : callable
+            Function that takes a list of n nodes, one per input, and returns a single node. It must act
+            on every point of the batch independently, i.e. only use elementwise operations.
+    points : array-like
+            Input points of shape (batch, n).
+    chunk_size : int, optional
+            Maximum number of inputs seeded per pass. Defaults to 64.
+    symbols : sequence of str, optional
+            Symbols of the inputs. Defaults to x1, ..., xn.
+
+    Returns
+    -------
+    np.ndarray :
+            Hessians of shape (batch, n, n).
+
+    Raises
+    ------
+    ValueError
+            If points is not two dimensional, or as for hessian.
+
+    Examples
+    --------
+    >>> batch_hessian(lambda x: x[0] ** 2 * x[1], [[1.0, 2.0], [3.0, 1.0]])
+    array([[[4., 2.],
+            [2., 0.]],
+    <BLANKLINE>
+           [[2., 6.],
+            [6., 0.]]])
+
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2:
+        raise ValueError(f"Expected points of shape (batch, n), got {points.shape}")
+
+    return _hessian(function, list(points.T), chunk_size, symbols)
+
+
+def hvp(
+    function: Callable[[List[Node]], Node],
+    point: Sequence[float],
+    directions: Union[Sequence[float], NDArray[float]],
+    symbols: Union[Sequence[str], None] = None,
+) -> NDArray[float]:
+    """
+    Computes the product of the Hessian of a scalar function with one or several vectors, without forming
+    the Hessian. Every input is seeded with its entries of the vectors, and a single differentiable backward
+    sweep gives the gradient, whose derivative along the vectors is the product. The cost is that of about
+    two gradient computations, with every node carrying one derivative per vector.
+
+    Parameters
+    ----------
+    function : callable
+            Function that takes a list of n nodes, one per input, and returns a single node.
+    point : sequence of float
+            Input point the product is computed at.
+    directions : array-like
+            Vector of length n, or k vectors as an array of shape (k, n), to multiply the Hessian with.
+    symbols : sequence of str, optional
+            Symbols of the inputs. Defaults to x1, ..., xn.
+
+    Returns
+    -------
+    np.ndarray :
+            Hessian vector product of shape (n,), or products of shape (k, n) for k vectors.
+
+    Raises
+    ------
+    ValueError
+            If the directions or the symbols do not match the point, or the function does not return a
+            scalar.
+    NotImplementedError
+            If the function uses an operation without second order support in reverse mode.
+
+    Examples
+    --------
+    >>> hvp(lambda x: x[0] ** 2 * x[1] + sin(x[1]), [1.0, 2.0], [1.0, 0.0])
+    array([4., 2.])
+    >>> hvp(lambda x: x[0] ** 2 * x[1], [1.0, 2.0], [[1.0, 0.0], [0.0, 1.0]])
+    array([[4., 2.],
+           [2., 0.]])
+
+    """
+    point = [float(value) for value in point]
+    n_inputs = len(point)
+    symbols = forward._input_symbols(n_inputs, symbols)
+    directions = np.asarray(directions, dtype=float)
+    if directions.ndim not in (1, 2) or directions.shape[-1] != n_inputs:
+        raise ValueError(
+            f"Expected directions of shape ({n_inputs},) or (k, {n_inputs}) to match the input point, "
+            f"got {directions.shape}"
+        )
+
+    graph = Graph.current()
+    with Graph(domain_policy=graph.domain_policy, dtype=graph.dtype):
+        if directions.ndim == 1:
+            inputs = [
+                Node(symbol, value, float(tangent))
+                for symbol, value, tangent in zip(symbols, point, directions)
+            ]
+        else:
+            # one seed direction per vector, so all products share the evaluation and the sweep
+            inputs = [
+                Node(symbol, value, 1, seed_vector=column)
+                for symbol, value, column in zip(symbols, point, directions.T)
+            ]
+
+        output = Node._convert_numeric_type_to_node(function(inputs))
+        if np.ndim(output.value) != 0:
+            raise ValueError(
+                f"Hessian vector products are only defined for scalar functions, got an output of shape "
+                f"{np.shape(output.value)}"
+            )
+
+        adjoints = reverse._sweep([output], [1.0], inputs, differentiable=True)
+        products = np.zeros((n_inputs,) + directions.shape[:-1], dtype=graph.dtype)
+        for row, node in enumerate(inputs):
+            # entries of the gradient that are constant along the vectors leave zeros
+            adjoint = adjoints[node]
+            if isinstance(adjoint, Node) and not Node._is_zero_derivative(adjoint.derivative):
+                products[row] = np.asarray(adjoint.derivative)
+
+    return products.T
+
+
+def _hessian(
+    function: Callable[[List[Node]], Node],
+    point: List[Union[float, NDArray[float]]],
+    chunk_size: Union[int, None],
+    symbols: Union[Sequence[str], None],
+) -> NDArray[float]:
+    """
+    Computes the Hessian at a point whose coordinates are floats, or arrays holding a batch of points
+
+    """
+    chunk_size = forward._chunk_size(chunk_size)
+    n_inputs = len(point)
+    symbols = forward._input_symbols(n_inputs, symbols)
+    batch_shape = np.shape(point[0]) if n_inputs else ()
+
+    graph = Graph.current()
+    result = np.zeros(batch_shape + (n_inputs, n_inputs), dtype=graph.dtype)
+    for start in range(0, n_inputs, chunk_size):
+        stop = min(start + chunk_size, n_inputs)
+
+        # each pass has its own graph, so its nodes are released once the columns are read
+        with Graph(domain_policy=graph.domain_policy, dtype=graph.dtype):
+            inputs = forward._seed_chunk(symbols, point, start, stop)
+            output = Node._convert_numeric_type_to_node(function(inputs))
+            if np.shape(output.value) != batch_shape:
+                raise ValueError(
+                    f"The Hessian is only defined for scalar functions, got an output of shape "
+                    f"{np.shape(output.value)}"
+                )
+
+            adjoints = reverse._sweep(
+                [output], [np.ones_like(output.value)[()]], inputs, differentiable=True
+            )
+            for row, node in enumerate(inputs):
+                # entries of the gradient that are constant along the chunk leave zeros
+                adjoint = adjoints[node]
+                if isinstance(adjoint, Node) and not Node._is_zero_derivative(adjoint.derivative):
+                    result[..., row, start:stop] = np.asarray(adjoint.derivative)
+
+    return result
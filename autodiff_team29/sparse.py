@@ -0,0 +1,235 @@
+from __future__ import annotations
+from typing import Union
+import hashlib
+
+import numpy as np
+from numpy.typing import NDArray
+
+# seed vectors shorter than this are kept dense, as indexing costs more than it saves on short vectors
+_MIN_SPARSE_SIZE = 64
+
+# fraction of nonzero entries above which a tangent is stored densely. Adding sparse tangents takes
+# several passes over their entries, so they only pay off while few inputs influence a node
+_MAX_SPARSE_FILL = 0.1
+
+
+class SparseTangent:
+    # numpy defers arithmetic with sparse tangents to the operators of this class
+    __array_ufunc__ = None
+
+    ndim = 1
+
+    def __init__(self, size: int, indices: NDArray[int], values: NDArray) -> None:
+        """
+        Derivative of a scalar node with respect to size inputs, of which only the partials at indices are
+        stored. Seed vectors are one hot, so a node that depends on a handful of inputs only carries a
+        handful of partials rather than one per input. Arithmetic with another tangent returns a dense
+        array as soon as the result depends on more than a tenth of the inputs.
+
+        Parameters
+        ----------
+        size : int
+                Number of inputs, i.e. the length of the equivalent dense derivative.
+        indices : np.ndarray
+                Sorted, unique indices of the inputs with a stored partial.
+        values : np.ndarray
+                Partials with respect to the inputs at indices.
+
+        Examples
+        --------
+        >>> seed = SparseTangent.compress(np.eye(1000)[3])
+        >>> x = Node("x", 2.0, 1, seed_vector=seed)
+        >>> (x * x)._derivative.indices, (x * x)._derivative.values
+        (array([3]), array([4.]))
+
+        """
+        self._size = size
+        self._indices = indices
+        self._values = values
+
+    @classmethod
+    def compress(cls, dense: Union[NDArray, SparseTangent]) -> Union[NDArray, SparseTangent]:
+        """
+        Returns a sparse tangent holding the nonzero entries of a dense vector, or the vector itself if it
+        is too short or too full to benefit from being stored sparsely.
+
+        Parameters
+        ----------
+        dense : np.ndarray
+                Vector to compress.
+
+        Returns
+        -------
+        SparseTangent, np.ndarray :
+                Sparse or dense representation of the vector.
+
+        """
+        if isinstance(dense, SparseTangent) or np.ndim(dense) != 1:
+            return dense
+
+        dense = np.asarray(dense)
+        if dense.size < _MIN_SPARSE_SIZE:
+            return dense
+
+        indices = np.flatnonzero(dense)
+        if indices.size > _MAX_SPARSE_FILL * dense.size:
+            return dense
+        return cls(dense.size, indices, dense[indices])
+
+    @classmethod
+    def _from_entries(
+        cls, size: int, indices: NDArray[int], values: NDArray
+    ) -> Union[NDArray, SparseTangent]:
+        """
+        Returns the tangent with the given entries, densified if too many of them are stored.
+
+        """
+        if indices.size > _MAX_SPARSE_FILL * size:
+            dense = np.zeros(size, dtype=values.dtype)
+            dense[indices] = values
+            return dense
+        return cls(size, indices, values)
+
+    @property
+    def shape(self) -> tuple:
+        """
+        Returns the shape of the equivalent dense derivative
+
+        """
+        return (self._size,)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """
+        Returns the type of the stored partials
+
+        """
+        return self._values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the number of bytes held by the stored indices and partials
+
+        """
+        return self._indices.nbytes + self._values.nbytes
+
+    @property
+    def indices(self) -> NDArray[int]:
+        """
+        Returns the indices of the inputs with a stored partial
+
+        """
+        return self._indices
+
+    @property
+    def values(self) -> NDArray:
+        """
+        Returns the partials with respect to the inputs at indices
+
+        """
+        return self._values
+
+    def to_dense(self) -> NDArray:
+        """
+        Returns the equivalent dense derivative
+
+        """
+        dense = np.zeros(self._size, dtype=self._values.dtype)
+        dense[self._indices] = self._values
+        return dense
+
+    def astype(self, dtype: np.dtype, copy: bool = True) -> SparseTangent:
+        """
+        Returns the tangent with its partials stored in dtype
+
+        """
+        return SparseTangent(self._size, self._indices, self._values.astype(dtype, copy=copy))
+
+    def fingerprint(self) -> tuple:
+        """
+        Returns a hashable fingerprint that is equal for two tangents if and only if their entries are equal
+
+        """
+        entries = hashlib.blake2b(np.ascontiguousarray(self._indices), digest_size=16)
+        entries.update(np.ascontiguousarray(self._values))
+        return "sparse", self._size, self._indices.size, self._values.dtype.str, entries.digest()
+
+    def __array__(self, dtype=None, copy=None) -> NDArray:
+        dense = self.to_dense()
+        return dense if dtype is None else dense.astype(dtype)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"SparseTangent({self._size}, {self._indices!r}, {self._values!r})"
+
+    def __neg__(self) -> SparseTangent:
+        return SparseTangent(self._size, self._indices, -self._values)
+
+    def __mul__(self, other: Union[int, float, NDArray]) -> Union[NDArray, SparseTangent]:
+        if isinstance(other, SparseTangent):
+            return NotImplemented
+
+        # a batch of local derivatives spreads the tangent over the batch, which is dense anyway
+        if np.ndim(other) > 0:
+            return np.asarray(other) * self.to_dense()
+
+        return SparseTangent(self._size, self._indices, self._values * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: Union[int, float, NDArray]) -> Union[NDArray, SparseTangent]:
+        if isinstance(other, SparseTangent):
+            return NotImplemented
+
+        if np.ndim(other) > 0:
+            return self.to_dense() / np.asarray(other)
+
+        return SparseTangent(self._size, self._indices, self._values / other)
+
+    def __add__(self, other: Union[int, float, NDArray, SparseTangent]):
+        return self._combine(other, 1)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Union[int, float, NDArray, SparseTangent]):
+        return self._combine(other, -1)
+
+    def __rsub__(self, other: Union[int, float, NDArray, SparseTangent]):
+        return (-self)._combine(other, 1)
+
+    def _combine(self, other, sign: int):
+        """
+        Returns self + sign * other. Adding the scalar 0 of a constant leaves the tangent unchanged,
+        adding a dense derivative gives a dense derivative.
+
+        """
+        if isinstance(other, SparseTangent):
+            if other._size != self._size:
+                raise ValueError(
+                    f"Cannot combine tangents with respect to {self._size} and {other._size} inputs"
+                )
+
+            indices = np.union1d(self._indices, other._indices)
+            values = np.zeros(
+                indices.size, dtype=np.result_type(self._values, other._values)
+            )
+            values[np.searchsorted(indices, self._indices)] = self._values
+            values[np.searchsorted(indices, other._indices)] += sign * other._values
+            return self._from_entries(self._size, indices, values)
+
+        if np.ndim(other) == 0 and other == 0:
+            return self
+
+        other = sign * np.asarray(other)
+        if np.ndim(other) == 0:
+            return self.to_dense() + other
+
+        dense = np.array(
+            np.broadcast_to(other, np.broadcast_shapes(other.shape, self.shape)),
+            dtype=np.result_type(other, self._values),
+        )
+        dense[..., self._indices] += self._values
+        return dense
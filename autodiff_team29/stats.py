@@ -0,0 +1,216 @@
+from __future__ import annotations
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable
+import sys
+
+import numpy as np
+
+from autodiff_team29.sparse import SparseTangent
+
+# counters kept for every operation type
+_COUNTERS = ("hits", "misses", "inserts", "evictions", "restores")
+
+
+class RegistryStats:
+    def __init__(self) -> None:
+        """
+        Counts how the node registry of a graph is used: lookups that found an existing node (hits),
+        lookups that did not (misses), nodes stored (inserts), nodes evicted to respect a size limit and
+        lookups that missed the registry but were restored from its persistent cache (restores).
+        Restored nodes are neither counted as hits nor as inserts.
+        Every count is also broken down by the operation that created the node, with input nodes counted
+        under "leaf". Counts are approximate while the graph is shared between threads.
+
+        Examples
+        --------
+        >>> stats = RegistryStats()
+        >>> stats.record_lookup(("sqrt", 0), hit=False)
+        >>> stats.record_insert(("sqrt", 0))
+        >>> stats.misses, stats.inserts
+        (1, 1)
+
+        """
+        self.reset()
+
+    @staticmethod
+    def operation_of(key: Hashable) -> str:
+        """
+        Returns the name of the operation that created the node stored under key.
+
+        Parameters
+        ----------
+        key : tuple
+            Registry key of a node.
+
+        Returns
+        -------
+        str :
+            Name of the operation, or "leaf" for input nodes that are keyed on their symbol and input point.
+
+        Examples
+        --------
+        >>> RegistryStats.operation_of(("*", 0, 1))
+        '*'
+        >>> RegistryStats.operation_of(("x", (10, 1)))
+        'leaf'
+
+        """
+        return key[0] if isinstance(key[1], int) else "leaf"
+
+    @property
+    def lookups(self) -> int:
+        """
+        Returns the number of times the registry was searched for an existing node
+
+        """
+        return self._hits + self._misses + self._restores
+
+    @property
+    def hits(self) -> int:
+        """
+        Returns the number of lookups that found an existing node
+
+        """
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """
+        Returns the number of lookups that did not find an existing node
+
+        """
+        return self._misses
+
+    @property
+    def inserts(self) -> int:
+        """
+        Returns the number of nodes stored in the registry
+
+        """
+        return self._inserts
+
+    @property
+    def evictions(self) -> int:
+        """
+        Returns the number of nodes evicted to respect the size limit of the registry.
+        Nodes garbage collected from a weak reference registry are not counted.
+
+        """
+        return self._evictions
+
+    @property
+    def restores(self) -> int:
+        """
+        Returns the number of lookups that were answered by restoring a node from the persistent cache
+
+        """
+        return self._restores
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Returns the fraction of lookups that found an existing node, or 0 if no lookup was made
+
+        """
+        return self._hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def by_operation(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the hits, misses, inserts, evictions and restores of every operation type
+
+        """
+        return {
+            operation: dict(zip(_COUNTERS, counts))
+            for operation, counts in self._by_operation.items()
+        }
+
+    def record_lookup(self, key: Hashable, hit: bool) -> None:
+        """
+        Records a lookup of key in the registry.
+
+        Parameters
+        ----------
+        key : tuple
+            Registry key that was looked up.
+        hit : bool
+            True if an existing node was found.
+
+        """
+        counts = self._by_operation[self.operation_of(key)]
+        if hit:
+            self._hits += 1
+            counts[0] += 1
+        else:
+            self._misses += 1
+            counts[1] += 1
+
+    def record_insert(self, key: Hashable) -> None:
+        """
+        Records that a node was stored in the registry under key.
+
+        """
+        self._inserts += 1
+        self._by_operation[self.operation_of(key)][2] += 1
+
+    def record_eviction(self, key: Hashable) -> None:
+        """
+        Records that the node stored under key was evicted from the registry.
+
+        """
+        self._evictions += 1
+        self._by_operation[self.operation_of(key)][3] += 1
+
+    def record_restore(self, key: Hashable) -> None:
+        """
+        Records that the node stored under key was restored from the persistent cache after a lookup
+        missed the registry.
+
+        """
+        self._restores += 1
+        self._by_operation[self.operation_of(key)][4] += 1
+
+    def reset(self) -> None:
+        """
+        Sets every count back to zero.
+
+        """
+        self._hits = 0
+        self._misses = 0
+        self._inserts = 0
+        self._evictions = 0
+        self._restores = 0
+        self._by_operation = defaultdict(lambda: [0] * len(_COUNTERS))
+
+
+def approximate_bytes(items: Iterable) -> Dict[str, int]:
+    """
+    Approximates the memory held by registry entries, including each node, its value, its derivative
+    and its key. Memory shared between entries, such as operands referenced by several nodes, is only
+    counted for the entry that owns it.
+
+    Parameters
+    ----------
+    items : iterable of (tuple, Node)
+        Key and node pairs stored in a registry.
+
+    Returns
+    -------
+    dict :
+        Approximate number of bytes held by the entries of every operation type.
+
+    """
+    held = defaultdict(int)
+    for key, node in items:
+        size = sys.getsizeof(key) + sys.getsizeof(node)
+        for array in (node._value, node._derivative):
+            if isinstance(array, (np.ndarray, SparseTangent)):
+                size += array.nbytes
+            else:
+                size += sys.getsizeof(array)
+        if node._symbol is not None:
+            size += sys.getsizeof(node._symbol)
+
+        held[RegistryStats.operation_of(key)] += size
+
+    return dict(held)
@@ -1,25 +1,49 @@
-from typing import List
+from typing import Callable, List, Sequence, Union
+import math
 
 import numpy as np
 from numpy.typing import NDArray
 
-from autodiff_team29 import Node
+from autodiff_team29 import Graph, Node
+from autodiff_team29 import forward
+from autodiff_team29 import reverse
+from autodiff_team29.sparse import SparseTangent
+from autodiff_team29.graph import _collect_nodes
+
+_MODES = ("auto", "forward", "reverse")
+
+# cost of visiting a node in a backward sweep, relative to evaluating it in a forward pass, as measured
+# on scalar graphs. A backward sweep reuses the values of the graph rather than computing new nodes
+_REVERSE_SWEEP_COST = 0.5
+
+# additional cost of carrying one seed direction through a node in a forward pass, relative to evaluating
+# the node. Tangents are NumPy arrays, so every direction only adds a fraction of the overhead of a node
+_TANGENT_DIRECTION_COST = 1 / 32
+
+# number of outputs per input from which forward mode is chosen without estimating the cost of either
+# mode. A forward pass then carries few directions through the graph, while reverse mode sweeps it once
+# per output
+_FORWARD_OUTPUTS_PER_INPUT = 4
 
 
 class VectorFunction:
-    def __init__(self, functions: List[Node]) -> None:
+    def __init__(self, functions: List[Node], mode: str = "auto") -> None:
         """
-        Computes forward mode automatic differentiation for provided functions
+        Computes the value and Jacobian of provided functions, in forward or reverse mode
 
         Parameters
         ----------
         functions : Node or List[Node]
             functions that compose the vector function
+        mode : str, optional
+            "forward" stacks the derivatives the functions carry, "reverse" computes every row of the
+            Jacobian with a backward sweep and multiplies the adjoints of the inputs by their seed vectors.
+            "auto", the default, picks the cheaper of the two, see mode.
 
         Raises:
         ------
         ValueError :
-            Raise value error if functions is not List[Node]
+            Raise value error if functions is not List[Node], or mode is unknown
 
         Example
         -------
@@ -34,10 +58,124 @@ class VectorFunction:
 
         if isinstance(functions, list):
             assert all(isinstance(f, Node) for f in functions)
-            self._functions = functions
+            self._functions = list(functions)
         else:
             raise ValueError("functions argument must be a list of Nodes")
 
+        self._mode_decision = None
+        self.mode = mode
+
+        # set by from_callable, which evaluates the functions without propagating tangents
+        self._function = None
+        self._inputs = None
+
+        # assembled on first read, the nodes of the functions being immutable
+        self._value = None
+
+    @classmethod
+    def from_callable(
+        cls,
+        function: Callable[[List[Node]], Union[Node, List[Node]]],
+        point: Sequence[float],
+        symbols: Union[Sequence[str], None] = None,
+        mode: str = "auto",
+    ) -> "VectorFunction":
+        """
+        Evaluates a function of n inputs at a point without propagating any derivatives, and returns its
+        vector function. Its Jacobian is computed on first read, either with chunked forward mode, one
+        column per input, or in reverse mode, one row per output, whichever is cheaper for the dimensions
+        and the size of the evaluated graph.
+
+        Parameters
+        ----------
+        function : callable
+            Function that takes a list of n nodes, one per input, and returns a node or a list of nodes.
+        point : sequence of float
+            Input point the function is evaluated at.
+        symbols : sequence of str, optional
+            Symbols of the inputs. Defaults to x1, ..., xn.
+        mode : str, optional
+            "forward", "reverse" or "auto", see VectorFunction.
+
+        Returns
+        -------
+        VectorFunction :
+            Vector function of the outputs, with one row per output in its Jacobian.
+
+        Raises
+        ------
+        ValueError
+            If the number of symbols does not match the point, or mode is unknown.
+
+        Examples
+        --------
+        >>> f = VectorFunction.from_callable(lambda x: x[0] * sin(x[1] + x[2]), [1.0, 2.0, 3.0])
+        >>> f.mode
+        'reverse'
+
+        """
+        point = [float(value) for value in point]
+        symbols = forward._input_symbols(len(point), symbols)
+
+        inputs = [Node(symbol, value, 0) for symbol, value in zip(symbols, point)]
+        outputs = function(inputs)
+        if not isinstance(outputs, (list, tuple)):
+            outputs = [outputs]
+
+        vector_function = cls([Node._convert_numeric_type_to_node(output) for output in outputs], mode)
+        vector_function._function = function
+        vector_function._inputs = inputs
+        return vector_function
+
+    @property
+    def mode(self) -> str:
+        """
+        Returns the mode the Jacobian is computed in, "forward" or "reverse". Unless set manually, functions
+        that already carry their derivatives use them, as forward mode has then been paid for. Functions
+        created with from_callable are differentiated in reverse mode if the backward sweeps over the
+        graph of every output are estimated to cost less than forward mode over the whole graph, one pass
+        per chunk of inputs. Reverse mode is only available for scalar functions. The decision is made on
+        first read and kept until the mode is set again.
+
+        """
+        if self._mode != "auto":
+            return self._mode
+
+        if self._mode_decision is None:
+            self._mode_decision = self._choose_mode()
+        return self._mode_decision
+
+    def _choose_mode(self) -> str:
+        """
+        Returns the mode the Jacobian is computed in under the "auto" mode, see mode
+
+        """
+        if self._inputs is None or not self._all_scalar():
+            return "forward"
+
+        if len(self._functions) >= _FORWARD_OUTPUTS_PER_INPUT * len(self._inputs):
+            return "forward"
+
+        n_nodes, n_visits = _graph_sizes(self._functions)
+        forward_passes = math.ceil(len(self._inputs) / forward._DEFAULT_CHUNK_SIZE)
+        forward_cost = n_nodes * (forward_passes + len(self._inputs) * _TANGENT_DIRECTION_COST)
+        reverse_cost = _REVERSE_SWEEP_COST * n_visits
+        return "reverse" if reverse_cost < forward_cost else "forward"
+
+    @mode.setter
+    def mode(self, mode: str) -> None:
+        """
+        Sets the mode the Jacobian is computed in, "forward", "reverse" or "auto", discarding a Jacobian
+        computed in another mode.
+
+        """
+        if mode not in _MODES:
+            raise ValueError(f"Mode must be one of {_MODES}, got '{mode}'")
+
+        self._mode = mode
+        self._mode_decision = None
+        self._jacobian = None
+
     @property
     def symbol(self) -> str:
         """
@@ -49,15 +187,181 @@ class VectorFunction:
     @property
     def value(self) -> NDArray[float]:
         """
-        Returns the computed value of the vector function
+        Returns the computed value of the vector function, stored in the dtype of the active graph if it has
+        one. The value is assembled on first read, and later reads return a read only view of the same buffer.
 
         """
-        return np.array([function.value for function in self._functions])
+        if self._value is None:
+            self._value = self.compute_value()
+        return _read_only_view(self._value)
 
     @property
     def jacobian(self) -> NDArray[float]:
         """
-        Returns the computed Jacobian of the vector function
+        Returns the computed Jacobian of the vector function, in the mode given by mode. For functions of
+        many inputs, prefer from_callable, whose nodes do not carry a derivative as long as the number of
+        inputs. The Jacobian is stored in the dtype of the active graph if it has one. It is assembled on
+        first read, and later reads return a read only view of the same buffer.
+
+        """
+        if self._jacobian is None:
+            self._jacobian = self.compute_jacobian()
+        return _read_only_view(self._jacobian)
+
+    def compute_value(self, out: Union[NDArray, None] = None) -> NDArray[float]:
+        """
+        Assembles the value of the vector function into a contiguous array.
+
+        Parameters
+        ----------
+        out : np.ndarray, optional
+            Preallocated array of shape (number of functions, *value shape) to assemble the value into,
+            e.g. a buffer reused across the iterations of a solver. If None, a new array is allocated.
+
+        Returns
+        -------
+        np.ndarray :
+            out, or the newly allocated array.
+
+        Raises
+        ------
+        ValueError
+            If out does not have the shape of the value.
+
+        """
+        return _assemble([function.value for function in self._functions], out)
+
+    def compute_jacobian(self, out: Union[NDArray, None] = None) -> NDArray[float]:
+        """
+        Assembles the Jacobian of the vector function into a contiguous array, with one row per function.
+        Rows of functions whose derivative is the scalar 0 of a constant are filled with zeros, and sparse
+        derivatives only write their stored partials.
+
+        Parameters
+        ----------
+        out : np.ndarray, optional
+            Preallocated array of shape (number of functions, number of inputs) to assemble the Jacobian
+            into. If None, a new array is allocated.
+
+        Returns
+        -------
+        np.ndarray :
+            out, or the newly allocated array.
+
+        Raises
+        ------
+        ValueError
+            If out does not have the shape of the Jacobian, or reverse mode is requested for functions
+            that are not scalar.
+
+        Examples
+        --------
+        >>> buffer = np.empty((2, 2))
+        >>> f.compute_jacobian(out=buffer) is buffer
+        True
+
+        """
+        if self.mode == "forward":
+            if self._inputs is None:
+                # sparse derivatives are written by their stored partials only
+                rows = [function._derivative for function in self._functions]
+            else:
+                rows = list(
+                    np.atleast_2d(
+                        forward.jacobian(
+                            self._function,
+                            [node.value for node in self._inputs],
+                            symbols=[node.symbol for node in self._inputs],
+                        )
+                    )
+                )
+            return _assemble(rows, out)
+
+        if not self._all_scalar():
+            raise ValueError("Reverse mode is only available for scalar functions")
+
+        return _assemble([self._reverse_row(function) for function in self._functions], out)
 
+    def _all_scalar(self) -> bool:
         """
-        return np.array([function.derivative for function in self._functions])
+        Returns whether the value of every function is a scalar
+
+        """
+        return all(np.ndim(function.value) == 0 for function in self._functions)
+
+    def _reverse_row(self, function: Node):
+        """
+        Returns the row of the Jacobian of function, from the adjoints of a backward sweep. Inputs created
+        by from_callable give the row directly, otherwise the adjoint of every input is multiplied by its
+        derivative, i.e. its seed vector, as in forward mode.
+
+        """
+        if self._inputs is not None:
+            return np.array(reverse.grad(function, self._inputs))
+
+        row = 0
+        for node, adjoint in reverse.backward(function).items():
+            if not Node._is_zero_derivative(node.derivative):
+                row = row + adjoint * node.derivative
+        return row
+
+
+def _read_only_view(buffer: NDArray) -> NDArray:
+    """
+    Returns a view of buffer that cannot be written to, so cached results cannot be modified by callers
+
+    """
+    view = buffer.view()
+    view.flags.writeable = False
+    return view
+
+
+def _assemble(rows: list, out: Union[NDArray, None]) -> NDArray:
+    """
+    Writes rows into consecutive entries of out along its first axis, after broadcasting them to a common
+    shape. If out is None, it is allocated in the dtype of the active graph, or of the rows if it has none.
+
+    """
+    shape = (len(rows),) + np.broadcast_shapes(*[np.shape(row) for row in rows])
+    if out is None:
+        dtype = Graph.current().dtype
+        if dtype is None:
+            dtype = np.result_type(
+                float,
+                *{row.dtype if hasattr(row, "dtype") else np.result_type(row) for row in rows},
+            )
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError(f"Expected an output array of shape {shape}, got {out.shape}")
+
+    for index, row in enumerate(rows):
+        if isinstance(row, SparseTangent):
+            out[index] = 0
+            out[index, ..., row.indices] = row.values
+        else:
+            out[index] = row
+
+    return out
+
+
+def _graph_sizes(outputs: List[Node]) -> tuple:
+    """
+    Returns the number of nodes outputs depend on together, and the sum over outputs of the number of
+    nodes each of them depends on, in a single traversal. Every node carries the set of outputs that
+    depend on it as a bitmask, which it passes on to its operands, operands being visited after every
+    node computed from them.
+
+    """
+    nodes = _collect_nodes(outputs)
+    dependents = {}
+    for index, output in enumerate(outputs):
+        dependents[output._id] = dependents.get(output._id, 0) | (1 << index)
+
+    n_visits = 0
+    for node in reversed(nodes):
+        mask = dependents.pop(node._id)
+        n_visits += mask.bit_count()
+        for operand in node._operands:
+            dependents[operand._id] = dependents.get(operand._id, 0) | mask
+
+    return len(nodes), n_visits
@@ -0,0 +1,88 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from autodiff_team29 import Graph, Node
+from autodiff_team29.elementaries import sqrt
+
+
+def compute_duplicate_square_roots(n_nodes: int):
+    """
+    Emulates a gradient request that sums repeated square roots of the same input.
+    Every request evaluates the same input, so requests can reuse each other's nodes if the graph is shared.
+
+    """
+    x = Node("x", 123424341341544235, 1)
+
+    def apply_n_square_roots(n, x):
+
+        value = x
+        for _ in range(1, n + 1):
+            value = sqrt(value)
+
+        return value
+
+    return sum([apply_n_square_roots(n, x) for n in range(n_nodes)]).derivative
+
+
+def benchmark(number_of_threads, n_requests, n_nodes, concurrency_mode):
+    """
+    Benchmark to compare the time it takes a thread pool to serve a batch of requests
+    with thread local registries and with a shared lock striped registry
+
+    """
+    # store time it takes to serve all requests for each pool size
+    execution_times = []
+
+    for number in number_of_threads:
+
+        # start every measurement from empty registries
+        Graph.set_concurrency_mode(None)
+        Graph.set_concurrency_mode(concurrency_mode)
+
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=number) as executor:
+            list(executor.map(compute_duplicate_square_roots, [n_nodes] * n_requests))
+
+        end = time.perf_counter()
+
+        execution_times.append(end - start)
+
+    Graph.set_concurrency_mode(None)
+
+    return np.array(execution_times)
+
+
+if __name__ == "__main__":
+
+    number_of_threads = np.arange(1, 17)
+    n_requests = 64
+    n_nodes = 60
+
+    figure, axis = plt.subplots(1, 1, figsize=(10, 5))
+
+    for concurrency_mode, color in [("thread_local", "blue"), ("shared", "red")]:
+        execution_times = benchmark(
+            number_of_threads, n_requests, n_nodes, concurrency_mode
+        )
+
+        axis.plot(
+            number_of_threads,
+            execution_times,
+            color=color,
+            linestyle="-.",
+            label=f"Concurrency mode '{concurrency_mode}'",
+        )
+
+    # plot formatting
+    axis.set_xlabel("Number of threads")
+    axis.set_ylabel("Execution Time")
+    axis.set_title(f"Time to serve {n_requests} requests with a thread pool")
+
+    axis.legend()
+
+    plt.tight_layout()
+    plt.savefig("concurrency_benchmark_results.png")
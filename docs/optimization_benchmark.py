@@ -3,41 +3,54 @@ import time
 import numpy as np
 import matplotlib.pyplot as plt
 
-from autodiff_team29 import Node
-from autodiff_team29.elementaries import sin, exp, cos, sqrt
-
-
-def compute_expensive_duplicate_product_of_nodes(n_nodes: int):
+from autodiff_team29 import Graph, Node, backends, elementaries
+from autodiff_team29.elementaries import sin, exp, cos, sqrt, log, tanh, logistic
+
+# elementary functions whose kernels are timed on scalar points, with a point inside of their domain
+SCALAR_KERNELS = {
+    "sqrt": (elementaries._sqrt_kernel, 0.7),
+    "log": (elementaries._ln_kernel, 0.7),
+    "exp": (elementaries._exp_kernel, 0.7),
+    "sin": (elementaries._sin_kernel, 0.7),
+    "cos": (elementaries._cos_kernel, 0.7),
+    "tan": (elementaries._tan_kernel, 0.7),
+    "arcsin": (elementaries._arcsin_kernel, 0.7),
+    "arctan": (elementaries._arctan_kernel, 0.7),
+    "tanh": (elementaries._tanh_kernel, 0.7),
+    "logistic": (elementaries._logistic_kernel, 0.7),
+}
+
+
+def compute_expensive_duplicate_product_of_nodes(n_nodes: int, overwrite_setting: bool):
     """
     Emulates the execution of the product of n numbers.
     This product is duplicated to test our optimization performance.
 
     """
 
-    # reset environment
-    Node.clear_node_registry()
-    Node._NODES_COMPUTED_FOR_BENCHMARKING = 0
+    # run every computation in a fresh graph so no nodes or counts carry over
+    with Graph(overwrite_mode=overwrite_setting) as graph:
 
-    # time expensive computation
-    start = time.perf_counter()
+        # time expensive computation
+        start = time.perf_counter()
 
-    x = Node("x", 123424341341544235, 1)
+        x = Node("x", 123424341341544235, 1)
 
-    def apply_n_square_roots(n, x):
+        def apply_n_square_roots(n, x):
 
-        value = x
-        for _ in range(1, n + 1):
-            value = sqrt(value)
+            value = x
+            for _ in range(1, n + 1):
+                value = sqrt(value)
 
-        return value
+            return value
 
-    sum([apply_n_square_roots(n, x) for n in range(n_nodes)])
+        sum([apply_n_square_roots(n, x) for n in range(n_nodes)])
 
-    end = time.perf_counter()
-    elapsed_time = end - start
+        end = time.perf_counter()
+        elapsed_time = end - start
 
     # return results of computation
-    return Node._NODES_COMPUTED_FOR_BENCHMARKING, elapsed_time
+    return graph.nodes_computed, elapsed_time
 
 
 def benchmark(number_of_inputs, sample_size, overwrite_setting):
@@ -45,9 +58,6 @@ def benchmark(number_of_inputs, sample_size, overwrite_setting):
     Benchmark to compare the performance speed with the node lookup enabled or disabled
 
     """
-    # toggle overwrite mode on and off for the nodes
-    Node.set_overwrite_mode(enabled=overwrite_setting)
-
     # store average time it takes to compute the product of n nodes
     average_execution_times = []
     standard_deviation_execution_times = []
@@ -63,7 +73,7 @@ def benchmark(number_of_inputs, sample_size, overwrite_setting):
             (
                 number_nodes_created,
                 elapsed_time,
-            ) = compute_expensive_duplicate_product_of_nodes(number)
+            ) = compute_expensive_duplicate_product_of_nodes(number, overwrite_setting)
 
             sample_execution_times[sample_index] = elapsed_time
             sample_number_nodes_created[sample_index] = number_nodes_created
@@ -84,6 +94,45 @@ def benchmark(number_of_inputs, sample_size, overwrite_setting):
     )
 
 
+def time_scalar_kernels(n_evaluations: int):
+    """
+    Returns the time it takes to evaluate the value and derivative of every elementary function at a
+    scalar point, with the math module backend used for Python floats and with the NumPy backend used
+    for arrays
+
+    """
+    execution_times = {}
+    for name, (kernel, point) in SCALAR_KERNELS.items():
+        times = []
+        for backend in (backends.SCALAR_BACKEND, backends.ARRAY_BACKEND):
+            start = time.perf_counter()
+            for _ in range(n_evaluations):
+                kernel(backend, point)
+            end = time.perf_counter()
+            times.append((end - start) / n_evaluations)
+
+        execution_times[name] = times
+
+    return execution_times
+
+
+def time_scalar_points(n_points: int):
+    """
+    Returns the time per node of evaluating a scalar function and its derivative at many points, the
+    registry being cleared before every point so no node is reused
+
+    """
+    with Graph() as graph:
+        start = time.perf_counter()
+        for point in range(n_points):
+            graph.clear()
+            x = Node("x", 0.5 + point / n_points, 1)
+            sin(x) * exp(x) + sqrt(x) * cos(x) - log(x, 10) + tanh(x) / logistic(x)
+        end = time.perf_counter()
+
+    return (end - start) / graph.nodes_computed
+
+
 if __name__ == "__main__":
 
     number_of_inputs = (np.linspace(1, 100, 100)).astype(int)
@@ -177,3 +226,28 @@ if __name__ == "__main__":
 
     plt.tight_layout()
     plt.savefig("benchmark_results.png")
+
+    # scalar kernels evaluated with the math module and with NumPy
+    kernel_times = time_scalar_kernels(100_000)
+    for name, (math_time, numpy_time) in kernel_times.items():
+        print(
+            f"{name}: {math_time * 1e9:.0f} ns with math, {numpy_time * 1e9:.0f} ns with NumPy, "
+            f"{numpy_time / math_time:.1f}x faster"
+        )
+    print(f"scalar sweep: {time_scalar_points(3000) * 1e9:.0f} ns per node")
+
+    figure, axis = plt.subplots(figsize=(10, 5))
+    positions = np.arange(len(kernel_times))
+    math_times, numpy_times = np.array(list(kernel_times.values())).T * 1e9
+    axis.bar(positions - 0.2, math_times, width=0.4, color="blue", label="math backend")
+    axis.bar(positions + 0.2, numpy_times, width=0.4, color="red", label="NumPy backend")
+
+    # plot formatting
+    axis.set_xticks(positions)
+    axis.set_xticklabels(list(kernel_times))
+    axis.set_ylabel("Time per Evaluation (ns)")
+    axis.set_title("Value and Derivative of Elementary Functions at a Scalar Point")
+    axis.legend()
+
+    plt.tight_layout()
+    plt.savefig("scalar_backend_results.png")
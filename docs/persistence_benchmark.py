@@ -0,0 +1,84 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from autodiff_team29 import Graph, Node, PersistentCache
+from autodiff_team29.elementaries import sin, exp, sqrt, log, tanh, sum
+
+
+def evaluate_scalar_points(n_points: int):
+    """
+    Emulates a sweep over many input points of a cheap scalar function, where every node is elementwise
+    and is recomputed faster than it is read from disk
+
+    """
+    for point in range(1, n_points + 1):
+        x = Node("x", float(point), 1)
+        sin(x) * exp(x / 100) + sqrt(x) - log(x, 10)
+
+
+def evaluate_dense_layers(size: int):
+    """
+    Emulates the forward pass of a small network on a batch of inputs, dominated by matrix products whose
+    results are cheaper to read from disk than to recompute
+
+    """
+    rng = np.random.default_rng(0)
+    hidden = Node("X", rng.standard_normal((size, size)) / np.sqrt(size), 1)
+    for layer in range(4):
+        weights = Node(f"W{layer}", rng.standard_normal((size, size)) / np.sqrt(size), 0)
+        hidden = tanh(hidden @ weights)
+
+    return sum(hidden)
+
+
+def benchmark(workload, argument, path):
+    """
+    Returns the time it takes to evaluate workload without a persistent cache, with an empty cache and
+    with the cache filled by the previous run, each in a fresh graph as after a restart
+
+    """
+    execution_times = []
+    for cache in [None, PersistentCache(path), PersistentCache(path)]:
+        with Graph(persistent_cache=cache):
+            start = time.perf_counter()
+            workload(argument)
+            end = time.perf_counter()
+
+        if cache is not None:
+            cache.close()
+
+        execution_times.append(end - start)
+
+    return np.array(execution_times)
+
+
+if __name__ == "__main__":
+
+    workloads = [
+        ("2000 scalar points", evaluate_scalar_points, 2000),
+        ("4 dense layers of 1000 units", evaluate_dense_layers, 1000),
+    ]
+    labels = ["no cache", "cold cache", "warm cache"]
+
+    figure, axes = plt.subplots(1, len(workloads), figsize=(10, 5))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for axis, (title, workload, argument) in zip(axes, workloads):
+            path = os.path.join(directory, f"{workload.__name__}.sqlite")
+            execution_times = benchmark(workload, argument, path)
+
+            for label, execution_time in zip(labels, execution_times):
+                print(f"{title}, {label}: {execution_time:.3f} s")
+
+            axis.bar(labels, execution_times, color=["grey", "blue", "red"])
+
+            # plot formatting
+            axis.set_ylabel("Execution Time")
+            axis.set_title(title)
+
+    plt.tight_layout()
+    plt.savefig("persistence_benchmark_results.png")
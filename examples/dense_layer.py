@@ -0,0 +1,19 @@
+from autodiff_team29.node import Node
+from autodiff_team29.elementaries import tanh, sum
+import numpy as np
+
+rng = np.random.default_rng(0)
+W = rng.normal(size=(3, 4))
+b = rng.normal(size=3)
+
+# seed every element of x in its own direction to get the full gradient in one pass
+x = Node("x", np.array([0.5, -1.0, 2.0, 0.0]), np.eye(4))
+
+# a dense layer followed by a sum, differentiated with matrix products instead of scalar nodes
+f = sum(tanh(W @ x + b))
+
+print("Value:", f.value)
+print("Gradient:", f.derivative)
+
+# the gradient matches the analytical one
+print("Analytical:", W.T @ (1 - np.tanh(W @ x.value + b) ** 2))
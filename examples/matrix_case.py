@@ -29,7 +29,7 @@ print("Value", f.value)
 print("Jacobian", f.jacobian)
 
 # >>> New Node representation:
-# >>> Symbol: ['((x1*x2)+sin(x1))' '((x1+x2)+sin((x1*x2)))']
+# >>> Symbol: ['((x1*x2)+sin(x1))' '(sin((x1*x2))+x1+x2)']
 # >>> Value [4.9348022  3.73702101]
 # >>> Jacobian [[0.57079633 3.14159265]
 #    [1.3464926  1.6929852 ]]
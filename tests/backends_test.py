@@ -0,0 +1,136 @@
+import warnings
+
+import pytest
+from expects import expect, equal, be, be_true, be_a
+import numpy as np
+
+from autodiff_team29 import Node, backends
+from autodiff_team29.backends import ARRAY_BACKEND, SCALAR_BACKEND, Backend, evaluate
+from autodiff_team29 import elementaries
+
+# inputs every kernel is evaluated at, within its domain
+_REAL_LINE = [-20.0, -0.5, 0.25, 0.75, 20.0]
+_POSITIVE = [0.25, 0.75, 20.0]
+_UNIT_INTERVAL = [-0.5, 0.25, 0.75]
+KERNEL_INPUTS = {
+    "sqrt": _POSITIVE,
+    "exp": _REAL_LINE,
+    "log": _POSITIVE,
+    "sin": _REAL_LINE,
+    "cos": _REAL_LINE,
+    "tan": _REAL_LINE,
+    "arcsin": _UNIT_INTERVAL,
+    "arccos": _UNIT_INTERVAL,
+    "arctan": _REAL_LINE,
+    "sinh": _REAL_LINE,
+    "cosh": _REAL_LINE,
+    "tanh": _REAL_LINE,
+    "logistic": _REAL_LINE,
+}
+
+
+class TestBackends:
+    """
+    Test that the scalar and array backends are interchangeable.
+
+    """
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (0.5, SCALAR_BACKEND),
+            (2, SCALAR_BACKEND),
+            (np.float64(0.5), SCALAR_BACKEND),
+            (np.float32(0.5), ARRAY_BACKEND),
+            (np.array([0.5, 1.0]), ARRAY_BACKEND),
+        ],
+    )
+    def test_backend_selection(self, value, expected):
+        """
+        Verify that Python and float64 scalars are evaluated with the math module and anything else with NumPy
+
+        """
+        expect(evaluate(lambda backend, x: backend, value)).to(be(expected))
+
+    @pytest.mark.parametrize(
+        "kernel, value",
+        [(kernel, value) for kernel, values in KERNEL_INPUTS.items() for value in values],
+    )
+    def test_backends_agree(self, kernel, value):
+        """
+        Verify that every kernel of the scalar backend matches the array backend within rounding
+
+        """
+        scalar = getattr(SCALAR_BACKEND, kernel)(value)
+        array = getattr(ARRAY_BACKEND, kernel)(value)
+
+        np.testing.assert_allclose(scalar, array, rtol=1e-14)
+
+    def test_scalar_logistic_does_not_overflow(self):
+        """
+        Verify that the scalar logistic function saturates instead of overflowing for large inputs
+
+        """
+        expect(SCALAR_BACKEND.logistic(-1000.0)).to(equal(0.0))
+        expect(SCALAR_BACKEND.logistic(1000.0)).to(equal(1.0))
+
+    def test_scalar_errors_fall_back_to_numpy(self):
+        """
+        Verify that scalars the math module raises on give the same inf and NaN results as NumPy
+
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            expect(evaluate(lambda backend, x: backend.exp(x), 1000.0)).to(equal(np.inf))
+            expect(bool(np.isnan(evaluate(lambda backend, x: backend.sqrt(x), -1.0)))).to(be_true)
+            expect(evaluate(lambda backend, x: 1 / x, 0.0)).to(equal(np.inf))
+
+    def test_missing_kernel_raises_type_error(self):
+        """
+        Verify that a backend must implement every kernel, and no other
+
+        """
+        with pytest.raises(TypeError):
+            Backend("incomplete", sqrt=np.sqrt)
+
+        with pytest.raises(TypeError):
+            Backend("unknown", erf=np.sqrt, **{kernel: np.sqrt for kernel in KERNEL_INPUTS})
+
+    def test_ndim(self):
+        """
+        Verify the number of dimensions of scalars and arrays
+
+        """
+        expect(backends.ndim(1.5)).to(equal(0))
+        expect(backends.ndim(np.ones((2, 3)))).to(equal(2))
+
+
+class TestScalarPath:
+    """
+    Test that elementary functions of scalar nodes take the scalar path and keep their results.
+
+    """
+
+    def test_scalar_nodes_hold_python_floats(self):
+        """
+        Verify that a chain of elementary functions of a float stays a Python float
+
+        """
+        x = Node("x", 0.5, 1)
+
+        f = elementaries.logistic(elementaries.tanh(elementaries.sin(x) * elementaries.exp(x)))
+
+        expect(f.value).to(be_a(float))
+        expect(f.derivative).to(be_a(float))
+
+    def test_sqrt_of_zero_keeps_infinite_derivative(self):
+        """
+        Verify that a division by zero in the scalar path gives an infinite derivative, as with NumPy
+
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            f = elementaries.sqrt(Node("x", 0.0, 1))
+
+        expect(f.value).to(equal(0.0))
+        expect(f.derivative).to(equal(np.inf))
@@ -1,6 +1,6 @@
 import pytest
 
-from autodiff_team29 import Node
+from autodiff_team29 import Graph, Node
 
 
 @pytest.fixture(autouse=True, scope="function")
@@ -8,11 +8,27 @@ def teardown_module():
     """
     Once nodes are created, they will persist in the registry throughout the duration of the programs' execution, unless
     the registry is cleared. To prevent precomputed nodes persisting between test, we can clear the registry before and
-    after each test unit test runs. We will also make sure that overwrite mode is off by default
+    after each test unit test runs. We will also make sure that overwrite mode is off and the registry holds strong
+    references and is unbounded by default, with its usage stats reset and not collected, domain violations raised and
+    no dtype policy
 
     """
+    Graph.set_concurrency_mode(None)
     Node.clear_node_registry()
     Node.set_overwrite_mode(False)
+    Node.set_weak_registry(False)
+    Node.set_registry_size_limit(None)
+    Node.reset_registry_stats()
+    Node.set_registry_stats(False)
+    Node.set_domain_policy("raise")
+    Node.set_dtype(None)
     yield
+    Graph.set_concurrency_mode(None)
     Node.clear_node_registry()
     Node.set_overwrite_mode(False)
+    Node.set_weak_registry(False)
+    Node.set_registry_size_limit(None)
+    Node.reset_registry_stats()
+    Node.set_registry_stats(False)
+    Node.set_domain_policy("raise")
+    Node.set_dtype(None)
@@ -0,0 +1,174 @@
+import pytest
+from expects import expect, equal
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from autodiff_team29 import Node
+from autodiff_team29.forward import jacobian, jvp
+import autodiff_team29.elementaries as E
+
+
+def _vector_function(x):
+    """
+    f(x) = [x1x2 + sin(x1), x1 + x2 + sin(x1x2)], the function of the vector function tests
+
+    """
+    return [x[0] * x[1] + E.sin(x[0]), x[0] + x[1] + E.sin(x[0] * x[1])]
+
+
+def _dense_jacobian(function, point):
+    """
+    Computes the Jacobian by seeding every input with a vector as long as the number of inputs
+
+    """
+    directions = np.eye(len(point))
+    inputs = [
+        Node(f"x{i + 1}", value, 1, seed_vector=directions[i])
+        for i, value in enumerate(point)
+    ]
+    return np.array([output.derivative for output in function(inputs)])
+
+
+class TestChunkedJacobian:
+    """
+    Test that the Jacobian assembled from chunks of seed directions matches dense seeding.
+
+    """
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 64])
+    def test_jacobian_of_vector_function(self, chunk_size):
+        """
+        Verify the Jacobian of f(x) = [x1x2 + sin(x1), x1 + x2 + sin(x1x2)] for any chunk size
+
+        """
+        x1, x2 = np.pi, np.pi / 2
+        expected = np.array(
+            [
+                [x2 + np.cos(x1), x1],
+                [1 + x2 * np.cos(x1 * x2), 1 + x1 * np.cos(x1 * x2)],
+            ]
+        )
+
+        assert_array_almost_equal(
+            jacobian(_vector_function, [x1, x2], chunk_size=chunk_size), expected
+        )
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 7, 50])
+    def test_chunks_match_dense_seeding(self, chunk_size):
+        """
+        Verify that chunks that do not divide the number of inputs assemble the same Jacobian as dense seeding
+
+        """
+
+        def function(x):
+            return [
+                sum(x[i] * E.exp(x[i + 1]) for i in range(len(x) - 1)),
+                x[0] * E.sin(x[-1]),
+                E.sqrt(x[5]) / x[2],
+            ]
+
+        point = np.linspace(0.5, 1.5, 20)
+
+        assert_array_almost_equal(
+            jacobian(function, point, chunk_size=chunk_size),
+            _dense_jacobian(function, point),
+        )
+
+    def test_scalar_function_returns_gradient(self):
+        """
+        Verify that a function returning a single node has a gradient of shape (n,)
+
+        """
+        gradient = jacobian(lambda x: x[0] * x[2], [2.0, 5.0, 3.0], chunk_size=2)
+
+        expect(gradient.shape).to(equal((3,)))
+        assert_array_almost_equal(gradient, [3.0, 0.0, 2.0])
+
+    def test_constant_outputs_have_zero_derivative(self):
+        """
+        Verify that outputs that do not depend on any input have a zero row
+
+        """
+        result = jacobian(lambda x: [x[0] * 2, 7.0], [1.0, 2.0], chunk_size=1)
+
+        assert_array_almost_equal(result, [[2.0, 0.0], [0.0, 0.0]])
+
+    def test_passes_do_not_leave_nodes_in_registry(self):
+        """
+        Verify that the nodes of every pass are released instead of accumulating in the active graph
+
+        """
+        jacobian(_vector_function, [1.0, 2.0], chunk_size=1)
+
+        expect(Node.count_nodes_stored()).to(equal(0))
+
+    def test_custom_symbols(self):
+        """
+        Verify that inputs are created with the symbols given
+
+        """
+        seen = []
+        jacobian(lambda x: seen.extend(x) or x[0], [1.0, 2.0], symbols=["a", "b"])
+
+        expect([node.symbol for node in seen]).to(equal(["a", "b"]))
+
+    @pytest.mark.parametrize("chunk_size", [0, -1, 1.5])
+    def test_invalid_chunk_size_raises_value_error(self, chunk_size):
+        """
+        Verify that the chunk size must be a positive integer
+
+        """
+        with pytest.raises(ValueError):
+            jacobian(_vector_function, [1.0, 2.0], chunk_size=chunk_size)
+
+    def test_mismatched_symbols_raise_value_error(self):
+        """
+        Verify that one symbol must be given per input
+
+        """
+        with pytest.raises(ValueError):
+            jacobian(_vector_function, [1.0, 2.0], symbols=["a"])
+
+
+class TestJacobianVectorProduct:
+    """
+    Test that Jacobian vector products match the product with the assembled Jacobian.
+
+    """
+
+    @pytest.mark.parametrize("direction", [[1.0, 0.0], [0.5, -2.0], [0.0, 0.0]])
+    def test_product_with_jacobian(self, direction):
+        """
+        Verify J v for arbitrary directions, including the zero vector
+
+        """
+        point = [np.pi, np.pi / 2]
+
+        assert_array_almost_equal(
+            jvp(_vector_function, point, direction),
+            jacobian(_vector_function, point) @ np.array(direction),
+        )
+
+    def test_scalar_function(self):
+        """
+        Verify that the product for a scalar function is its directional derivative
+
+        """
+        product = jvp(lambda x: x[0] * x[1], [2.0, 3.0], [1.0, -1.0])
+
+        expect(product).to(equal(1.0))
+
+    def test_constant_output(self):
+        """
+        Verify that outputs that do not depend on the inputs have a zero product
+
+        """
+        assert_array_almost_equal(jvp(lambda x: [x[0], 2.0], [1.0], [3.0]), [3.0, 0.0])
+
+    def test_mismatched_direction(self):
+        """
+        Verify that a direction that does not match the point raises ValueError
+
+        """
+        with pytest.raises(ValueError):
+            jvp(_vector_function, [1.0, 2.0], [1.0, 2.0, 3.0])
@@ -0,0 +1,284 @@
+import threading
+
+import pytest
+from expects import expect, equal, be, be_true, be_false, be_a
+
+from autodiff_team29.graph import Graph
+from autodiff_team29.node import Node
+from autodiff_team29.registry import LRURegistry, StripedRegistry, UnboundedRegistry
+from autodiff_team29.elementaries import sqrt
+
+
+class TestGraphScope:
+    """
+    Test that graphs entered as context managers own their registry, settings and counters.
+
+    """
+
+    def test_nodes_are_stored_in_active_graph(self):
+        """
+        Verify that nodes created inside a graph scope do not leak into the default graph
+
+        """
+        with Graph() as graph:
+            x = Node("x", 4, 1)
+            y = sqrt(x)
+
+            expect(Graph.current()).to(be(graph))
+            expect(Node.count_nodes_stored()).to(equal(2))
+
+        expect(graph.count_nodes_stored()).to(equal(2))
+        expect(Node.count_nodes_stored()).to(equal(0))
+
+    def test_exiting_graph_restores_previous_graph(self):
+        """
+        Verify that nested graphs restore the enclosing graph once exited
+
+        """
+        default = Graph.current()
+
+        with Graph() as outer:
+            with Graph() as inner:
+                expect(Graph.current()).to(be(inner))
+            expect(Graph.current()).to(be(outer))
+
+        expect(Graph.current()).to(be(default))
+
+    def test_independent_graphs_do_not_share_cache(self):
+        """
+        Verify that the same computation in two graphs produces two distinct nodes
+
+        """
+        with Graph():
+            first = Node("x", 4, 1) * 2
+
+        with Graph():
+            second = Node("x", 4, 1) * 2
+
+        expect(second).not_to(be(first))
+        expect(second.value).to(equal(first.value))
+
+    def test_overwrite_mode_is_scoped_to_graph(self):
+        """
+        Verify that enabling overwrite mode in one graph leaves the default graph untouched
+
+        """
+        with Graph(overwrite_mode=True) as graph:
+            Node("x", 1, 1)
+            expect(graph.count_nodes_stored()).to(equal(0))
+            expect(graph.overwrite_mode).to(be_true)
+
+        expect(Graph.current().overwrite_mode).to(be_false)
+
+    def test_nodes_computed_counts_recomputed_nodes(self):
+        """
+        Verify that each graph counts its own computed nodes, including recomputations in overwrite mode
+
+        """
+        with Graph(overwrite_mode=True) as recomputing:
+            x = Node("x", 16, 1)
+            sqrt(x) + sqrt(x)
+
+        with Graph() as caching:
+            x = Node("x", 16, 1)
+            sqrt(x) + sqrt(x)
+
+        expect(recomputing.nodes_computed).to(equal(4))
+        expect(caching.nodes_computed).to(equal(3))
+
+    def test_graph_registry_options(self):
+        """
+        Verify that size limits and weak references can be configured per graph
+
+        """
+        expect(Graph(max_size=5).registry.max_size).to(equal(5))
+        expect(Graph(weak_references=True).is_weak_registry()).to(be_true)
+
+        with pytest.raises(ValueError):
+            Graph(max_size=5, weak_references=True)
+
+    def test_size_limit_survives_weak_registry_toggle(self):
+        """
+        Verify that a bounded registry is bounded again after switching to weak references and back
+
+        """
+        with Graph(max_size=2) as graph:
+            graph.set_weak_registry(True)
+            graph.set_weak_registry(False)
+            x = Node("x", 4, 1)
+            sqrt(sqrt(sqrt(x)))
+
+        expect(graph.registry.max_size).to(equal(2))
+        expect(graph.count_nodes_stored()).to(equal(2))
+
+    def test_size_limit_can_be_set_and_removed(self):
+        """
+        Verify that an unbounded registry is replaced by a bounded one when a size limit is set, and back
+
+        """
+        with Graph() as graph:
+            x = Node("x", 4, 1)
+            sqrt(sqrt(x))
+            expect(graph.registry).to(be_a(UnboundedRegistry))
+
+            graph.set_registry_size_limit(2)
+            expect(graph.registry).to(be_a(LRURegistry))
+            expect(graph.count_nodes_stored()).to(equal(2))
+
+            graph.set_registry_size_limit(None)
+            sqrt(sqrt(sqrt(x)))
+            expect(graph.registry).to(be_a(UnboundedRegistry))
+            expect(graph.count_nodes_stored()).to(equal(3))
+
+    def test_domain_policy_is_scoped_to_graph(self):
+        """
+        Verify that the domain policy of a graph applies to nodes created in it only
+
+        """
+        with Graph(domain_policy="mask") as graph:
+            expect(sqrt(Node("x", -1.0, 1)).valid).to(be_false)
+            expect(graph.domain_policy).to(equal("mask"))
+
+        expect(Graph.current().domain_policy).to(equal("raise"))
+        with pytest.raises(ValueError):
+            Graph(domain_policy="ignore")
+
+    def test_changing_domain_policy_clears_registry(self):
+        """
+        Verify that nodes computed under one domain policy are not reused under another
+
+        """
+        with Graph(domain_policy="mask") as graph:
+            x = Node("x", -1.0, 1)
+            sqrt(x)
+            graph.domain_policy = "raise"
+
+            expect(graph.count_nodes_stored()).to(equal(0))
+            with pytest.raises(ValueError):
+                sqrt(x)
+
+    def test_graphs_must_be_exited_in_reverse_order(self):
+        """
+        Verify that exiting a graph that is not the active one raises an error
+
+        """
+        outer = Graph().__enter__()
+        inner = Graph().__enter__()
+
+        with pytest.raises(RuntimeError):
+            outer.__exit__(None, None, None)
+
+        inner.__exit__(None, None, None)
+        outer.__exit__(None, None, None)
+
+
+def _run_in_thread(function):
+    """
+    Runs function in a separate thread and returns its result
+
+    """
+    result = []
+    thread = threading.Thread(target=lambda: result.append(function()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+class TestConcurrencyModes:
+    """
+    Test how the default graph is shared between threads in each concurrency mode.
+
+    """
+
+    def test_entered_graphs_are_private_to_thread(self):
+        """
+        Verify that entering a graph in one thread does not change the active graph of another thread
+
+        """
+        with Graph() as graph:
+            other_thread_graph = _run_in_thread(Graph.current)
+
+        expect(other_thread_graph).not_to(be(graph))
+
+    def test_default_graph_is_shared_without_concurrency_mode(self):
+        """
+        Verify that all threads share the default graph by default
+
+        """
+        expect(_run_in_thread(Graph.current)).to(be(Graph.current()))
+
+    def test_thread_local_mode_gives_each_thread_its_own_graph(self):
+        """
+        Verify that nodes created in one thread are not visible to another thread in thread local mode
+
+        """
+        Graph.set_concurrency_mode("thread_local")
+        x = Node("x", 1, 1)
+
+        other_thread_count = _run_in_thread(Node.count_nodes_stored)
+
+        expect(_run_in_thread(Graph.current)).not_to(be(Graph.current()))
+        expect(Node.count_nodes_stored()).to(equal(1))
+        expect(other_thread_count).to(equal(0))
+
+    def test_changing_mode_resets_default_graphs_of_running_threads(self):
+        """
+        Verify that a thread still running when the concurrency mode changes does not keep its former
+        thread local default graph
+
+        """
+        Graph.set_concurrency_mode("thread_local")
+        created = threading.Event()
+        mode_changed = threading.Event()
+        graphs = []
+
+        def worker():
+            Node("x", 1, 1)
+            graphs.append(Graph.current())
+            created.set()
+            mode_changed.wait()
+            graphs.append(Graph.current())
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        created.wait()
+        Graph.set_concurrency_mode(None)
+        Graph.set_concurrency_mode("thread_local")
+        mode_changed.set()
+        thread.join()
+
+        expect(graphs[1]).not_to(be(graphs[0]))
+        expect(graphs[1].count_nodes_stored()).to(equal(0))
+
+    def test_shared_mode_reuses_nodes_across_threads(self):
+        """
+        Verify that a node created in one thread is reused by another thread in shared mode
+
+        """
+        Graph.set_concurrency_mode("shared")
+        x = Node("x", 1, 1)
+
+        expect(Graph.current().registry).to(be_a(StripedRegistry))
+        expect(_run_in_thread(lambda: Node("x", 1, 1))).to(be(x))
+
+    def test_unsupported_concurrency_mode_raises_value_error(self):
+        """
+        Verify that only the documented concurrency modes are accepted
+
+        """
+        with pytest.raises(ValueError):
+            Graph.set_concurrency_mode("process_local")
+
+    def test_thread_safe_graph_options(self):
+        """
+        Verify that thread safe graphs can neither be bounded nor hold weak references
+
+        """
+        with pytest.raises(ValueError):
+            Graph(max_size=10, thread_safe=True)
+
+        with pytest.raises(ValueError):
+            Graph(weak_references=True, thread_safe=True)
+
+        with pytest.raises(ValueError):
+            Graph(thread_safe=True).set_weak_registry(True)
@@ -1,10 +1,14 @@
+import gc
 import warnings
 
 import pytest
-from expects import expect, equal, be, be_none, be_true, be_empty, have_key
+from expects import expect, equal, be, be_none, be_true, be_empty, be_above, have_key
 import numpy as np
 
-from autodiff_team29.node import Node
+from autodiff_team29.graph import Graph
+from autodiff_team29 import elementaries
+from autodiff_team29.node import Node, _ARRAY_FUNCTION_HANDLERS
+from autodiff_team29.elementaries import sqrt
 
 
 class TestNodeRegistry:
@@ -17,29 +21,29 @@ class TestNodeRegistry:
     def test_creating_new_symbol_appears_in_registry(self):
         """
         Verify that once a node is created, it can be found in the _NODE_REGISTRY
-        by looking for its symbolic representation
+        by looking for its symbolic representation and input point
 
         """
         x = Node("new_symbol", 100, 1)
 
-        expect(Node._NODE_REGISTRY).to(have_key("new_symbol"))
+        expect(Graph.current().registry).to(have_key(("new_symbol", (100, 1))))
 
     def test_clear_node_registry_removes_all_key_value_pairs(self):
         """
         Verify that Node.clear_registry() removes all keys from the _NODE_REGISTRY
 
         """
-        Node._NODE_REGISTRY = {"key": "value"}
+        Graph.current().registry["key"] = "value"
         Node.clear_node_registry()
 
-        expect(Node._NODE_REGISTRY).to(be_empty)
+        expect(Graph.current().registry).to(be_empty)
 
     def test_clear_node_registry_resets_count_of_nodes(self):
         """
         Verify that Node.clear_registry() removes all keys from the _NODE_REGISTRY
 
         """
-        Node._NODE_REGISTRY = {"key": "value"}
+        Graph.current().registry["key"] = "value"
         Node.clear_node_registry()
 
         expect(Node.count_nodes_stored()).to(be(0))
@@ -47,18 +51,18 @@ class TestNodeRegistry:
     def test_precomputed_nodes_can_be_retrieved(self):
         """
         Verify that once a node is created, the exact same instance can be retrieved
-        by looking for its symbolic representation
+        by looking for its symbolic representation and input point
 
         """
         x = Node("a", 50, 1)
-        retrieved_node = Node._get_existing_node("a")
+        retrieved_node = Node._lookup_node(("a", (50, 1)), Graph.current())
 
         expect(retrieved_node).to(be(x))
 
     def test_incrementing_node_count_while_overwrite_mode_is_false(self):
         """
         If overwrite mode is off, then we expect that each unique node
-        will increment the node count by one. Repeated symbols will not increment the count
+        will increment the node count by one. Repeated symbols at the same input point will not increment the count
 
         """
         # ensure overwrite mode is disabled
@@ -74,9 +78,13 @@ class TestNodeRegistry:
         expect(Node.count_nodes_stored()).to(equal(3))
 
         # repeat third symbol. count should not increment
-        x = Node("third", 4, 1)
+        x = Node("third", 3, 1)
         expect(Node.count_nodes_stored()).to(equal(3))
 
+        # repeat third symbol at a new input point. count should increment
+        x = Node("third", 4, 1)
+        expect(Node.count_nodes_stored()).to(equal(4))
+
     def test_incrementing_node_count_while_overwrite_mode_is_true(self):
         """ "
         If overwrite mode is on, then we expect the number of nodes stored to remain zero
@@ -99,6 +107,231 @@ class TestNodeRegistry:
         expect(Node.count_nodes_stored()).to(equal(0))
 
 
+    def test_registry_size_limit_bounds_number_of_nodes_stored(self):
+        """
+        If a size limit is set, the registry should never hold more nodes than the limit
+
+        """
+        Node.set_registry_size_limit(3)
+
+        for i in range(10):
+            Node(f"x{i}", i, 1)
+
+        expect(Node.count_nodes_stored()).to(equal(3))
+        expect(Node.get_registry_size_limit()).to(equal(3))
+
+    def test_registry_size_limit_keeps_recently_used_nodes(self):
+        """
+        Nodes that are retrieved from the registry should survive eviction,
+        while the least recently used node is dropped
+
+        """
+        Node.set_registry_size_limit(2)
+
+        x = Node("x", 1, 1)
+        y = Node("y", 2, 1)
+
+        # touch x so that y becomes the least recently used node
+        expect(Node("x", 1, 1)).to(be(x))
+        z = Node("z", 3, 1)
+
+        expect(Graph.current().registry).to(have_key(x._key))
+        expect(Graph.current().registry).to(have_key(z._key))
+        expect(Graph.current().registry).not_to(have_key(y._key))
+
+    def test_evicted_nodes_are_recomputed(self):
+        """
+        Once a node has been evicted, requesting the same computation creates a new node
+        with the same result
+
+        """
+        Node.set_registry_size_limit(1)
+
+        x = Node("x", 4, 1)
+        first = x * x
+        Node("other", 0, 0)
+        second = x * x
+
+        expect(second).not_to(be(first))
+        expect(second.value).to(equal(first.value))
+        expect(second.derivative).to(equal(first.derivative))
+
+    def test_weak_registry_reuses_live_nodes(self):
+        """
+        While a node is referenced, the weak registry should still return the existing instance
+
+        """
+        Node.set_weak_registry(True)
+
+        x = Node("x", 1, 1)
+        expect(Node("x", 1, 1)).to(be(x))
+        expect(Node.is_weak_registry()).to(be_true)
+
+    def test_weak_registry_releases_unreferenced_nodes(self):
+        """
+        Temporary graphs should be garbage collected once nothing references them
+
+        """
+        Node.set_weak_registry(True)
+
+        x = Node("x", 2, 1)
+        y = x * x
+        expect(Node.count_nodes_stored()).to(be_above(0))
+
+        del x, y
+        gc.collect()
+        expect(Node.count_nodes_stored()).to(equal(0))
+
+    def test_switching_registry_mode_keeps_stored_nodes(self):
+        """
+        Nodes stored before the registry mode is switched should still be retrievable afterwards
+
+        """
+        x = Node("x", 3, 1)
+
+        Node.set_weak_registry(True)
+        expect(Node("x", 3, 1)).to(be(x))
+
+        Node.set_weak_registry(False)
+        expect(Node("x", 3, 1)).to(be(x))
+
+    def test_size_limit_cannot_be_set_on_weak_registry(self):
+        """
+        Weak registries are bounded by the graphs that reference them, so a size limit is rejected
+
+        """
+        Node.set_weak_registry(True)
+
+        with pytest.raises(ValueError):
+            Node.set_registry_size_limit(10)
+
+    def test_same_symbol_at_new_input_point_is_a_new_node(self):
+        """
+        Creating a node whose symbol is already stored, but with a different value,
+        should not return the node computed at the previous input point
+
+        """
+        x_at_5 = Node("x", 5, 1)
+        x_at_10 = Node("x", 10, 1)
+
+        expect(x_at_10).not_to(be(x_at_5))
+        expect(x_at_10.value).to(equal(10))
+
+    def test_expressions_are_cached_per_input_point(self):
+        """
+        Expressions evaluated at several input points can share one registry. Returning to a previous
+        input point should reuse the nodes computed there, without clearing the registry in between
+
+        """
+        x = Node("x", 2, 1)
+        y = Node("y", 3, 1)
+        f_first_point = x * y + x
+
+        x = Node("x", 4, 1)
+        f_second_point = x * y + x
+        expect(f_second_point.value).to(equal(16))
+        expect(f_second_point.derivative).to(equal(8))
+
+        x = Node("x", 2, 1)
+        expect(x * y + x).to(be(f_first_point))
+
+    def test_seed_vector_is_part_of_input_point(self):
+        """
+        The same symbol and value seeded in a different direction is a different input point
+
+        """
+        x = Node("x", 1, 1, seed_vector=[1, 0])
+        y = Node("x", 1, 1, seed_vector=[0, 1])
+
+        expect(y).not_to(be(x))
+        expect(list(y.derivative)).to(equal([0, 1]))
+
+    def test_operation_keys_are_built_from_node_ids(self):
+        """
+        Nodes created by operations should be keyed on the operation and the ids of their operands,
+        so keys stay the same size however deep the expression is
+
+        """
+        x = Node("x", 2, 1)
+        y = Node("y", 3, 1)
+
+        expect((x * y)._key).to(equal(("*", *sorted([x._id, y._id]))))
+        expect((y * x)._key).to(equal((x * y)._key))
+        expect((x - y)._key).to(equal(("-", x._id, y._id)))
+
+        z = x
+        for _ in range(50):
+            z = sqrt(z)
+        expect(len(z._key)).to(equal(2))
+
+    def test_sums_are_canonicalized_regardless_of_grouping(self):
+        """
+        Sums of the same terms built in different orders should be stored as a single node
+
+        """
+        a = Node("a", 1, 1)
+        b = Node("b", 2, 0)
+        c = Node("c", 3, 0)
+
+        first = (a + b) + c
+        expect(a + (b + c)).to(be(first))
+        expect((c + a) + b).to(be(first))
+        expect(first.symbol).to(equal("(a+b+c)"))
+        expect(first.value).to(equal(6))
+        expect(first.derivative).to(equal(1))
+
+    def test_products_are_canonicalized_regardless_of_grouping(self):
+        """
+        Products of the same factors built in different orders should be stored as a single node
+
+        """
+        a = Node("a", 2, 1)
+        b = Node("b", 3, 0)
+        c = Node("c", 4, 0)
+
+        first = (a * b) * (c * a)
+        expect(a * (a * (b * c))).to(be(first))
+        expect(first.symbol).to(equal("(a*a*b*c)"))
+        expect(first.value).to(equal(48))
+        expect(first.derivative).to(equal(2 * 2 * 3 * 4))
+
+    def test_sums_and_products_are_not_flattened_into_each_other(self):
+        """
+        Only terms of the same operation should be flattened
+
+        """
+        a = Node("a", 2, 1)
+        b = Node("b", 3, 0)
+        c = Node("c", 4, 0)
+
+        expect((a * b + c).symbol).to(equal("((a*b)+c)"))
+        expect(((a + b) * c).symbol).to(equal("((a+b)*c)"))
+
+    def test_long_sums_are_flattened_up_to_a_limit(self):
+        """
+        Keys of long accumulations should not grow past the flattening limit
+
+        """
+        x = Node("x", 1, 1)
+        z = x
+        for _ in range(100):
+            z = z + x
+
+        expect(len(z._key)).to(be_above(2))
+        expect(len(z._key)).not_to(be_above(33))
+        expect(z.value).to(equal(101))
+
+    def test_node_ids_are_unique(self):
+        """
+        Every computed node should be given its own id
+
+        """
+        x = Node("x", 2, 1)
+        y = Node("y", 2, 1)
+        nodes = [x, y, x + y, x * y, x - y, y - x]
+
+        expect(len({node._id for node in nodes})).to(equal(len(nodes)))
+
 
 class TestNodeCreation:
     """
@@ -149,6 +382,32 @@ class TestNodeCreation:
         node = Node("d", 4, 2, seed_vector=[0, 1])
         expect(node.symbol).to(equal("d"))
 
+    def test_symbol_is_rendered_lazily(self):
+        """
+        The symbol of a computed node should only be rendered once it is read, and cached afterwards
+
+        """
+        x = Node("x", 2, 1)
+        y = Node("y", 3, 1)
+        z = sqrt(y * x) - x
+
+        expect(z._symbol).to(be_none)
+        expect(z.symbol).to(equal("(sqrt((x*y))-x)"))
+        expect((y * x)._symbol).to(equal("(x*y)"))
+        expect(str(z)).to(be(z.symbol))
+
+    def test_symbol_of_deep_expression_is_rendered_without_recursion(self):
+        """
+        Rendering the symbol of an expression deeper than the recursion limit should not raise an error
+
+        """
+        x = Node("x", 1, 1)
+        z = x
+        for _ in range(5000):
+            z = z + x
+
+        expect(z.symbol.count("x")).to(equal(5001))
+
     def test_derivative(self):
         """
         Testing the `derivative` @property method
@@ -160,7 +419,7 @@ class TestNodeCreation:
         node = Node("d", 4, 2, seed_vector=[0, 1])
         expect(all(node.derivative == np.array([0, 2]))).to(be_true)
 
-    @pytest.mark.parametrize("argument", [1, 1.0])
+    @pytest.mark.parametrize("argument", [1, 1.0, np.array([4, 5, 6])])
     def test_compatible_value_type_does_not_raise_error(self, argument):
         """
         Testing the method that checks if a datatype can be represented as a node.
@@ -178,7 +437,7 @@ class TestNodeCreation:
         """
         expect(Node._check_foreign_derivative_type_compatibility(argument)).to(be_none)
 
-    @pytest.mark.parametrize("argument", ["1", [1, 2, 3], np.array([4, 5, 6])])
+    @pytest.mark.parametrize("argument", ["1", [1, 2, 3]])
     def test_incompatible_value_type_does_raise_type_error(self, argument):
         """
         Check incompatible datatypes raise compatibility errors
@@ -210,7 +469,7 @@ class TestNodeCreation:
         expect(node.value).to(equal(value))
         expect(node.derivative).to(equal(0))
 
-    @pytest.mark.parametrize("value", ["1", [1, 2, 3], np.array([1, 2, 3])])
+    @pytest.mark.parametrize("value", ["1", [1, 2, 3]])
     def test_non_numeric_types_raises_type_error(self, value):
         """
         Verifies that attempting to convert a non-numeric type to a node raises TypeError
@@ -219,6 +478,17 @@ class TestNodeCreation:
         with pytest.raises(TypeError):
             Node._convert_numeric_type_to_node(value)
 
+    def test_nodes_have_no_instance_dictionary(self):
+        """
+        Nodes should be slotted, so a large graph does not pay for a dictionary per node
+
+        """
+        node = sqrt(Node("x", 4, 1))
+        expect(hasattr(node, "__dict__")).to(equal(False))
+
+        with pytest.raises(AttributeError):
+            node.label = "y"
+
 
 class TestNodeOperators:
     """
@@ -524,3 +794,445 @@ class TestNodeOperators:
         expect(repr(node2)).to(
             equal(f"Node({node2._symbol},{node2._value},{node2._derivative})")
         )
+
+
+class TestBatchedNodes:
+    """
+    Testing nodes whose values are arrays, evaluating a function at a batch of points at once.
+
+    """
+
+    @staticmethod
+    def _function(x, y):
+        return x * y + x / y - (x**2) * 3 + 2**y - y**x
+
+    def test_batched_values_and_derivatives_match_pointwise_evaluation(self):
+        """
+        Evaluating a batch of points should give the same values and derivatives as evaluating each point
+
+        """
+        xs = np.array([0.5, 1.0, 2.0, 3.0])
+        ys = np.array([1.5, 2.0, 0.5, 4.0])
+
+        batched = self._function(
+            Node("x", xs, 1, seed_vector=[1, 0]), Node("y", ys, 1, seed_vector=[0, 1])
+        )
+
+        expect(batched.value.shape).to(equal((4,)))
+        expect(batched.derivative.shape).to(equal((4, 2)))
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            pointwise = self._function(
+                Node("x", float(x), 1, seed_vector=[1, 0]),
+                Node("y", float(y), 1, seed_vector=[0, 1]),
+            )
+            np.testing.assert_allclose(batched.value[i], pointwise.value)
+            np.testing.assert_allclose(batched.derivative[i], pointwise.derivative)
+
+    def test_batch_without_seed_vector_has_elementwise_derivative(self):
+        """
+        A batch that is not seeded should be differentiated elementwise
+
+        """
+        x = Node("x", np.array([1.0, 2.0, 3.0]), 1)
+        f = x * x + 1
+
+        np.testing.assert_allclose(f.value, [2, 5, 10])
+        np.testing.assert_allclose(f.derivative, [2, 4, 6])
+
+    def test_batches_are_cached_per_content(self):
+        """
+        Batches with the same points should share a node, and batches with different points should not
+
+        """
+        x = Node("x", np.array([1.0, 2.0]), 1)
+
+        expect(Node("x", np.array([1.0, 2.0]), 1)).to(be(x))
+        expect(Node("x", np.array([1.0, 3.0]), 1)).not_to(be(x))
+
+    def test_batch_fingerprints_have_a_fixed_size(self):
+        """
+        Fingerprints of batches should not hold a copy of the batch, and should match for views with the
+        same content
+
+        """
+        values = np.arange(100_000.0)
+        value_fingerprint, derivative_fingerprint = Node._fingerprint(values, np.ones(100_000))
+
+        expect(len(value_fingerprint[2])).to(equal(16))
+        expect(len(derivative_fingerprint[2])).to(equal(16))
+        expect(Node._fingerprint(values[::2].copy(), 1)).to(equal(Node._fingerprint(values[::2], 1)))
+        expect(Node._fingerprint(values[::2], 1)).not_to(equal(Node._fingerprint(values[1::2], 1)))
+
+    def test_constant_terms_keep_batched_derivative_shape(self):
+        """
+        Adding or multiplying by constants should not change the shape of a seeded batch derivative
+
+        """
+        x = Node("x", np.array([1.0, 2.0, 3.0]), 1, seed_vector=[1, 0])
+        f = 2 * x + 3 - 1 / (x + 1)
+
+        expect(f.derivative.shape).to(equal((3, 2)))
+        np.testing.assert_allclose(f.derivative[:, 0], 2 + 1 / (np.array([2, 3, 4]) ** 2))
+        np.testing.assert_allclose(f.derivative[:, 1], 0)
+
+    def test_quotient_of_constant_batches_is_constant(self):
+        """
+        Dividing batches that are not seeded should give the scalar 0 derivative of a constant, which can be
+        added to a seeded batch derivative
+
+        """
+        x = Node("x", np.array([1.0, 2.0, 3.0]), 1, seed_vector=[1, 0])
+        c = Node("c", np.array([4.0, 5.0, 6.0]), 0)
+        quotient = c / (c + 1)
+
+        expect(quotient.derivative).to(equal(0))
+        expect((x + quotient).derivative.shape).to(equal((3, 2)))
+
+    @pytest.mark.parametrize("seed_vector", [[1, 0, 0], [1, 0]])
+    def test_seeded_scalar_with_batch_operand(self, seed_vector):
+        """
+        Adding, subtracting or negating a seeded scalar and a batch should give one derivative per point
+        and seed direction, whatever the number of directions
+
+        """
+        x = Node("x", 2.0, 1, seed_vector=seed_vector)
+        batch = np.array([1.0, 2.0, 3.0])
+        y = x + batch
+        z = -(batch - x)
+
+        expect(y.derivative.shape).to(equal((3, len(seed_vector))))
+        np.testing.assert_allclose((y * y).derivative[:, 0], [6, 8, 10])
+        np.testing.assert_allclose((y * y).derivative[:, 1], 0)
+        np.testing.assert_allclose(z.derivative, y.derivative)
+
+
+class TestNumpyDispatch:
+    """
+    Testing that NumPy ufuncs and functions can be applied to nodes.
+
+    """
+
+    @pytest.mark.parametrize(
+        "ufunc, name",
+        [
+            (np.sqrt, "sqrt"),
+            (np.exp, "exp"),
+            (np.log, "ln"),
+            (np.sin, "sin"),
+            (np.cos, "cos"),
+            (np.tan, "tan"),
+            (np.arcsin, "arcsin"),
+            (np.arccos, "arccos"),
+            (np.arctan, "arctan"),
+            (np.sinh, "sinh"),
+            (np.cosh, "cosh"),
+            (np.tanh, "tanh"),
+        ],
+    )
+    def test_ufuncs_route_to_elementaries(self, ufunc, name):
+        """
+        Applying a ufunc to a node should return the node computed by the matching elementary function
+
+        """
+        x = Node("x", 0.5, 1)
+        expect(ufunc(x)).to(be(getattr(elementaries, name)(x)))
+
+    def test_arithmetic_ufuncs_route_to_operators(self):
+        """
+        Arithmetic ufuncs should return the same nodes as the matching operators
+
+        """
+        x = Node("x", 2, 1)
+        y = Node("y", 3, 1)
+
+        expect(np.add(x, y)).to(be(x + y))
+        expect(np.subtract(x, 1)).to(be(x - 1))
+        expect(np.multiply(2, x)).to(be(2 * x))
+        expect(np.divide(x, y)).to(be(x / y))
+        expect(np.power(x, 2)).to(be(x**2))
+        expect(np.negative(x)).to(be(-x))
+        expect(np.float64(2.0) * x).to(be(2.0 * x))
+        expect((np.int64(2) * x).value).to(equal(4))
+
+    def test_logarithms_with_other_bases(self):
+        """
+        np.log2 and np.log10 should be logarithms with base 2 and 10
+
+        """
+        x = Node("x", 8, 1)
+
+        expect(np.log2(x).value).to(equal(3))
+        expect(np.log10(x).symbol).to(equal("log10(x)"))
+
+    def test_ufuncs_vectorize_over_object_arrays(self):
+        """
+        Ufuncs applied to object arrays of nodes should be applied to every node
+
+        """
+        x = Node("x", 0.5, 1, seed_vector=[1, 0])
+        y = Node("y", 2.0, 1, seed_vector=[0, 1])
+        nodes = np.array([x, y], dtype=object)
+
+        result = np.sin(nodes) * x
+
+        expect(result[0]).to(be(elementaries.sin(x) * x))
+        expect(result[1]).to(be(elementaries.sin(y) * x))
+        expect(np.sum(nodes)).to(be(x + y))
+
+    def test_operators_apply_to_each_node_of_object_arrays(self):
+        """
+        Operators between a node and an object array of nodes should be applied to every element, keeping
+        the derivative of each element
+
+        """
+        x = Node("x", 0.5, 1, seed_vector=[1, 0])
+        y = Node("y", 2.0, 1, seed_vector=[0, 1])
+        nodes = np.array([x, y], dtype=object)
+
+        result = x + nodes
+
+        expect(result.dtype).to(equal(object))
+        expect(result[1]).to(be(x + y))
+        np.testing.assert_array_equal(result[0].derivative, [2, 0])
+        np.testing.assert_array_equal(result[1].derivative, [1, 1])
+        np.testing.assert_array_equal((x * nodes)[1].derivative, [2.0, 0.5])
+
+    @pytest.mark.parametrize(
+        "array", [np.array([1.0, 2.0], dtype=object), np.array(["1.0", "2.0"])]
+    )
+    def test_non_numeric_arrays_cannot_be_node_values(self, array):
+        """
+        Object and string arrays should be rejected as values rather than stored in a single node
+
+        """
+        with pytest.raises(TypeError):
+            Node("x", array, 1)
+
+        with pytest.raises(TypeError):
+            elementaries.sin(array)
+
+    def test_ufuncs_apply_to_batched_nodes(self):
+        """
+        Ufuncs applied to a batched node should evaluate the whole batch
+
+        """
+        x = Node("x", np.array([0.0, 1.0]), 1)
+        f = np.exp(x) + np.array([1.0, 2.0])
+
+        np.testing.assert_allclose(f.value, np.exp([0.0, 1.0]) + [1.0, 2.0])
+        np.testing.assert_allclose(f.derivative, np.exp([0.0, 1.0]))
+
+    def test_unsupported_ufunc_raises_type_error(self):
+        """
+        Ufuncs without a matching operation on nodes should raise a TypeError
+
+        """
+        with pytest.raises(TypeError):
+            np.floor(Node("x", 1.5, 1))
+
+    def test_registered_array_functions_are_routed(self):
+        """
+        NumPy functions registered for nodes should be routed to their implementation
+
+        """
+        x = Node("x", 2, 1)
+        Node.register_array_function(np.clip, lambda node, low, high: node)
+        try:
+            expect(np.clip(x, 0, 1)).to(be(x))
+        finally:
+            _ARRAY_FUNCTION_HANDLERS.pop(np.clip)
+
+
+    def test_unregistered_array_functions_raise_type_error(self):
+        """
+        NumPy functions without an implementation for nodes should raise a TypeError rather than treat
+        the node as an array
+
+        """
+        with pytest.raises(TypeError):
+            np.linalg.norm(Node("x", np.array([3.0, 4.0]), 1))
+
+    def test_reductions_keep_dims(self):
+        """
+        np.sum and np.mean should support keepdims on nodes
+
+        """
+        x = Node("x", np.arange(6.0).reshape(2, 3), 1)
+
+        total = np.sum(x, keepdims=True)
+        rows = np.mean(x, axis=1, keepdims=True)
+
+        expect(total.value.shape).to(equal((1, 1)))
+        expect(total.symbol).to(equal("sum(x, keepdims=True)"))
+        np.testing.assert_allclose(rows.value, [[1.0], [4.0]])
+        np.testing.assert_allclose(rows.derivative, [[1.0], [1.0]])
+        expect(np.sum(x, axis=1)).not_to(be(np.sum(x, axis=1, keepdims=True)))
+
+
+class TestTensorNodes:
+    """
+    Testing nodes whose values are vectors or matrices, seeded with one direction per input element.
+
+    """
+
+    def test_quadratic_form_gradient(self):
+        """
+        The gradient of x @ A @ x should be (A + A.T) @ x
+
+        """
+        A = np.array([[2.0, 1.0], [0.0, 3.0]])
+        x = Node("x", np.array([1.0, 2.0]), np.eye(2))
+
+        f = x @ (A @ x)
+
+        expect(f.value).to(equal(16.0))
+        np.testing.assert_allclose(f.derivative, (A + A.T) @ x.value)
+
+    def test_matrix_product_derivative(self):
+        """
+        Each seed direction of a matrix product should follow the product rule
+
+        """
+        a = np.array([[1.0, 2.0], [3.0, 4.0]])
+        b = np.array([[0.5, -1.0], [2.0, 1.0]])
+        rng = np.random.default_rng(0)
+        left_directions = rng.normal(size=(2, 2, 3))
+        right_directions = rng.normal(size=(2, 2, 3))
+
+        f = Node("A", a, left_directions) @ Node("B", b, right_directions)
+
+        expect(f.derivative.shape).to(equal((2, 2, 3)))
+        for k in range(3):
+            np.testing.assert_allclose(
+                f.derivative[..., k], left_directions[..., k] @ b + a @ right_directions[..., k]
+            )
+
+    def test_matrix_vector_products_with_constants(self):
+        """
+        Multiplying by constant arrays on either side should only propagate the derivative of the node
+
+        """
+        W = np.array([[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]])
+        x = Node("x", np.array([1.0, -1.0]), np.eye(2))
+
+        np.testing.assert_allclose((W @ x).derivative, W)
+        np.testing.assert_allclose((np.array([1.0, 1.0, 1.0]) @ (W @ x)).derivative, W.sum(axis=0))
+        expect(np.matmul(W, x)).to(be(W @ x))
+
+    def test_scalar_times_vector_broadcasts_seed_directions(self):
+        """
+        A seeded scalar multiplying a vector should contribute along every element of the vector
+
+        """
+        s = Node("s", 2.0, 1, seed_vector=[1, 0])
+        v = Node("v", np.array([1.0, 2.0, 3.0]), 0)
+
+        f = s * v + s
+
+        expect(f.derivative.shape).to(equal((3, 2)))
+        np.testing.assert_allclose(f.derivative[:, 0], [2.0, 3.0, 4.0])
+
+
+class TestDtypePolicy:
+    """
+    Testing that values and derivatives are stored in the floating point type selected for the graph.
+
+    """
+
+    def test_leaves_and_seed_vectors_are_cast(self):
+        """
+        Values, derivatives and seed vectors of input nodes should be stored in the selected dtype
+
+        """
+        Node.set_dtype(np.float32)
+
+        x = Node("x", np.array([1.0, 2.0]), 1, seed_vector=[1, 0])
+        y = Node("y", 3, 1)
+
+        expect(x.value.dtype).to(equal(np.float32))
+        expect(x.derivative.dtype).to(equal(np.float32))
+        expect(type(y.value)).to(equal(np.float32))
+        expect(Node.get_dtype()).to(equal(np.float32))
+
+    def test_operations_and_constants_keep_dtype(self):
+        """
+        Results of operators, elementary functions and numeric constants should be stored in the selected dtype
+
+        """
+        Node.set_dtype("float32")
+        x = Node("x", np.array([1.0, 2.0]), 1, seed_vector=[1, 0])
+        y = Node("y", 2.0, 1, seed_vector=[0, 1])
+
+        f = elementaries.exp(x) * y / 3 - x**2.5 + elementaries.log(y, 10)
+
+        expect(f.value.dtype).to(equal(np.float32))
+        expect(f.derivative.dtype).to(equal(np.float32))
+        np.testing.assert_allclose(
+            f.value, np.exp([1.0, 2.0]) * 2 / 3 - np.array([1.0, 2.0]) ** 2.5 + np.log10(2), rtol=1e-6
+        )
+
+    def test_reductions_accumulate_in_float64(self):
+        """
+        Sums of float32 values should accumulate in float64 before being stored as float32
+
+        """
+        values = np.full(1_000_000, 0.1, dtype=np.float32)
+
+        with Graph(dtype=np.float32):
+            total = elementaries.sum(Node("x", values, 1))
+
+        expect(total.value.dtype).to(equal(np.float32))
+        expect(total.value).to(equal(np.float32(values.astype(np.float64).sum())))
+
+    def test_nodes_of_different_dtypes_are_distinct(self):
+        """
+        The same input point should be stored as separate nodes under different dtypes
+
+        """
+        double = Node("x", 0.1, 1)
+        Node.set_dtype(np.float32)
+        single = Node("x", 0.1, 1)
+
+        expect(single).not_to(be(double))
+
+    def test_cast_leaves_are_reused(self):
+        """
+        An input point created twice under a dtype should be cast once and reused from the registry
+
+        """
+        with Graph(dtype=np.float32) as graph:
+            x = Node("x", np.array([1.0, 2.0]), 1)
+
+            expect(Node("x", np.array([1.0, 2.0]), 1)).to(be(x))
+            expect(graph.nodes_computed).to(equal(1))
+
+    def test_changing_dtype_recomputes_cached_leaves(self):
+        """
+        A leaf cached before the dtype changed should not be returned in its previous dtype
+
+        """
+        with Graph() as graph:
+            Node("x", 2.0, 1)
+            graph.dtype = np.float32
+
+            expect(graph.count_nodes_stored()).to(equal(0))
+            expect(type(Node("x", 2.0, 1).value)).to(equal(np.float32))
+
+    def test_numpy_scalars_are_fingerprinted_with_their_dtype(self):
+        """
+        Scalars that compare equal in different dtypes should have different fingerprints
+
+        """
+        expect(Node._fingerprint(np.float32(2.0), 1)).not_to(equal(Node._fingerprint(2.0, 1)))
+        expect(Node._fingerprint(2.0, np.float32(1))).not_to(equal(Node._fingerprint(2.0, 1)))
+
+    def test_non_floating_dtype_raises_value_error(self):
+        """
+        Only floating point dtypes should be accepted
+
+        """
+        with pytest.raises(ValueError):
+            Node.set_dtype(np.int32)
+
+        with pytest.raises(ValueError):
+            Graph(dtype="complex128")
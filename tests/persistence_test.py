@@ -0,0 +1,276 @@
+import pickle
+import sqlite3
+
+import numpy as np
+import pytest
+from expects import expect, equal, be, be_none, be_true
+
+from autodiff_team29 import Graph, Node, PersistentCache, elementaries
+from autodiff_team29 import persistence
+from autodiff_team29.elementaries import sqrt, sin, log
+
+
+def _cache(path):
+    """
+    Returns a cache that stores every node, so small expressions exercise it
+
+    """
+    return PersistentCache(path, min_work_per_entry=0)
+
+
+def _compute(x, y):
+    return sin(x) * y + log(x, 10) - sqrt(y)
+
+
+class TestPersistentCache:
+    """
+    Test that nodes written to disk by one graph are restored by another one, as after a restart.
+
+    """
+
+    def test_restored_nodes_match_computed_nodes(self, tmp_path):
+        """
+        Verify that an expression restored from disk has the same symbol, value and derivative
+
+        """
+        path = tmp_path / "nodes.sqlite"
+        cache = _cache(path)
+        with Graph(persistent_cache=cache):
+            computed = _compute(Node("x", 2, 1), Node("y", 3, 1))
+        cache.close()
+
+        with Graph(persistent_cache=_cache(path), collect_stats=True) as graph:
+            restored = _compute(Node("x", 2, 1), Node("y", 3, 1))
+
+        # sin, *, log, +, sqrt and - are restored once each, only x, y and the base of log are created
+        expect(graph.stats.restores).to(equal(6))
+        expect(graph.stats.hits).to(equal(0))
+        expect(graph.stats.inserts).to(equal(3))
+        expect(graph.nodes_computed).to(equal(3))
+        expect(restored.symbol).to(equal(computed.symbol))
+        expect(restored.value).to(equal(computed.value))
+        expect(restored.derivative).to(equal(computed.derivative))
+
+    def test_nodes_are_restored_instead_of_recomputed(self, tmp_path):
+        """
+        Verify that a restored node takes its value from disk rather than recomputing it
+
+        """
+        path = tmp_path / "nodes.sqlite"
+        cache = _cache(path)
+        with Graph(persistent_cache=cache):
+            x = Node("x", 4, 1)
+            y = sqrt(x)
+        cache.close()
+
+        # tamper with the stored node to tell restored values from recomputed ones
+        with sqlite3.connect(path) as connection:
+            connection.execute(
+                "UPDATE nodes SET record = ? WHERE digest = ?",
+                (pickle.dumps(("sqrt({})", 100, 100)), cache.digest(y)),
+            )
+        connection.close()
+
+        with Graph(persistent_cache=_cache(path)):
+            restored = sqrt(Node("x", 4, 1))
+
+        expect(restored.value).to(equal(100))
+        expect(restored.symbol).to(equal("sqrt(x)"))
+
+    def test_restores_depend_on_input_point(self, tmp_path):
+        """
+        Verify that an expression stored at one input point is not restored at another one
+
+        """
+        path = tmp_path / "nodes.sqlite"
+        cache = _cache(path)
+        with Graph(persistent_cache=cache):
+            sqrt(Node("x", 4, 1))
+        cache.close()
+
+        with Graph(persistent_cache=_cache(path), collect_stats=True) as graph:
+            y = sqrt(Node("x", 9, 1))
+
+        expect(graph.stats.restores).to(equal(0))
+        expect(y.value).to(equal(3))
+
+    def test_commutative_operands_share_a_digest(self, tmp_path):
+        """
+        Verify that sums and products are stored regardless of the order of their operands
+
+        """
+        cache = _cache(tmp_path / "nodes.sqlite")
+        with Graph(persistent_cache=cache):
+            x = Node("x", 2, 1)
+            y = Node("y", 3, 1)
+            product = x * y
+
+        with Graph(persistent_cache=cache):
+            x = Node("x", 2, 1)
+            y = Node("y", 3, 1)
+            difference = x - y
+            expect(cache.digest(y * x)).to(equal(cache.digest(product)))
+            expect(cache.digest(y - x)).not_to(equal(cache.digest(difference)))
+
+    def test_input_nodes_are_not_written(self, tmp_path):
+        """
+        Verify that only nodes computed by operations are written to disk
+
+        """
+        cache = _cache(tmp_path / "nodes.sqlite")
+        with Graph(persistent_cache=cache):
+            x = Node("x", 2, 1, seed_vector=np.array([1, 0]))
+            x * x
+
+        expect(len(cache)).to(equal(1))
+        cache.close()
+
+    def test_setting_cache_writes_stored_nodes(self, tmp_path):
+        """
+        Verify that nodes already in the registry are written once a persistent cache is set
+
+        """
+        x = Node("x", 2, 1)
+        sqrt(x) + x
+
+        cache = _cache(tmp_path / "nodes.sqlite")
+        Node.set_persistent_cache(cache)
+        expect(Graph.current().persistent_cache).to(be(cache))
+        expect(len(cache)).to(equal(2))
+
+        Node.set_persistent_cache(None)
+        expect(Graph.current().persistent_cache).to(be_none)
+        cache.close()
+
+    def test_restored_nodes_survive_weak_registry(self, tmp_path):
+        """
+        Verify that a restored node is not collected before it is retrieved from a weak registry
+
+        """
+        path = tmp_path / "nodes.sqlite"
+        cache = _cache(path)
+        with Graph(persistent_cache=cache):
+            sqrt(Node("x", 4, 1))
+        cache.close()
+
+        with Graph(weak_references=True, persistent_cache=_cache(path)):
+            x = Node("x", 4, 1)
+            expect(sqrt(x).value).to(equal(2))
+
+    def test_restored_nodes_keep_their_valid_mask(self, tmp_path):
+        """
+        Verify that entries masked under the mask domain policy are still invalid once restored
+
+        """
+        path = tmp_path / "nodes.sqlite"
+        cache = _cache(path)
+        with Graph(persistent_cache=cache, domain_policy="mask"):
+            sqrt(Node("x", np.array([4.0, -1.0]), 1))
+        cache.close()
+
+        with Graph(
+            persistent_cache=_cache(path), domain_policy="mask", collect_stats=True
+        ) as graph:
+            restored = sqrt(Node("x", np.array([4.0, -1.0]), 1))
+
+        expect(graph.stats.restores).to(equal(1))
+        np.testing.assert_array_equal(restored.valid, [True, False])
+
+    @pytest.mark.parametrize(
+        "stored, restored",
+        [({"domain_policy": "mask"}, {"domain_policy": "raise"}), ({}, {"dtype": np.float32})],
+    )
+    def test_nodes_are_not_restored_under_other_settings(self, tmp_path, stored, restored):
+        """
+        Verify that a node stored under one domain policy or dtype is recomputed under another one
+
+        """
+        path = tmp_path / "nodes.sqlite"
+        cache = _cache(path)
+        with Graph(persistent_cache=cache, **stored):
+            sqrt(Node("x", np.array([4.0, 1.0]), 1))
+        cache.close()
+
+        with Graph(persistent_cache=_cache(path), **restored, collect_stats=True) as graph:
+            sqrt(Node("x", np.array([4.0, 1.0]), 1))
+
+        expect(graph.stats.restores).to(equal(0))
+
+    def test_masked_record_raises_under_raise_policy(self, tmp_path):
+        """
+        Verify that a NaN entry stored under the mask policy is not returned under the raise policy
+
+        """
+        path = tmp_path / "nodes.sqlite"
+        cache = _cache(path)
+        with Graph(persistent_cache=cache, domain_policy="mask"):
+            sqrt(Node("x", np.array([4.0, -1.0]), 1))
+        cache.close()
+
+        with Graph(persistent_cache=_cache(path)):
+            with pytest.raises(ValueError):
+                sqrt(Node("x", np.array([4.0, -1.0]), 1))
+
+    def test_only_expensive_nodes_are_cached_by_default(self, tmp_path):
+        """
+        Verify that elementwise operations are recomputed, while matrix products with a long inner axis
+        and reductions over many entries are restored
+
+        """
+        path = tmp_path / "nodes.sqlite"
+
+        def compute():
+            A = Node("A", np.ones((4, 100)), 1)
+            v = Node("v", np.arange(100.0), 1)
+            return elementaries.sum(sqrt(A @ v)) + elementaries.sum(v)
+
+        cache = PersistentCache(path)
+        with Graph(persistent_cache=cache):
+            computed = compute()
+        expect(len(cache)).to(equal(2))
+        cache.close()
+
+        with Graph(persistent_cache=PersistentCache(path), collect_stats=True) as graph:
+            restored = compute()
+
+        # A @ v and sum(v) are restored, sqrt, sum(sqrt(A @ v)) over four entries and + are recomputed
+        expect(graph.stats.restores).to(equal(2))
+        expect(restored.value).to(equal(computed.value))
+
+    def test_stored_digests_are_bounded(self, tmp_path, monkeypatch):
+        """
+        Verify that the digests remembered as stored do not grow without bound
+
+        """
+        monkeypatch.setattr(persistence, "_MAX_STORED_DIGESTS", 2)
+        cache = _cache(tmp_path / "nodes.sqlite")
+        with Graph(persistent_cache=cache):
+            x = Node("x", 2, 1)
+            sqrt(x) + x * x - x
+
+        expect(len(cache._stored_digests)).to(equal(2))
+        expect(len(cache)).to(equal(4))
+        cache.close()
+
+    def test_exit_handler_is_registered_once(self, tmp_path, monkeypatch):
+        """
+        Verify that reopening a closed cache does not register another exit handler
+
+        """
+        handlers = []
+        monkeypatch.setattr(persistence.atexit, "register", handlers.append)
+        cache = _cache(tmp_path / "nodes.sqlite")
+        for value in range(3):
+            with Graph(persistent_cache=cache):
+                sqrt(Node("x", value + 1, 1))
+            cache.close()
+
+        expect(len(handlers)).to(equal(1))
+
+    def test_invalid_batch_size_raises_value_error(self, tmp_path):
+        """
+        Verify that the number of nodes written per transaction must be positive
+
+        """
+        with pytest.raises(ValueError):
+            PersistentCache(tmp_path / "nodes.sqlite", batch_size=0)
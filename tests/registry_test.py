@@ -0,0 +1,212 @@
+import gc
+import threading
+
+import pytest
+from expects import expect, equal, be, be_none, have_key, have_len
+
+from autodiff_team29.node import Node
+from autodiff_team29.registry import LRURegistry, StripedRegistry, UnboundedRegistry, WeakRegistry
+
+
+class TestLRURegistry:
+    """
+    Test that the bounded registry evicts the least recently used nodes once its size limit is reached.
+
+    """
+
+    def test_unbounded_registry_never_evicts(self):
+        """
+        Verify that a registry without a size limit keeps every entry
+
+        """
+        registry = LRURegistry()
+        for i in range(1000):
+            registry[i] = i
+
+        expect(registry).to(have_len(1000))
+        expect(registry.max_size).to(be_none)
+
+    def test_least_recently_inserted_is_evicted(self):
+        """
+        Verify that inserting past the limit removes the oldest entry
+
+        """
+        registry = LRURegistry(max_size=2)
+        registry["a"] = 1
+        registry["b"] = 2
+        registry["c"] = 3
+
+        expect(list(registry)).to(equal(["b", "c"]))
+
+    def test_retrieval_marks_entry_as_recently_used(self):
+        """
+        Verify that reading an entry protects it from the next eviction
+
+        """
+        registry = LRURegistry(max_size=2)
+        registry["a"] = 1
+        registry["b"] = 2
+
+        expect(registry["a"]).to(equal(1))
+        registry["c"] = 3
+
+        expect(registry).to(have_key("a"))
+        expect(registry).to(have_key("c"))
+        expect(registry).not_to(have_key("b"))
+
+    def test_resize_evicts_down_to_new_limit(self):
+        """
+        Verify that shrinking the limit immediately evicts the least recently used entries
+
+        """
+        registry = LRURegistry()
+        for key in "abcde":
+            registry[key] = key
+
+        registry.resize(2)
+
+        expect(list(registry)).to(equal(["d", "e"]))
+        expect(registry.max_size).to(be(2))
+
+    @pytest.mark.parametrize("max_size", [0, -1, 1.5, "10"])
+    def test_invalid_size_limit_raises_value_error(self, max_size):
+        """
+        Verify that only positive integers (or None) are accepted as size limits
+
+        """
+        with pytest.raises(ValueError):
+            LRURegistry(max_size)
+
+
+class TestUnboundedRegistry:
+    """
+    Test that the unbounded registry stores every node and cannot be given a size limit.
+
+    """
+
+    def test_size_limit_is_rejected(self):
+        """
+        Verify that unbounded registries report no size limit and cannot be bounded
+
+        """
+        registry = UnboundedRegistry()
+        registry.resize(None)
+        expect(registry.max_size).to(be_none)
+
+        with pytest.raises(ValueError):
+            registry.resize(10)
+
+
+class TestWeakRegistry:
+    """
+    Test that the weak reference registry only keeps nodes alive while something else references them.
+
+    """
+
+    def test_referenced_node_stays_in_registry(self):
+        """
+        Verify that a node is retrievable while a reference to it exists
+
+        """
+        registry = WeakRegistry()
+        x = Node("x", 1, 1)
+        registry["x"] = x
+
+        expect(registry["x"]).to(be(x))
+
+    def test_unreferenced_node_is_dropped(self):
+        """
+        Verify that once the last reference to a node is gone, it disappears from the registry
+
+        """
+        registry = WeakRegistry()
+        x = Node("x", 1, 1)
+        registry["x"] = x
+
+        # the global node registry holds its own strong reference to x
+        Node.clear_node_registry()
+        del x
+        gc.collect()
+
+        expect(registry).to(have_len(0))
+
+    def test_size_limit_is_rejected(self):
+        """
+        Verify that weak registries cannot be bounded
+
+        """
+        registry = WeakRegistry()
+        registry.resize(None)
+        expect(registry.max_size).to(be_none)
+
+        with pytest.raises(ValueError):
+            registry.resize(10)
+
+
+class TestStripedRegistry:
+    """
+    Test that the lock striped registry behaves like a dictionary and can be filled from several threads.
+
+    """
+
+    def test_insert_and_retrieve(self):
+        """
+        Verify that stored nodes can be found and retrieved
+
+        """
+        registry = StripedRegistry(n_stripes=4)
+        registry["a"] = 1
+        registry[("b", 2)] = 2
+
+        expect("a" in registry).to(equal(True))
+        expect(registry[("b", 2)]).to(equal(2))
+        expect(registry).to(have_len(2))
+
+    def test_clear_removes_entries_from_every_stripe(self):
+        """
+        Verify that clearing empties all stripes
+
+        """
+        registry = StripedRegistry(n_stripes=4)
+        for i in range(100):
+            registry[i] = i
+
+        registry.clear()
+
+        expect(registry).to(have_len(0))
+
+    def test_concurrent_inserts_are_not_lost(self):
+        """
+        Verify that nodes inserted concurrently from several threads are all stored
+
+        """
+        registry = StripedRegistry(n_stripes=4)
+
+        def insert(offset):
+            for i in range(1000):
+                registry[(offset, i)] = i
+
+        threads = [threading.Thread(target=insert, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        expect(registry).to(have_len(8000))
+
+    def test_size_limit_is_rejected(self):
+        """
+        Verify that striped registries cannot be bounded
+
+        """
+        with pytest.raises(ValueError):
+            StripedRegistry().resize(10)
+
+    @pytest.mark.parametrize("n_stripes", [0, -1, 1.5])
+    def test_invalid_number_of_stripes_raises_value_error(self, n_stripes):
+        """
+        Verify that only positive integers are accepted as the number of stripes
+
+        """
+        with pytest.raises(ValueError):
+            StripedRegistry(n_stripes)
@@ -0,0 +1,339 @@
+import pytest
+from expects import expect, equal, be_true, be_false, raise_error
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from autodiff_team29 import Node, Graph
+from autodiff_team29.forward import jacobian
+from autodiff_team29.reverse import backward, grad, vjp, register_vjp, _VJP_RULES, _reduction_axes
+import autodiff_team29.elementaries as E
+
+
+def _inputs(point):
+    """
+    Returns input nodes for reverse mode, whose forward tangents are not computed
+
+    """
+    return [Node(f"x{i + 1}", value, 0) for i, value in enumerate(point)]
+
+
+class TestScalarGradients:
+    """
+    Test that reverse mode gradients of scalar functions match forward mode.
+
+    """
+
+    @pytest.mark.parametrize(
+        "function",
+        [
+            lambda x: x[0] * x[1] + E.sin(x[0]),
+            lambda x: x[0] * x[0] * x[1] * x[0],
+            lambda x: (x[0] - x[1]) / (x[0] + 2 * x[1]),
+            lambda x: -x[0] ** x[1] + 2 ** x[0] + x[1] ** 3,
+            lambda x: E.sqrt(x[0]) * E.ln(x[1]) + E.log(x[0], 2),
+            lambda x: E.exp(x[0]) + E.cos(x[1]) * E.tan(x[0]),
+            lambda x: E.arcsin(x[0] / 4) + E.arccos(x[1] / 4) + E.arctan(x[0] * x[1]),
+            lambda x: E.sinh(x[0]) * E.cosh(x[1]) + E.tanh(x[0]) + E.logistic(x[1]),
+        ],
+    )
+    def test_gradient_matches_forward_mode(self, function):
+        """
+        Verify the gradient of a scalar function of two inputs for every operation
+
+        """
+        point = [1.5, 0.5]
+        expected = jacobian(function, point)
+
+        assert_array_almost_equal(grad(function(_inputs(point)), _inputs(point)), expected)
+
+    def test_gradient_of_many_inputs(self):
+        """
+        Verify that a single backward sweep gives the gradient with respect to 200 inputs
+
+        """
+        point = np.linspace(0.1, 2.0, 200)
+        inputs = _inputs(point)
+
+        assert_array_almost_equal(
+            grad(_sum_of_sines(inputs), inputs), jacobian(_sum_of_sines, point)
+        )
+
+    def test_repeated_terms(self):
+        """
+        Verify that a term repeated in a product receives the contribution of every occurrence
+
+        """
+        x = Node("x", 3.0, 0)
+
+        expect(grad(x * x * x, [x])[0]).to(equal(27.0))
+
+    def test_zero_term_in_product(self):
+        """
+        Verify that a zero term in a product does not make the adjoints of the other terms NaN
+
+        """
+        x, y, z = Node("x", 0.0, 0), Node("y", 2.0, 0), Node("z", 3.0, 0)
+
+        expect(grad(x * y * z, [x, y, z])).to(equal([6.0, 0.0, 0.0]))
+
+
+def _sum_of_sines(x):
+    """
+    f(x) = sum of sin(x_i) x_(i+1), a scalar function coupling neighbouring inputs
+
+    """
+    total = 0
+    for left, right in zip(x[:-1], x[1:]):
+        total = total + E.sin(left) * right
+    return total
+
+
+class TestArrayGradients:
+    """
+    Test reverse mode through array valued nodes, broadcasting and reductions.
+
+    """
+
+    def test_matrix_vector_product(self):
+        """
+        Verify the adjoints of a matrix and a vector through sum(A @ v)
+
+        """
+        A = Node("A", np.arange(6.0).reshape(2, 3), 0)
+        v = Node("v", np.array([1.0, 2.0, 3.0]), 0)
+
+        dA, dv = grad(E.sum(A @ v), [A, v])
+
+        assert_array_almost_equal(dA, np.array([[1.0, 2.0, 3.0], [1.0, 2.0, 3.0]]))
+        assert_array_almost_equal(dv, np.array([3.0, 5.0, 7.0]))
+
+    def test_matrix_product(self):
+        """
+        Verify the adjoints of two matrices through sum(A @ B)
+
+        """
+        A = Node("A", np.arange(6.0).reshape(2, 3), 0)
+        B = Node("B", np.arange(12.0).reshape(3, 4), 0)
+
+        dA, dB = grad(E.sum(A @ B), [A, B])
+
+        assert_array_almost_equal(dA, np.ones((2, 4)) @ B.value.T)
+        assert_array_almost_equal(dB, A.value.T @ np.ones((2, 4)))
+
+    def test_broadcast_operand(self):
+        """
+        Verify that the adjoint of a scalar broadcast against an array is summed over the array
+
+        """
+        x = Node("x", np.array([1.0, 2.0, 3.0]), 0)
+        b = Node("b", 2.0, 0)
+
+        dx, db = grad(E.sum(x * b + b), [x, b])
+
+        assert_array_almost_equal(dx, np.full(3, 2.0))
+        expect(db).to(equal(9.0))
+
+    @pytest.mark.parametrize("axis", [None, 0, 1, (0, 1), -1])
+    def test_reductions(self, axis):
+        """
+        Verify the adjoints of sum and mean over any axes against their explicit weights
+
+        """
+        x = Node("x", np.arange(6.0).reshape(2, 3), 0)
+        weights = np.arange(1.0, 7.0).reshape(2, 3)
+
+        sum_adjoint = backward(E.sum(x, axis=axis), seed=np.sum(weights, axis=axis))[x]
+        mean_adjoint = grad(E.sum(E.mean(x, axis=axis)), [x])[0]
+
+        count = x.value.size // np.sum(x.value, axis=axis).size
+        expanded = np.broadcast_to(
+            np.sum(weights, axis=axis, keepdims=True), x.value.shape
+        )
+        assert_array_almost_equal(sum_adjoint, expanded)
+        assert_array_almost_equal(mean_adjoint, np.full((2, 3), 1 / count))
+
+    @pytest.mark.parametrize("axis", [None, 1])
+    def test_reductions_keeping_dims(self, axis):
+        """
+        Verify the adjoints of reductions whose reduced axes are kept with size one
+
+        """
+        x = Node("x", np.arange(6.0).reshape(2, 3), 0)
+
+        adjoint = grad(E.sum(E.mean(x, axis=axis, keepdims=True) * x), [x])[0]
+
+        mean = np.mean(x.value, axis=axis, keepdims=True)
+        count = x.value.size // mean.size
+        expected = mean + np.sum(x.value, axis=axis, keepdims=True) / count
+        assert_array_almost_equal(adjoint, np.broadcast_to(expected, x.value.shape))
+
+    def test_reduction_axes_are_recorded(self):
+        """
+        Verify that the axes of a reduction are those it was built with, whatever its operation name
+
+        """
+        x = Node("x", np.ones((2, 3, 4)), 0)
+
+        expect(_reduction_axes(E.sum(x, axis=(2, 0)))).to(equal((0, 2)))
+        expect(_reduction_axes(E.mean(x, axis=-2))).to(equal((1,)))
+        expect(_reduction_axes(E.sum(x))).to(equal((0, 1, 2)))
+
+    def test_seed_of_array_output(self):
+        """
+        Verify that the seed of an array output weights the rows of its Jacobian
+
+        """
+        x = Node("x", np.array([1.0, 2.0]), 0)
+        seed = np.array([3.0, -1.0])
+
+        assert_array_almost_equal(backward(E.sin(x), seed=seed)[x], seed * np.cos(x.value))
+
+
+class TestBackward:
+    """
+    Test the adjoints returned by a backward sweep.
+
+    """
+
+    def test_node_backward(self):
+        """
+        Verify that Node.backward is the backward sweep of the node
+
+        """
+        x, y = Node("x", 2.0, 0), Node("y", 3.0, 0)
+        adjoints = (x * y + x).backward()
+
+        expect(adjoints[x]).to(equal(4.0))
+        expect(adjoints[y]).to(equal(2.0))
+        expect(len(adjoints)).to(equal(2))
+
+    def test_unreached_input(self):
+        """
+        Verify that an input the output does not depend on has an adjoint of zero
+
+        """
+        x, y = Node("x", 2.0, 0), Node("y", np.array([1.0, 2.0]), 0)
+        adjoints = E.sin(x).backward()
+
+        expect(y in adjoints).to(be_false)
+        assert_array_almost_equal(adjoints[y], np.zeros(2))
+
+    def test_intermediate_node(self):
+        """
+        Verify that adjoints are only kept for input nodes
+
+        """
+        x = Node("x", 2.0, 0)
+        inner = E.sin(x)
+        adjoints = (inner * x).backward()
+
+        expect(x in adjoints).to(be_true)
+        expect(lambda: adjoints[inner]).to(raise_error(KeyError))
+
+    def test_by_symbol(self):
+        """
+        Verify that adjoints can be read by the symbols of the inputs
+
+        """
+        x, y = Node("x", 2.0, 0), Node("y", 3.0, 0)
+
+        expect((x * y).backward().by_symbol()).to(equal({"x": 3.0, "y": 2.0}))
+
+    def test_pruned_inputs(self):
+        """
+        Verify that restricting the sweep to some inputs only computes their adjoints
+
+        """
+        x, y = Node("x", 2.0, 0), Node("y", 3.0, 0)
+        adjoints = backward(x * y + E.exp(y), inputs=[x])
+
+        expect(list(adjoints)).to(equal([x]))
+        expect(adjoints[x]).to(equal(3.0))
+
+    def test_output_independent_of_inputs(self):
+        """
+        Verify that the gradient of an output with respect to unrelated inputs is zero
+
+        """
+        x, y = Node("x", 2.0, 0), Node("y", 3.0, 0)
+
+        expect(grad(E.sin(x), [y])).to(equal([0.0]))
+
+    def test_graph_with_dtype(self):
+        """
+        Verify that adjoints keep the dtype of the graph
+
+        """
+        with Graph(dtype=np.float32):
+            x = Node("x", np.array([1.0, 2.0]), 0)
+            dx = grad(E.sum(E.exp(x)), [x])[0]
+
+        expect(dx.dtype).to(equal(np.float32))
+
+    def test_unsupported_operation(self):
+        """
+        Verify that an operation without a reverse mode rule raises NotImplementedError
+
+        """
+        x = Node("x", 2.0, 0)
+        node = Node._create_node(("square", x._id), "square({})", 4.0, 0, operands=(x,))
+
+        expect(lambda: node.backward()).to(raise_error(NotImplementedError))
+
+    def test_register_vjp(self):
+        """
+        Verify that a registered rule differentiates the operation it is registered for
+
+        """
+        x = Node("x", 2.0, 0)
+        node = Node._create_node(("square", x._id), "square({})", 4.0, 0, operands=(x,))
+
+        register_vjp("square", lambda node, adjoint, value, operands: (2 * adjoint * operands[0],))
+        try:
+            expect(node.backward()[x]).to(equal(4.0))
+        finally:
+            del _VJP_RULES["square"]
+
+
+class TestVectorJacobianProduct:
+    """
+    Test that vector Jacobian products match the product with the assembled Jacobian.
+
+    """
+
+    @pytest.mark.parametrize("cotangent", [[1.0, 0.0], [0.5, -2.0], [0.0, 0.0]])
+    def test_product_with_jacobian(self, cotangent):
+        """
+        Verify u J for arbitrary vectors, including the zero vector
+
+        """
+        function = lambda x: [x[0] * x[1] + E.sin(x[0]), x[0] + x[1] + E.sin(x[0] * x[1])]
+        point = [np.pi, np.pi / 2]
+
+        assert_array_almost_equal(
+            vjp(function, point, cotangent), np.array(cotangent) @ jacobian(function, point)
+        )
+
+    def test_scalar_function(self):
+        """
+        Verify that the product for a scalar function is its gradient scaled by the cotangent
+
+        """
+        assert_array_almost_equal(vjp(lambda x: x[0] * x[1], [2.0, 3.0], 2.0), [6.0, 4.0])
+
+    def test_repeated_and_constant_outputs(self):
+        """
+        Verify that an output returned twice accumulates both seeds, and constant outputs are ignored
+
+        """
+        function = lambda x: [x[0] * x[1], x[0] * x[1], 3.0]
+
+        assert_array_almost_equal(vjp(function, [2.0, 3.0], [1.0, 2.0, 5.0]), [9.0, 6.0])
+
+    def test_mismatched_cotangent(self):
+        """
+        Verify that a cotangent that does not match the outputs raises ValueError
+
+        """
+        with pytest.raises(ValueError):
+            vjp(lambda x: [x[0], x[0]], [1.0], [1.0])
@@ -0,0 +1,203 @@
+import pytest
+from expects import expect, equal, raise_error
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from autodiff_team29 import Node, Graph
+from autodiff_team29.reverse import grad
+from autodiff_team29.second_order import hessian, batch_hessian, hvp
+import autodiff_team29.elementaries as E
+
+
+def _scalar_function(x):
+    """
+    A scalar function of any number of inputs, coupling neighbouring inputs through every elementary
+
+    """
+    total = 0
+    for a, b in zip(x[:-1], x[1:]):
+        total = (
+            total
+            + E.sin(a) * b
+            + E.exp(a / b)
+            + E.sqrt(a * a + 1)
+            + E.log(b + 3, 2)
+            + E.tanh(a) * E.logistic(b)
+            + a**b
+            + E.arctan(a)
+            - E.cosh(b) / (1 + a**2)
+            + E.ln(b) * E.cos(a)
+        )
+    return total
+
+
+def _finite_difference_hessian(function, point, step=1e-6):
+    """
+    Computes the Hessian by central differences of reverse mode gradients
+
+    """
+
+    def gradient(p):
+        inputs = [Node(f"x{i + 1}", value, 0) for i, value in enumerate(p)]
+        return np.array(grad(function(inputs), inputs))
+
+    point = np.asarray(point, dtype=float)
+    return np.array(
+        [
+            (gradient(point + step * e) - gradient(point - step * e)) / (2 * step)
+            for e in np.eye(len(point))
+        ]
+    )
+
+
+class TestHessian:
+    """
+    Test Hessians computed with forward mode over reverse mode.
+
+    """
+
+    def test_polynomial(self):
+        """
+        Verify the Hessian of f(x, y) = x^2 y + sin(y) against its analytical expression
+
+        """
+        H = hessian(lambda x: x[0] ** 2 * x[1] + E.sin(x[1]), [1.0, 2.0])
+
+        assert_array_almost_equal(H, [[4.0, 2.0], [2.0, -np.sin(2.0)]])
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 64])
+    def test_matches_finite_differences(self, chunk_size):
+        """
+        Verify the Hessian of a function of every elementary for any chunk size
+
+        """
+        point = np.linspace(0.3, 1.5, 7)
+
+        H = hessian(_scalar_function, point, chunk_size=chunk_size)
+
+        assert_array_almost_equal(H, _finite_difference_hessian(_scalar_function, point), decimal=5)
+        assert_array_almost_equal(H, H.T, decimal=12)
+
+    def test_inputs_without_second_derivatives(self):
+        """
+        Verify that linear and unused inputs have zero rows and columns
+
+        """
+        H = hessian(lambda x: x[0] * x[0] + 3 * x[1], [2.0, 1.0, 5.0])
+
+        assert_array_almost_equal(H, [[2.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]])
+
+    def test_array_operations(self):
+        """
+        Verify the Hessian through broadcasting against constant arrays and a full reduction
+
+        """
+        weights = np.array([1.0, 2.0, 3.0])
+        H = hessian(lambda x: E.sum(E.sin(x[0] * weights) * x[1]), [0.5, 2.0])
+
+        mixed = np.sum(weights * np.cos(0.5 * weights))
+        expected = np.array(
+            [[-2.0 * np.sum(weights**2 * np.sin(0.5 * weights)), mixed], [mixed, 0.0]]
+        )
+        assert_array_almost_equal(H, expected)
+
+    def test_graph_dtype(self):
+        """
+        Verify that the Hessian is stored in the dtype of the active graph
+
+        """
+        with Graph(dtype=np.float32):
+            H = hessian(lambda x: x[0] ** 3, [2.0])
+
+        expect(H.dtype).to(equal(np.float32))
+        assert_array_almost_equal(H, [[12.0]])
+
+    def test_vector_function(self):
+        """
+        Verify that a function returning several nodes raises ValueError
+
+        """
+        expect(lambda: hessian(lambda x: x[0] * np.ones(2), [1.0])).to(raise_error(ValueError))
+
+
+class TestBatchHessian:
+    """
+    Test Hessians computed at a batch of points at once.
+
+    """
+
+    @pytest.mark.parametrize("chunk_size", [2, 64])
+    def test_matches_pointwise_hessians(self, chunk_size):
+        """
+        Verify that every Hessian of the batch matches the Hessian at its point
+
+        """
+        base = np.linspace(0.3, 1.5, 7)
+        points = np.stack([base * scale for scale in (0.9, 1.0, 1.1)])
+
+        H = batch_hessian(_scalar_function, points, chunk_size=chunk_size)
+
+        expect(H.shape).to(equal((3, 7, 7)))
+        for batch_index, point in enumerate(points):
+            assert_array_almost_equal(H[batch_index], hessian(_scalar_function, point))
+
+    def test_points_shape(self):
+        """
+        Verify that points that are not a two dimensional array raise ValueError
+
+        """
+        expect(lambda: batch_hessian(_scalar_function, [1.0, 2.0])).to(raise_error(ValueError))
+
+
+class TestHessianVectorProduct:
+    """
+    Test Hessian vector products computed without forming the Hessian.
+
+    """
+
+    def test_matches_hessian(self):
+        """
+        Verify H v against the product with the full Hessian
+
+        """
+        point = np.linspace(0.3, 1.5, 7)
+        direction = np.linspace(-1.0, 1.0, 7)
+
+        assert_array_almost_equal(
+            hvp(_scalar_function, point, direction), hessian(_scalar_function, point) @ direction
+        )
+
+    def test_batch_of_vectors(self):
+        """
+        Verify that several vectors give the same products as one vector at a time
+
+        """
+        point = np.linspace(0.3, 1.5, 7)
+        directions = np.random.default_rng(0).normal(size=(3, 7))
+
+        products = hvp(_scalar_function, point, directions)
+
+        expect(products.shape).to(equal((3, 7)))
+        for direction, product in zip(directions, products):
+            assert_array_almost_equal(product, hvp(_scalar_function, point, direction))
+
+    def test_zero_entries_of_direction(self):
+        """
+        Verify that inputs with a zero entry in the direction still receive their product
+
+        """
+        product = hvp(lambda x: x[0] ** 2 * x[1] + E.sin(x[1]), [1.0, 2.0], [0.0, 1.0])
+
+        assert_array_almost_equal(product, [2.0, -np.sin(2.0)])
+
+    def test_mismatched_directions(self):
+        """
+        Verify that directions that do not match the point raise ValueError
+
+        """
+        expect(lambda: hvp(_scalar_function, [1.0, 2.0], [1.0, 2.0, 3.0])).to(
+            raise_error(ValueError)
+        )
+        expect(lambda: hvp(_scalar_function, [1.0, 2.0], np.ones((2, 2, 2)))).to(
+            raise_error(ValueError)
+        )
@@ -0,0 +1,212 @@
+import pickle
+
+import pytest
+from expects import expect, equal, be, be_a, be_true, contain
+import numpy as np
+from numpy.testing import assert_array_almost_equal
+
+from autodiff_team29 import Node, VectorFunction
+from autodiff_team29.sparse import SparseTangent
+import autodiff_team29.elementaries as E
+
+N_INPUTS = 1000
+
+
+def _inputs(values):
+    """
+    Creates one input node per value, each seeded in its own direction out of N_INPUTS
+
+    """
+    directions = np.eye(N_INPUTS)
+    return [
+        Node(f"x{i}", value, 1, seed_vector=directions[i])
+        for i, value in enumerate(values)
+    ]
+
+
+class TestSparseTangent:
+    """
+    Test the arithmetic of sparse tangents against their dense equivalents.
+
+    """
+
+    def test_compress_keeps_nonzero_entries(self):
+        """
+        Verify that a long one hot vector is stored by its nonzero entry only
+
+        """
+        tangent = SparseTangent.compress(np.eye(N_INPUTS)[7] * 3)
+
+        expect(tangent).to(be_a(SparseTangent))
+        expect(tangent.indices.tolist()).to(equal([7]))
+        expect(tangent.values.tolist()).to(equal([3.0]))
+        expect(tangent.shape).to(equal((N_INPUTS,)))
+
+    @pytest.mark.parametrize("dense", [np.eye(10)[0], np.ones(N_INPUTS)])
+    def test_short_or_full_vectors_stay_dense(self, dense):
+        """
+        Verify that short vectors and vectors with many nonzero entries are not compressed
+
+        """
+        expect(SparseTangent.compress(dense)).to(be(dense))
+
+    def test_arithmetic_matches_dense(self):
+        """
+        Verify sums, differences, scaling and division against the same operations on dense vectors
+
+        """
+        a_dense = np.zeros(N_INPUTS)
+        a_dense[[1, 5, 9]] = [1.0, 2.0, 3.0]
+        b_dense = np.zeros(N_INPUTS)
+        b_dense[[5, 20]] = [4.0, 5.0]
+        a = SparseTangent.compress(a_dense)
+        b = SparseTangent.compress(b_dense)
+
+        assert_array_almost_equal(np.asarray(a + b), a_dense + b_dense)
+        assert_array_almost_equal(np.asarray(a - b), a_dense - b_dense)
+        assert_array_almost_equal(np.asarray(0 - a), -a_dense)
+        assert_array_almost_equal(np.asarray(np.float64(2.5) * a), 2.5 * a_dense)
+        assert_array_almost_equal(np.asarray(a / 4), a_dense / 4)
+        assert_array_almost_equal(a + np.ones(N_INPUTS), a_dense + 1)
+        expect((a + 0) is a).to(be_true)
+
+    def test_mismatched_sizes_raise_value_error(self):
+        """
+        Verify that tangents with respect to different numbers of inputs cannot be combined
+
+        """
+        a = SparseTangent.compress(np.eye(100)[0])
+        b = SparseTangent.compress(np.eye(200)[0])
+
+        with pytest.raises(ValueError):
+            a + b
+
+    def test_fill_in_switches_to_dense(self):
+        """
+        Verify that a sum of tangents is densified once it depends on more than a tenth of the inputs
+
+        """
+        directions = [SparseTangent.compress(row) for row in np.eye(N_INPUTS)[:101]]
+
+        total = directions[0]
+        for direction in directions[1:100]:
+            total = total + direction
+        expect(total).to(be_a(SparseTangent))
+
+        total = total + directions[100]
+        expect(total).to(be_a(np.ndarray))
+        expect(float(total.sum())).to(equal(101.0))
+
+    def test_pickle_round_trip(self):
+        """
+        Verify that sparse tangents can be stored by the persistent cache
+
+        """
+        tangent = SparseTangent.compress(np.eye(N_INPUTS)[3])
+        restored = pickle.loads(pickle.dumps(tangent))
+
+        assert_array_almost_equal(np.asarray(restored), np.asarray(tangent))
+
+
+class TestSparseNodes:
+    """
+    Test that nodes seeded with long one hot vectors carry sparse derivatives through operations.
+
+    """
+
+    def test_local_dependencies_stay_sparse(self):
+        """
+        Verify that an expression of a few out of many inputs stores only their partials
+
+        """
+        x = _inputs(np.linspace(1, 2, 10))
+
+        f = E.sin(x[3]) * x[7] / x[5] - E.exp(x[1]) ** 2 + E.log(x[2], 10) + E.sqrt(x[4])
+
+        expect(f._derivative).to(be_a(SparseTangent))
+        expect(f._derivative.indices.tolist()).to(equal([1, 2, 3, 4, 5, 7]))
+
+    def test_sparse_derivatives_match_dense_seeding(self):
+        """
+        Verify that sparse derivatives equal the derivatives computed with dense seed vectors
+
+        """
+        values = np.linspace(1, 2, 10)
+
+        def function(x):
+            return E.sin(x[3]) * x[7] / x[5] - 1 / E.exp(x[1]) ** x[2] + E.tanh(x[4] - x[3])
+
+        sparse = function(_inputs(values))
+        Node.clear_node_registry()
+        directions = np.eye(N_INPUTS)
+        dense = function(
+            [
+                Node(f"x{i}", value, directions[i])
+                for i, value in enumerate(values)
+            ]
+        )
+
+        expect(sparse._derivative).to(be_a(SparseTangent))
+        expect(dense._derivative).to(be_a(np.ndarray))
+        assert_array_almost_equal(np.asarray(sparse._derivative), dense.derivative)
+
+    def test_public_derivative_is_dense(self):
+        """
+        Verify that the derivative of a sparse seeded node reads like the dense array it stands for
+
+        """
+        x = _inputs([2.0, 3.0])
+        f = x[0] * x[1]
+        dense = np.zeros(N_INPUTS)
+        dense[:2] = [3.0, 2.0]
+
+        expect(f.derivative).to(be_a(np.ndarray))
+        expect(f.derivative[1]).to(equal(2.0))
+        expect(bool(np.all(f.derivative == dense))).to(be_true)
+        expect(float(f.derivative.sum())).to(equal(5.0))
+
+    def test_repr_shows_dense_derivative(self):
+        """
+        Verify that the representation of a sparse seeded node shows its dense derivative
+
+        """
+        x = _inputs([2.0, 3.0])
+        f = x[0] * x[1]
+
+        expect(repr(f)).not_to(contain("SparseTangent"))
+        expect(repr(f)).to(equal(f"Node({f.symbol},{f.value},{f.derivative})"))
+
+    def test_scalar_times_batch_is_dense(self):
+        """
+        Verify that multiplying a sparse seeded scalar by a batch gives one dense row per point
+
+        """
+        x = _inputs([2.0])[0]
+        batch = Node("b", np.array([1.0, 3.0]), 0)
+
+        f = x * batch
+
+        expect(f.derivative.shape).to(equal((2, N_INPUTS)))
+        assert_array_almost_equal(f.derivative[:, 0], [1.0, 3.0])
+
+    def test_vector_function_jacobian(self):
+        """
+        Verify that the Jacobian of sparse seeded functions is assembled densely
+
+        """
+        x = _inputs([1.0, 2.0, 3.0])
+
+        jacobian = VectorFunction([x[0] * x[1], x[2] + x[0]]).jacobian
+
+        expect(jacobian.shape).to(equal((2, N_INPUTS)))
+        assert_array_almost_equal(jacobian[:, :3], [[2.0, 1.0, 0.0], [1.0, 0.0, 1.0]])
+
+    def test_dtype_policy_applies_to_sparse_derivatives(self):
+        """
+        Verify that the partials of sparse derivatives are stored in the dtype of the graph
+
+        """
+        Node.set_dtype(np.float32)
+        x = _inputs([1.0, 2.0])
+
+        expect((x[0] * x[1]).derivative.dtype).to(equal(np.float32))
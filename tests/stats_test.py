@@ -0,0 +1,154 @@
+import numpy as np
+from expects import expect, equal, be_above, have_key
+
+from autodiff_team29 import Graph, Node
+from autodiff_team29.elementaries import sqrt
+from autodiff_team29.registry import LRURegistry
+from autodiff_team29.stats import RegistryStats, approximate_bytes
+
+
+class TestRegistryStats:
+    """
+    Test the counters that record how the node registry is used.
+
+    """
+
+    def test_counts_hits_misses_and_inserts(self):
+        """
+        Verify that reusing a node counts as a hit and computing a new one as a miss followed by an insert
+
+        """
+        with Graph(collect_stats=True) as graph:
+            x = Node("x", 4, 1)
+            sqrt(x) + sqrt(x)
+
+        expect(graph.stats.hits).to(equal(1))
+        expect(graph.stats.misses).to(equal(3))
+        expect(graph.stats.lookups).to(equal(4))
+        expect(graph.stats.inserts).to(equal(3))
+        expect(graph.stats.hit_rate).to(equal(0.25))
+
+    def test_counts_are_broken_down_by_operation(self):
+        """
+        Verify that counts are recorded per operation type, with input nodes counted as leaves
+
+        """
+        with Graph(collect_stats=True) as graph:
+            x = Node("x", 4, 1)
+            sqrt(x) + sqrt(x)
+
+        by_operation = graph.stats.by_operation
+        expect(by_operation["leaf"]).to(
+            equal({"hits": 0, "misses": 1, "inserts": 1, "evictions": 0, "restores": 0})
+        )
+        expect(by_operation["sqrt"]).to(
+            equal({"hits": 1, "misses": 1, "inserts": 1, "evictions": 0, "restores": 0})
+        )
+        expect(by_operation["+"]["misses"]).to(equal(1))
+
+    def test_counts_evictions_of_bounded_registry(self):
+        """
+        Verify that nodes evicted to respect the size limit are counted
+
+        """
+        with Graph(max_size=2, collect_stats=True) as graph:
+            x = Node("x", 4, 1)
+            sqrt(sqrt(sqrt(x)))
+
+        expect(graph.stats.evictions).to(equal(2))
+        expect(graph.stats.by_operation["leaf"]["evictions"]).to(equal(1))
+
+    def test_overwrite_mode_makes_no_lookups(self):
+        """
+        Verify that no lookups or inserts are recorded while nodes are always recomputed
+
+        """
+        with Graph(overwrite_mode=True, collect_stats=True) as graph:
+            x = Node("x", 4, 1)
+            sqrt(x) + sqrt(x)
+
+        expect(graph.stats.lookups).to(equal(0))
+        expect(graph.stats.inserts).to(equal(0))
+
+    def test_reset_keeps_stored_nodes(self):
+        """
+        Verify that resetting the stats sets counters to zero without clearing the registry
+
+        """
+        Node.set_registry_stats(True)
+        x = Node("x", 4, 1)
+        sqrt(x)
+        Node.reset_registry_stats()
+
+        stats = Node.get_registry_stats()
+        expect(stats["lookups"]).to(equal(0))
+        expect(stats["by_operation"]).to(equal({}))
+        expect(stats["nodes_stored"]).to(equal(2))
+
+    def test_snapshot_reports_approximate_bytes(self):
+        """
+        Verify that the snapshot estimates the memory held by stored nodes, including array derivatives
+
+        """
+        Node.set_registry_stats(True)
+        Node("x", 4, 1, seed_vector=np.ones(1000))
+        stats = Node.get_registry_stats()
+
+        expect(stats["approximate_bytes"]).to(be_above(8000))
+        expect(stats["by_operation"]["leaf"]).to(have_key("bytes"))
+        expect(stats["by_operation"]["leaf"]["bytes"]).to(equal(stats["approximate_bytes"]))
+
+    def test_sparse_derivatives_count_stored_entries_only(self):
+        """
+        Verify that a sparse derivative is estimated by its stored entries rather than its length
+
+        """
+        Node("x", 4, 1, seed_vector=np.eye(1000)[0])
+
+        expect(Node.get_registry_stats()["approximate_bytes"]).not_to(be_above(8000))
+
+    def test_stats_are_not_collected_by_default(self):
+        """
+        Verify that a graph only counts registry usage once stats collection is enabled
+
+        """
+        with Graph(max_size=3) as graph:
+            x = Node("x", 4, 1)
+            sqrt(sqrt(sqrt(x)))
+            expect(graph.stats.lookups).to(equal(0))
+            expect(graph.stats.inserts).to(equal(0))
+            expect(graph.stats.evictions).to(equal(0))
+
+            graph.collect_stats = True
+            sqrt(x)
+
+        expect(graph.stats.hits).to(equal(1))
+        expect(graph.stats.lookups).to(equal(1))
+
+    def test_operation_of_key(self):
+        """
+        Verify that operation results are named after their operation and input nodes are leaves
+
+        """
+        expect(RegistryStats.operation_of(("*", 0, 1))).to(equal("*"))
+        expect(RegistryStats.operation_of(("sqrt", 3))).to(equal("sqrt"))
+        expect(RegistryStats.operation_of(("x", (10, 1)))).to(equal("leaf"))
+
+    def test_lru_registry_reports_evicted_keys(self):
+        """
+        Verify that a bounded registry calls back with the key of every evicted entry
+
+        """
+        evicted = []
+        registry = LRURegistry(max_size=1, on_evict=evicted.append)
+        registry["a"] = 1
+        registry["b"] = 2
+
+        expect(evicted).to(equal(["a"]))
+
+    def test_approximate_bytes_of_empty_registry(self):
+        """
+        Verify that an empty registry holds no memory
+
+        """
+        expect(approximate_bytes([])).to(equal({}))
@@ -1,11 +1,14 @@
 import pytest
-from expects import expect, equal
+from expects import expect, equal, be
 import numpy as np
 from numpy.testing import assert_array_almost_equal
 
 from autodiff_team29 import Node
 from autodiff_team29 import VectorFunction
 import autodiff_team29.elementaries as E
+from autodiff_team29 import vector_function
+from autodiff_team29.graph import _collect_nodes
+from autodiff_team29.vector_function import _graph_sizes
 
 
 def test_vector_function():
@@ -29,7 +32,7 @@ def test_vector_function():
 
     f = VectorFunction([f1, f2])
 
-    expected_symbol = "['((x1*x2)+sin(x1))' '((x1+x2)+sin((x1*x2)))']"
+    expected_symbol = "['((x1*x2)+sin(x1))' '(sin((x1*x2))+x1+x2)']"
     expected_value = np.array(
         [
             np.pi * np.pi / 2 + np.sin(np.pi),
@@ -49,3 +52,199 @@ def test_vector_function():
     expect(f.symbol).to(equal(expected_symbol))
     assert_array_almost_equal(f.value, expected_value)
     assert_array_almost_equal(f.jacobian, expected_jacobian)
+
+
+def test_vector_function_uses_graph_dtype():
+    """
+    Test VectorFunction stores its value and jacobian in the dtype of the active graph.
+
+    """
+    Node.set_dtype(np.float32)
+    x1 = Node("x1", 1.0, 1, seed_vector=[1, 0])
+    x2 = Node("x2", 2.0, 1, seed_vector=[0, 1])
+
+    f = VectorFunction([x1 * x2, E.sin(x1)])
+
+    expect(f.value.dtype).to(equal(np.float32))
+    expect(f.jacobian.dtype).to(equal(np.float32))
+    assert_array_almost_equal(f.jacobian, [[2, 1], [np.cos(1), 0]])
+
+
+def _vector_function():
+    """
+    f(x1, x2) = [x1x2 + sin(x1), x1 + x2 + sin(x1x2)] at (pi, pi/2)
+
+    """
+    x1 = Node("x1", np.pi, 1, seed_vector=[1, 0])
+    x2 = Node("x2", np.pi / 2, 1, seed_vector=[0, 1])
+    return VectorFunction([x1 * x2 + E.sin(x1), x1 + x2 + E.sin(x1 * x2)])
+
+
+def test_repeated_reads_return_views_of_one_buffer():
+    """
+    Test the value and jacobian are assembled once, and later reads are read only views of the same buffer.
+
+    """
+    f = _vector_function()
+
+    first, second = f.jacobian, f.jacobian
+
+    expect(np.shares_memory(first, second)).to(equal(True))
+    expect(np.shares_memory(f.value, f.value)).to(equal(True))
+    expect(first.flags.c_contiguous).to(equal(True))
+    with pytest.raises(ValueError):
+        first[0, 0] = 1
+
+
+def test_assembly_into_preallocated_buffers():
+    """
+    Test the value and jacobian can be written into arrays supplied by the caller.
+
+    """
+    f = _vector_function()
+    value = np.empty(2)
+    jacobian = np.empty((2, 2), dtype=np.float32)
+
+    expect(f.compute_value(out=value)).to(be(value))
+    expect(f.compute_jacobian(out=jacobian)).to(be(jacobian))
+    assert_array_almost_equal(value, f.value)
+    assert_array_almost_equal(jacobian, f.jacobian, decimal=6)
+
+    with pytest.raises(ValueError):
+        f.compute_jacobian(out=np.empty((2, 3)))
+
+
+def test_constant_and_sparse_rows():
+    """
+    Test rows of constant functions are zero, and sparse derivatives are written densely.
+
+    """
+    directions = np.eye(100)
+    x = Node("x", 2.0, 1, seed_vector=directions[3])
+    y = Node("y", 5.0, 1, seed_vector=directions[60])
+
+    f = VectorFunction([x * y, Node("c", 1.0, 0), y])
+
+    expected = np.zeros((3, 100))
+    expected[0, [3, 60]] = [5.0, 2.0]
+    expected[2, 60] = 1.0
+    assert_array_almost_equal(f.jacobian, expected)
+
+
+def _vector_function_of_inputs(x):
+    """
+    f(x1, x2) = [x1x2 + sin(x1), x1 + x2 + sin(x1x2)], as a function of its input nodes
+
+    """
+    return [x[0] * x[1] + E.sin(x[0]), x[0] + x[1] + E.sin(x[0] * x[1])]
+
+
+def _shared_subexpression(x):
+    """
+    A chain of operations on two inputs, which every output of a function can depend on
+
+    """
+    total = x[0]
+    for _ in range(20):
+        total = E.sin(total) * x[1]
+    return total
+
+
+@pytest.mark.parametrize("mode", ["auto", "forward", "reverse"])
+def test_jacobian_in_every_mode(mode):
+    """
+    Test the jacobian of a function evaluated from a callable is the same in every mode.
+
+    """
+    f = VectorFunction.from_callable(_vector_function_of_inputs, [np.pi, np.pi / 2], mode=mode)
+
+    assert_array_almost_equal(f.jacobian, _vector_function().jacobian)
+    assert_array_almost_equal(f.value, _vector_function().value)
+
+
+def test_reverse_mode_of_seeded_functions():
+    """
+    Test reverse mode multiplies the adjoints of seeded inputs by their seed vectors.
+
+    """
+    f = _vector_function()
+    expected = f.compute_jacobian()
+
+    f.mode = "reverse"
+
+    expect(f.mode).to(equal("reverse"))
+    assert_array_almost_equal(f.jacobian, expected)
+
+
+def test_automatic_mode_selection():
+    """
+    Test reverse mode is chosen for few outputs of many inputs, and forward mode for many outputs of
+    few inputs or for functions that already carry their derivatives.
+
+    """
+    many_inputs = VectorFunction.from_callable(
+        lambda x: np.sum(np.array(x, dtype=object) * 2.0), np.linspace(0, 1, 100)
+    )
+    many_outputs = VectorFunction.from_callable(
+        lambda x: [E.sin(_shared_subexpression(x) + i) for i in range(50)], [1.0, 2.0]
+    )
+
+    expect(many_inputs.mode).to(equal("reverse"))
+    expect(many_outputs.mode).to(equal("forward"))
+    expect(_vector_function().mode).to(equal("forward"))
+    assert_array_almost_equal(many_inputs.jacobian, np.full((1, 100), 2.0))
+
+
+def test_graph_sizes_in_a_single_traversal():
+    """
+    Test the sizes the automatic mode is estimated from match the graphs of the outputs collected one by
+    one.
+
+    """
+    x = [Node(f"x{i}", float(i), 0) for i in range(5)]
+    shared = _shared_subexpression(x)
+    outputs = [E.sin(shared + i) * x[i] for i in range(5)] + [shared]
+
+    n_nodes, n_visits = _graph_sizes(outputs)
+
+    expect(n_nodes).to(equal(len(_collect_nodes(outputs))))
+    expect(n_visits).to(equal(sum(len(_collect_nodes([output])) for output in outputs)))
+
+
+def test_automatic_mode_is_decided_once(monkeypatch):
+    """
+    Test the automatic mode is estimated on first read only, and estimated again once the mode is set.
+
+    """
+    f = VectorFunction.from_callable(lambda x: x[0] * x[1] * x[2], [1.0, 2.0, 3.0])
+    estimates = []
+    monkeypatch.setattr(
+        vector_function, "_graph_sizes", lambda outputs: estimates.append(outputs) or (1, 1)
+    )
+
+    expect(f.mode).to(equal("reverse"))
+    f.jacobian
+    expect(len(estimates)).to(equal(1))
+
+    f.mode = "auto"
+    f.mode
+    expect(len(estimates)).to(equal(2))
+
+
+def test_mode_override_discards_jacobian():
+    """
+    Test setting the mode recomputes the jacobian, and unknown modes and reverse mode of array valued
+    functions are rejected.
+
+    """
+    f = VectorFunction.from_callable(_vector_function_of_inputs, [1.0, 2.0], mode="forward")
+    forward_jacobian = f.jacobian
+
+    f.mode = "reverse"
+
+    expect(np.shares_memory(f.jacobian, forward_jacobian)).to(equal(False))
+    assert_array_almost_equal(f.jacobian, forward_jacobian)
+    with pytest.raises(ValueError):
+        f.mode = "sideways"
+    with pytest.raises(ValueError):
+        VectorFunction([E.sin(Node("x", np.array([1.0, 2.0]), 1))], mode="reverse").jacobian